@@ -34,6 +34,10 @@ class ArtifactResolveError(DidWebsError):
     pass
 
 
+class ArtifactTooLargeError(ArtifactResolveError):
+    """Exception raised when a did:webs artifact exceeds the size allowed for it."""
+
+
 class UnknownAID(DidWebsError):
     """Exception raised when an unknown AID is encountered."""
 
@@ -5,7 +5,10 @@ dws.app.cli.commands.did.webs.resolve module
 """
 
 import argparse
+import contextlib
 import json
+import sys
+from collections.abc import Iterable
 
 from hio.base import doing
 from keri.app import habbing, oobiing
@@ -13,7 +16,7 @@ from keri.app.cli.common import existing
 from keri.vdr import credentialing
 
 from dws import log_name, ogler, set_log_level
-from dws.core import resolving
+from dws.core import requesting, resolving
 
 parser = argparse.ArgumentParser(description='Resolve a did:webs DID')
 parser.set_defaults(handler=lambda args: handler(args), transferable=True)
@@ -25,7 +28,28 @@ parser.add_argument(
 parser.add_argument(
     '--passcode', dest='bran', default=None, help='22 character encryption passcode for keystore (is not saved)'
 )
-parser.add_argument('-d', '--did', required=True, help='DID to resolve')
+target = parser.add_mutually_exclusive_group(required=True)
+target.add_argument('-d', '--did', help='DID to resolve')
+target.add_argument(
+    '-i',
+    '--input',
+    dest='input',
+    help="File of DIDs to resolve in bulk, one per line, or '-' for stdin. Blank lines and # comments are skipped",
+)
+parser.add_argument(
+    '-o',
+    '--output',
+    dest='output',
+    default=None,
+    help='File to write the JSON line of each DID resolved in bulk to. Default is stdout',
+)
+parser.add_argument(
+    '--concurrency',
+    dest='concurrency',
+    type=int,
+    default=8,
+    help='Number of DIDs resolved at once in bulk. Default is 8',
+)
 parser.add_argument(
     '-m',
     '--meta',
@@ -57,6 +81,19 @@ def handler(args):
     """Handles command line did:webs DID doc resolutions"""
     set_log_level(args.loglevel, logger)
     name = 'dws' if args.name is None or args.name == '' else args.name
+    if args.input is not None:
+        return [
+            BulkWebsResolver(
+                name=name,
+                base=args.base,
+                bran=args.bran,
+                input_file=args.input,
+                output_file=args.output,
+                meta=args.meta,
+                verbose=args.verbose,
+                concurrency=args.concurrency,
+            )
+        ]
     return [WebsResolver(name=name, base=args.base, bran=args.bran, did=args.did, meta=args.meta, verbose=args.verbose)]
 
 
@@ -98,3 +135,82 @@ class WebsResolver(doing.DoDoer):
         self.remove(self.toRemove)
         if not self.success:
             raise ValueError(f'Verification failure for {self.did}')
+
+
+def read_dids(lines: Iterable[str]) -> list[str]:
+    """DIDs of the lines of a bulk input, skipping blank lines, # comments, and repeated DIDs."""
+    dids = (line.split('#', 1)[0].strip() for line in lines)
+    return list(dict.fromkeys(did for did in dids if did))
+
+
+class BulkWebsResolver(doing.DoDoer):
+    """
+    Resolve the did:webs DIDs of a file or stdin in one keystore session, writing a JSON line per DID with its
+    verification status and resolution time. The keystore is opened once and the message processors and
+    keep-alive HTTP sessions are shared by every resolution.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base: str | None,
+        bran: str | None,
+        input_file: str,
+        output_file: str | None,
+        meta: bool,
+        verbose: bool,
+        concurrency: int,
+    ):
+        """
+        Parameters:
+            name (str): name of the keystore
+            base (str | None): optional prefix to the file location of the keystore
+            bran (str | None): passcode of the keystore
+            input_file (str): file of DIDs to resolve, '-' for stdin
+            output_file (str | None): file to write the JSON lines to, stdout if None
+            meta (bool): whether to include metadata in the DID documents
+            verbose (bool): whether to include each resolution result in its JSON line
+            concurrency (int): number of DIDs resolved at once
+        """
+        self.hby = existing.setupHby(name=name, base=base, bran=bran)
+        hby_doer = habbing.HaberyDoer(habery=self.hby)  # setup doer
+        self.rgy = credentialing.Regery(hby=self.hby, name=self.hby.name, base=self.hby.base, temp=self.hby.temp)
+        self.input_file = input_file
+        self.output_file = output_file
+        self.meta = meta
+        self.verbose = verbose
+        self.concurrency = concurrency
+        self.counts = {'verified': 0, 'failed': 0}
+
+        self.toRemove = [hby_doer]
+        super().__init__(doers=list(self.toRemove))
+
+    def recur(self, tock=0.0, **opts):
+        self.resolve()
+        return True
+
+    def resolve(self):
+        """Resolve every DID of the input and write their JSON lines in completion order."""
+        if self.input_file == '-':
+            dids = read_dids(sys.stdin)
+        else:
+            with open(self.input_file) as f:
+                dids = read_dids(f)
+
+        load_url = requesting.ArtifactCache(pool=requesting.SessionPool(), schemes=requesting.SchemeMemory())
+        with contextlib.ExitStack() as stack:
+            stack.callback(load_url.pool.close)
+            out = stack.enter_context(open(self.output_file, 'w')) if self.output_file is not None else sys.stdout
+            records = resolving.resolve_many(
+                self.hby, self.rgy, dids, meta=self.meta, load_url=load_url, concurrency=self.concurrency
+            )
+            for record in records:
+                self.counts['verified' if record['verified'] else 'failed'] += 1
+                if not self.verbose and record['verified']:
+                    del record['result']
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+        self.remove(self.toRemove)
+        logger.info(f'Resolved {len(dids)} DIDs, {self.counts["verified"]} verified, {self.counts["failed"]} failed')
+        if self.counts['failed']:
+            raise ValueError(f'Verification failure for {self.counts["failed"]} of {len(dids)} DIDs')
@@ -12,7 +12,7 @@ from keri.app import oobiing
 from keri.vdr import credentialing
 
 from dws import log_name, ogler, set_log_level
-from dws.core import habs, resolving
+from dws.core import caching, escrowing, habs, requesting, resolving, supervising, working
 
 parser = argparse.ArgumentParser(description='Expose did:webs resolver as an HTTP web service')
 parser.set_defaults(handler=lambda args: launch(args), transferable=True)
@@ -51,6 +51,114 @@ parser.add_argument(
 parser.add_argument('--keypath', action='store', required=False, default=None)
 parser.add_argument('--certpath', action='store', required=False, default=None)
 parser.add_argument('--cafilepath', action='store', required=False, default=None)
+parser.add_argument(
+    '--cache-size',
+    dest='cache_size',
+    type=int,
+    default=caching.ResolutionCache.DefaultSize,
+    help=f'Maximum number of cached resolution results, 0 disables caching. Default is {caching.ResolutionCache.DefaultSize}',
+)
+parser.add_argument(
+    '--cache-ttl',
+    dest='cache_ttl',
+    type=float,
+    default=caching.ResolutionCache.DefaultTTL,
+    help=f'Seconds a cached resolution result may be served after it was stored, hits do not extend it. Default is {caching.ResolutionCache.DefaultTTL}',
+)
+parser.add_argument(
+    '--escrow-tock',
+    dest='escrow_tock',
+    type=float,
+    default=escrowing.Escrower.DefaultTock,
+    help=f'Seconds between background escrow sweeps. Default is {escrowing.Escrower.DefaultTock}',
+)
+parser.add_argument(
+    '--escrow-budget',
+    dest='escrow_budget',
+    type=float,
+    default=escrowing.Escrower.DefaultBudget,
+    help=f'Seconds of escrow sweeping allowed per sweep. Default is {escrowing.Escrower.DefaultBudget}',
+)
+parser.add_argument(
+    '--scheme-policy',
+    dest='scheme_policy',
+    choices=requesting.SchemeMemory.Policies,
+    default=requesting.SchemeMemory.HttpsPreferred,
+    help=f'URL scheme policy for loading did:webs artifacts. Default is {requesting.SchemeMemory.HttpsPreferred}',
+)
+parser.add_argument(
+    '--http-host',
+    dest='http_hosts',
+    action='append',
+    default=None,
+    help='Host, as host or host:port, allowed to be loaded over HTTP under the https-only policy. May be repeated.',
+)
+parser.add_argument(
+    '--workers',
+    dest='workers',
+    type=int,
+    default=working.WorkerPool.DefaultSize,
+    help=f'Worker threads resolving DIDs off the HTTP server loop, 0 resolves on the loop. Default is {working.WorkerPool.DefaultSize}',
+)
+parser.add_argument(
+    '--queue-depth',
+    dest='queue_depth',
+    type=int,
+    default=working.WorkerPool.DefaultQueueDepth,
+    help=f'Resolutions allowed to wait for a worker before rejecting requests. Default is {working.WorkerPool.DefaultQueueDepth}',
+)
+parser.add_argument(
+    '--negative-ttl',
+    dest='negative_ttls',
+    action='append',
+    default=None,
+    metavar='CLASS=SECONDS',
+    help=f'Seconds failed resolutions of a failure class, one of {", ".join(caching.FailureClasses)}, are cached, '
+    f'0 disables caching them. May be repeated. Defaults are '
+    f'{", ".join(f"{k}={v:g}" for k, v in caching.NegativeCache.DefaultTTLs.items())}',
+)
+parser.add_argument(
+    '--breaker-threshold',
+    dest='breaker_threshold',
+    type=int,
+    default=requesting.CircuitBreaker.DefaultThreshold,
+    help=f'Consecutive artifact load failures opening the circuit of a host, 0 disables the circuit breaker. Default is {requesting.CircuitBreaker.DefaultThreshold}',
+)
+parser.add_argument(
+    '--breaker-backoff',
+    dest='breaker_backoff',
+    type=float,
+    default=requesting.CircuitBreaker.DefaultBackoff,
+    help=f'Seconds the circuit of a failing host stays open before it is probed. Default is {requesting.CircuitBreaker.DefaultBackoff}',
+)
+parser.add_argument(
+    '--max-did-json-size',
+    dest='max_did_json_size',
+    type=int,
+    default=requesting.DidJsonMaxSize,
+    help=f'Bytes allowed for a did.json artifact, larger downloads are aborted. Default is {requesting.DidJsonMaxSize}',
+)
+parser.add_argument(
+    '--max-keri-cesr-size',
+    dest='max_keri_cesr_size',
+    type=int,
+    default=requesting.KeriCesrMaxSize,
+    help=f'Bytes allowed for a keri.cesr artifact, larger downloads are aborted. Default is {requesting.KeriCesrMaxSize}',
+)
+parser.add_argument(
+    '--artifact-cache-bytes',
+    dest='artifact_cache_bytes',
+    type=int,
+    default=requesting.ArtifactCache.DefaultMaxBytes,
+    help=f'Bytes of did.json and keri.cesr artifacts cached for revalidation, 0 disables the artifact cache. Default is {requesting.ArtifactCache.DefaultMaxBytes}',
+)
+parser.add_argument(
+    '--processes',
+    dest='processes',
+    type=int,
+    default=0,
+    help='Worker processes sharing the HTTP port with a single keystore writer process, 0 serves from this process. Default is 0',
+)
 parser.add_argument(
     '--loglevel',
     action='store',
@@ -62,6 +170,21 @@ parser.add_argument(
 logger = ogler.getLogger(log_name)
 
 
+def negative_ttls(specs: list[str] | None) -> dict | None:
+    """Parses CLASS=SECONDS negative cache TTL options into a TTL per failure class."""
+    if not specs:
+        return None
+    ttls = {}
+    for spec in specs:
+        failure, sep, seconds = spec.partition('=')
+        if not sep or failure not in caching.FailureClasses:
+            raise ValueError(
+                f'Invalid negative TTL {spec}, expected CLASS=SECONDS with CLASS one of {", ".join(caching.FailureClasses)}'
+            )
+        ttls[failure] = float(seconds)
+    return ttls
+
+
 def launch(args, expire=0.0):
     """
     Launches a Falcon webserver listening on /1.0/identifiers/{did} for did:webs resolution requests
@@ -74,6 +197,38 @@ def launch(args, expire=0.0):
     except ValueError:
         logger.error(f'Invalid port number: {http_port}. Must be an integer.')
         raise
+    ttls = negative_ttls(args.negative_ttls)
+
+    if args.processes > 0:
+        options = {
+            'name': args.name,
+            'base': args.base,
+            'bran': args.bran,
+            'config_file': args.config_file,
+            'config_dir': args.config_dir,
+            'static_files_dir': args.static_files_dir,
+            'did_path': args.did_path,
+            'http_port': http_port,
+            'keypath': args.keypath,
+            'certpath': args.certpath,
+            'cafilepath': args.cafilepath,
+            'cache_size': args.cache_size,
+            'cache_ttl': args.cache_ttl,
+            'escrow_tock': args.escrow_tock,
+            'escrow_budget': args.escrow_budget,
+            'scheme_policy': args.scheme_policy,
+            'http_hosts': args.http_hosts,
+            'workers': args.workers,
+            'queue_depth': args.queue_depth,
+            'negative_ttls': ttls,
+            'breaker_threshold': args.breaker_threshold,
+            'breaker_backoff': args.breaker_backoff,
+            'max_did_json_size': args.max_did_json_size,
+            'max_keri_cesr_size': args.max_keri_cesr_size,
+            'artifact_cache_bytes': args.artifact_cache_bytes,
+        }
+        logger.info(f'Launching did:webs resolver on {http_port} with {args.processes} worker processes')
+        return [supervising.Supervisor(processes=args.processes, options=options)]
 
     doers = create_did_webs_doers(
         name=args.name,
@@ -87,6 +242,20 @@ def launch(args, expire=0.0):
         keypath=args.keypath,
         certpath=args.certpath,
         cafilepath=args.cafilepath,
+        cache_size=args.cache_size,
+        cache_ttl=args.cache_ttl,
+        escrow_tock=args.escrow_tock,
+        escrow_budget=args.escrow_budget,
+        scheme_policy=args.scheme_policy,
+        http_hosts=args.http_hosts,
+        workers=args.workers,
+        queue_depth=args.queue_depth,
+        negative_ttls=ttls,
+        breaker_threshold=args.breaker_threshold,
+        breaker_backoff=args.breaker_backoff,
+        max_did_json_size=args.max_did_json_size,
+        max_keri_cesr_size=args.max_keri_cesr_size,
+        artifact_cache_bytes=args.artifact_cache_bytes,
     )
     logger.info(f'Launched did:webs resolver on {http_port}')
     return doers
@@ -104,6 +273,20 @@ def create_did_webs_doers(
     keypath: str,
     certpath: str,
     cafilepath: str,
+    cache_size: int = caching.ResolutionCache.DefaultSize,
+    cache_ttl: float = caching.ResolutionCache.DefaultTTL,
+    escrow_tock: float = escrowing.Escrower.DefaultTock,
+    escrow_budget: float = escrowing.Escrower.DefaultBudget,
+    scheme_policy: str = requesting.SchemeMemory.HttpsPreferred,
+    http_hosts: list[str] | None = None,
+    workers: int = working.WorkerPool.DefaultSize,
+    queue_depth: int = working.WorkerPool.DefaultQueueDepth,
+    negative_ttls: dict | None = None,
+    breaker_threshold: int = requesting.CircuitBreaker.DefaultThreshold,
+    breaker_backoff: float = requesting.CircuitBreaker.DefaultBackoff,
+    max_did_json_size: int = requesting.DidJsonMaxSize,
+    max_keri_cesr_size: int = requesting.KeriCesrMaxSize,
+    artifact_cache_bytes: int = requesting.ArtifactCache.DefaultMaxBytes,
 ) -> List[doing.Doer]:
     cf = habs.get_habery_configer(name=config_file, base=base, head_dir_path=config_dir)
     hby, hby_doer = habs.get_habery_and_doer(name, base, bran, cf)
@@ -121,5 +304,19 @@ def create_did_webs_doers(
         keypath=keypath,
         certpath=certpath,
         cafilepath=cafilepath,
+        cache_size=cache_size,
+        cache_ttl=cache_ttl,
+        escrow_tock=escrow_tock,
+        escrow_budget=escrow_budget,
+        scheme_policy=scheme_policy,
+        http_hosts=http_hosts,
+        workers=workers,
+        queue_depth=queue_depth,
+        negative_ttls=negative_ttls,
+        breaker_threshold=breaker_threshold,
+        breaker_backoff=breaker_backoff,
+        max_did_json_size=max_did_json_size,
+        max_keri_cesr_size=max_keri_cesr_size,
+        artifact_cache_bytes=artifact_cache_bytes,
     )
     return doers
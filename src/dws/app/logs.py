@@ -1,4 +1,50 @@
+import json
 import logging
+import os
+
+PayloadLimit = 512  # characters of a payload logged unless payload dumps are enabled
+dump_payloads = os.environ.get('DWS_LOG_PAYLOADS', '').lower() in ('1', 'true', 'yes')  # log payloads in full
+
+
+def set_payload_dump(enabled: bool):
+    """Enable or disable logging of full payloads, such as DID documents and CESR streams, instead of truncated ones."""
+    global dump_payloads
+    dump_payloads = enabled
+
+
+class Payload:
+    """
+    Log argument for a possibly large payload, like a did.json document or a keri.cesr stream, that is only
+    decoded, serialized, and truncated when a log record is actually emitted. Pass it as a %s argument so a
+    disabled log level costs nothing beyond creating the wrapper:
+
+        logger.debug('Got DID doc: %s', Payload(dd_res))
+
+    Payloads are truncated to limit characters, or bytes for byte strings, unless payload dumps are enabled
+    with set_payload_dump or the DWS_LOG_PAYLOADS environment variable, in which case dicts and lists are
+    pretty printed in full.
+    """
+
+    __slots__ = ('limit', 'value')
+
+    def __init__(self, value, limit: int = PayloadLimit):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        value = self.value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            size = len(value)
+            if dump_payloads or size <= self.limit:
+                return bytes(value).decode('utf-8', errors='replace')
+            return f'{bytes(value[: self.limit]).decode("utf-8", errors="replace")}... ({size - self.limit} more bytes)'
+        if isinstance(value, (dict, list)):
+            text = json.dumps(value, indent=2 if dump_payloads else None, default=str)
+        else:
+            text = str(value)
+        if dump_payloads or len(text) <= self.limit:
+            return text
+        return f'{text[: self.limit]}... ({len(text) - self.limit} more characters)'
 
 
 class TruncatedFormatter(logging.Formatter):
@@ -0,0 +1,524 @@
+"""
+dws.core.aioresolving module
+
+asyncio native variant of the did:webs and did:keri universal resolver served as a falcon ASGI app, so one
+process can hold many in flight resolutions that mostly wait on remote artifact hosts. Artifacts are fetched
+with asyncio streams while the keystore side of resolution, shared with the WSGI resolver in resolving, runs
+on a single keystore thread so LMDB access stays serialized and the event loop is never blocked by it.
+
+Run under any ASGI server with the create_app factory, for example:
+
+    DWS_NAME=resolver uvicorn --factory dws.core.aioresolving:create_app
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import ssl
+import urllib.parse
+from collections.abc import Awaitable, Callable
+from concurrent import futures
+
+import falcon
+import falcon.asgi
+from hio.base import doing
+from keri.app import habbing, oobiing
+from keri.vdr import credentialing
+
+from dws import ArtifactResolveError, ArtifactTooLargeError, log_name, ogler
+from dws.core import caching, didding, escrowing, habs, ingesting, parsing, requesting, resolving
+from dws.core.ends import monitoring
+
+logger = ogler.getLogger(log_name)
+
+RedirectStatuses = (301, 302, 303, 307, 308)
+MaxRedirects = 30  # redirects followed for a GET, as many as requests follows
+
+
+async def http_get(
+    url: str,
+    timeout: float = 5.0,
+    headers: dict | None = None,
+    max_size: int | None = None,
+    on_chunk: Callable[[bytes], None] | None = None,
+    max_redirects: int = MaxRedirects,
+) -> (int, dict, bytes):
+    """
+    Performs an HTTP/1.1 GET with asyncio streams and returns the (status, headers, body) of the response.
+    Header names are lower cased. Content-Length, chunked, and connection close delimited bodies are supported.
+    The body of a 200 response is read in chunks, each handed to on_chunk as it arrives, and reading is aborted
+    with ArtifactTooLargeError as soon as the body exceeds max_size bytes. Redirects are followed, like
+    requests.get does, up to max_redirects times within the same timeout.
+    """
+
+    async def get(url: str) -> (int, dict, bytes):
+        parsed = urllib.parse.urlsplit(url)
+        secure = parsed.scheme == 'https'
+        port = parsed.port or (443 if secure else 80)
+        context = ssl.create_default_context() if secure else None
+        reader, writer = await asyncio.open_connection(
+            parsed.hostname, port, ssl=context, server_hostname=parsed.hostname if secure else None
+        )
+        try:
+            path = parsed.path or '/'
+            if parsed.query:
+                path += f'?{parsed.query}'
+            lines = [f'GET {path} HTTP/1.1', f'Host: {parsed.netloc}', 'Accept: */*', 'Connection: close']
+            lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            await writer.drain()
+
+            status_line = (await reader.readline()).decode('latin-1')
+            parts = status_line.split(' ', 2)
+            if len(parts) < 2 or not parts[1].isdigit():
+                raise ArtifactResolveError(f'Invalid HTTP status line from {url}: {status_line.strip()}')
+            status = int(parts[1])
+            response_headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                response_headers[name.strip().lower()] = value.strip()
+
+            chunks = []
+            received = 0
+
+            def receive(chunk: bytes):
+                nonlocal received
+                received += len(chunk)
+                if max_size is not None and received > max_size:
+                    raise ArtifactTooLargeError(f'Artifact {url} exceeds the {max_size} bytes allowed')
+                chunks.append(chunk)
+                if on_chunk is not None and status == 200:
+                    on_chunk(chunk)
+
+            if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+                while True:
+                    size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+                    if size == 0:
+                        break
+                    while size > 0:
+                        chunk = await reader.readexactly(min(size, requesting.ChunkSize))
+                        size -= len(chunk)
+                        receive(chunk)
+                    await reader.readline()  # CRLF ending the chunk
+            elif 'content-length' in response_headers:
+                length = int(response_headers['content-length'])
+                if max_size is not None and length > max_size:
+                    raise ArtifactTooLargeError(f'Artifact {url} of {length} bytes exceeds the {max_size} bytes allowed')
+                while length > 0:
+                    chunk = await reader.readexactly(min(length, requesting.ChunkSize))
+                    length -= len(chunk)
+                    receive(chunk)
+            else:
+                while chunk := await reader.read(requesting.ChunkSize):
+                    receive(chunk)
+            return status, response_headers, b''.join(chunks)
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def follow() -> (int, dict, bytes):
+        target = url
+        for _ in range(max_redirects + 1):
+            status, response_headers, body = await get(target)
+            location = response_headers.get('location')
+            if status not in RedirectStatuses or not location:
+                return status, response_headers, body
+            target = urllib.parse.urljoin(target, location)
+            logger.debug(f'Following redirect of {url} to {target}')
+        raise ArtifactResolveError(f'Exceeded {max_redirects} redirects loading {url}')
+
+    return await asyncio.wait_for(follow(), timeout=timeout)
+
+
+async def load_url(
+    url: str,
+    timeout: float = 5.0,
+    schemes: requesting.SchemeMemory | None = None,
+    limits: requesting.SizeLimits | None = None,
+) -> bytes:
+    """
+    Load a URL with the asyncio HTTP client, trying HTTPS first and falling back to HTTP, or in the order given
+    by the scheme memory. Returns empty bytes on a non-200 response, like requesting.load_url_with_requests,
+    including its size limits and framing of keri.cesr bodies as they arrive.
+    """
+    limits = limits if limits is not None else requesting.SizeLimits()
+    order = schemes.order(url) if schemes is not None else list(requesting.Schemes)
+    for i, scheme in enumerate(order):
+        last = i == len(order) - 1
+        attempt_url = requesting.with_scheme(url, scheme)
+        framer = ingesting.CesrFramer() if requesting.artifact_name(url) == 'keri.cesr' else None
+        try:
+            status, _, body = await http_get(
+                attempt_url,
+                timeout=timeout,
+                max_size=limits.limit(url),
+                on_chunk=framer.feed if framer is not None else None,
+            )
+        except ArtifactTooLargeError:
+            raise
+        except (TimeoutError, OSError, asyncio.IncompleteReadError, ArtifactResolveError, ValueError) as e:
+            logger.error(f'Failed to load {scheme.upper()} URL {attempt_url}: {e}')
+            if schemes is not None:
+                schemes.forget(url)
+            if last:
+                raise ArtifactResolveError(f'Failed to load {scheme.upper()} URL {attempt_url}') from e
+            continue
+        if status == 200:
+            if schemes is not None:
+                schemes.remember(url, scheme)
+            return framer.stream(body) if framer is not None else body
+        if last:
+            return b''
+        logger.error(f'Failed to load URL {attempt_url} with status {status}, trying with {order[i + 1].upper()}')
+    return b''
+
+
+async def get_dws_artifacts(
+    did: str, load_url: Callable[..., Awaitable[bytes]] = load_url, timeout: float = 5.0
+) -> (str, bytes, bytes):
+    """
+    Fetch the did.json and keri.cesr artifacts of a did:webs DID concurrently under one overall deadline of
+    timeout seconds for each scheme a fetch may try, so an HTTPS attempt timing out still leaves its HTTP
+    fallback the full timeout. The other fetch is cancelled as soon as one fails.
+
+    Returns:
+        (str, bytes, bytes): The AID, did.json content, and keri.cesr content for the given did:webs DID.
+    """
+    aid, dd_url, kc_url = resolving.gen_dws_urls(did=did)
+    logger.info(f'Loading DID Doc from {dd_url}')
+    logger.info(f'Loading KERI CESR from {kc_url}')
+    wait = timeout * len(requesting.Schemes)
+    dd_task = asyncio.ensure_future(load_url(dd_url, timeout=timeout))
+    kc_task = asyncio.ensure_future(load_url(kc_url, timeout=timeout))
+    try:
+        done, pending = await asyncio.wait([dd_task, kc_task], timeout=wait, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+        if pending:
+            raise ArtifactResolveError(f'Timed out after {wait} seconds loading did:webs artifacts for {did}')
+        return aid, dd_task.result(), kc_task.result()
+    finally:
+        for task in (dd_task, kc_task):
+            if not task.done():
+                task.cancel()
+
+
+async def in_keystore(keystore: futures.Executor | None, fn: Callable, *args, **kwa):
+    """Runs a keystore bound function on the keystore thread, keeping LMDB access off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(keystore, functools.partial(fn, *args, **kwa))
+
+
+async def resolve(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    did: str,
+    meta: bool = False,
+    load_url: Callable[..., Awaitable[bytes]] = load_url,
+    timeout: float = 5.0,
+    ingestor: ingesting.Ingestor = None,
+    keystore: futures.Executor | None = None,
+    digests: caching.DigestCache | None = None,
+    view: caching.DocumentView | None = None,
+) -> (bool, dict):
+    """
+    Resolve a did:webs DID and return the verification result, the asyncio counterpart of resolving.resolve.
+
+    Parameters:
+        hby (habbing.Habery): The Habery instance containing the KERI database.
+        rgy (credentialing.Regery): The Regery instance for credential and registry management.
+        did (str): The did:webs DID to resolve.
+        meta (bool): Whether to include metadata in the DID document.
+        load_url (Callable): Coroutine function to load URLs, can be mocked for testing.
+        timeout (float): Timeout for loading both artifacts in seconds.
+        ingestor (Ingestor): Long lived message processors to ingest keri.cesr with, created per call if None.
+        keystore (Executor | None): Executor keystore work runs on, the loop's default executor if None.
+        digests (DigestCache | None): cache of expected resolutions and their digests, disabled if None
+        view (DocumentView | None): materialized DID documents to verify against, generated per call if None
+
+    Returns:
+        tuple(bool, dict): (verified, resolution) where verified is a boolean indicating verification status
+    """
+    try:
+        aid, dd_res, kc_res = await get_dws_artifacts(did=did, load_url=load_url, timeout=timeout)
+    except ArtifactResolveError as e:
+        logger.error(f'Failed to resolve DID {did}: {e}')
+        return False, {'error': str(e)}
+    except Exception as e:
+        logger.exception(f'Unexpected error while resolving DID {did}')
+        return False, {'error': f'Unexpected error while resolving DID {did}: {e}'}
+    return await in_keystore(
+        keystore,
+        resolving.verify_artifacts,
+        hby=hby,
+        rgy=rgy,
+        did=did,
+        aid=aid,
+        dd_res=dd_res,
+        kc_res=kc_res,
+        meta=meta,
+        ingestor=ingestor,
+        digests=digests,
+        view=view,
+    )
+
+
+async def resolve_did_keri(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    did: str,
+    oobi: str | None = None,
+    meta: bool = False,
+    keystore: futures.Executor | None = None,
+    timeout: float = 30.0,
+    tock: float = 0.03125,
+    view: caching.DocumentView | None = None,
+) -> (bool, dict):
+    """
+    Performs a did:keri DID document resolution, the asyncio counterpart of resolving.resolve_did_keri.
+    The OOBI is resolved by stepping an Oobiery on the keystore thread and sleeping on the event loop
+    between steps, so waiting on the OOBI host does not block other resolutions.
+    """
+    aid, _ = didding.parse_did_keri(did)
+    generate = view.document if view is not None else didding.generate_did_doc
+    known = await in_keystore(keystore, lambda: aid in hby.kevers)
+    if oobi is None and not known:
+        return False, {'error': f'Unknown AID, cannot resolve DID {did}'}
+    if known:  # return early if AID is known
+        return True, await in_keystore(keystore, generate, hby, rgy, did=did, aid=aid, meta=meta)
+
+    oobiery = oobiing.Oobiery(hby=hby)
+    doist = doing.Doist(limit=timeout, tock=tock, real=True)
+    deeds = await in_keystore(keystore, doist.enter, oobiery.doers)
+    await in_keystore(keystore, resolving.queue_oobi, hby, aid, oobi)
+
+    def step() -> bool:
+        doist.recur(deeds)
+        hby.kvy.processEscrows()  # for delegated AIDs so authorizing event seals (AES) from delegator ixn evts are found
+        return resolving.oobi_resolved(hby, aid, oobi)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not await in_keystore(keystore, step):
+        if loop.time() > deadline:
+            return False, {'error': f'Timed out resolving OOBI {oobi} for DID {did}'}
+        await asyncio.sleep(tock)
+    if view is not None:
+        await in_keystore(keystore, view.oobis.add, hby, oobi)
+    return True, await in_keystore(keystore, generate, hby, rgy, did=did, aid=aid, meta=meta)
+
+
+class UniversalResolverResource:
+    """
+    Async HTTP Resource enabling the Universal Resolver to resolve did:webs and did:keri DIDs using the
+    /1.0/identifiers/{did} endpoint, the ASGI counterpart of resolving.UniversalResolverResource.
+    """
+
+    TimeoutArtifactResolution = 5.0  # seconds to wait for artifact resolution before timing out
+
+    def __init__(
+        self,
+        hby: habbing.Habery,
+        rgy: credentialing.Regery,
+        load_url: Callable[..., Awaitable[bytes]] = load_url,
+        cache: caching.ResolutionCache | None = None,
+        ingestor: ingesting.Ingestor | None = None,
+        keystore: futures.Executor | None = None,
+        digests: caching.DigestCache | None = None,
+        view: caching.DocumentView | None = None,
+    ):
+        """
+        Parameters:
+            hby (Habery): identifier database environment
+            rgy (Regery): Credential and registry data manager
+            load_url (Callable): coroutine function to load did.json and keri.cesr - simplifies testing
+            cache (ResolutionCache): cache of verified did:webs resolution results, disabled if None
+            ingestor (Ingestor): message processors shared by all resolutions, created per resolution if None
+            keystore (Executor): executor keystore work runs on, the loop's default executor if None
+            digests (DigestCache): cache of expected did:webs resolutions and their digests, disabled if None
+            view (DocumentView): materialized DID documents resolutions read from, generated per resolution if None
+        """
+        self.hby = hby
+        self.rgy = rgy
+        self.load_url = load_url
+        self.cache = cache
+        self.ingestor = ingestor
+        self.keystore = keystore
+        self.digests = digests
+        self.view = view
+
+    async def on_get(self, req: falcon.asgi.Request, rep: falcon.asgi.Response, did: str):
+        """
+        Handle GET requests to resolve a DID by its identifier (KERI AID).
+
+        Parameters:
+            req (falcon.asgi.Request): The HTTP request object.
+            rep (falcon.asgi.Response): The HTTP response object.
+            did (str): The DID to resolve.
+        """
+        if did is None or did == '':
+            logger.error(f'Missing DID: {did}')
+            rep.status = falcon.HTTP_400
+            rep.content_type = 'application/json'
+            rep.media = {'error': "invalid resolution request body, 'did' is required"}
+            return
+
+        try:
+            did = didding.requote(did)  # Re-quote the DID to ensure it is valid for resolution
+        except ValueError as e:
+            logger.error(f'Invalid DID: {did}')
+            rep.status = falcon.HTTP_400
+            rep.content_type = 'application/json'
+            rep.media = {'message': f'invalid DID: {did}', 'error': str(e)}
+            return
+        logger.info(f'Request to resolve did: {did}')
+        oobi, meta = resolving.resolution_options(req)
+
+        if did.startswith('did:webs'):
+            _, _, _, aid, query = didding.parse_did_webs(did=did)
+            query_vars = didding.parse_query_string(query)
+            if 'meta' in query_vars:
+                meta = query_vars['meta']
+            result, data = await self.resolve_did_webs(did=did, aid=aid, meta=meta)
+        elif did.startswith('did:keri'):
+            result, data = await resolve_did_keri(self.hby, self.rgy, did, oobi, meta, keystore=self.keystore, view=self.view)
+        else:
+            logger.error(f'Failed to resolve invalid DID: {did}')
+            rep.status = falcon.HTTP_400
+            rep.media = {'error': f'invalid DID: {did}'}
+            return
+
+        resolving.respond_resolution(rep, did, result, data)
+
+    async def resolve_did_webs(self, did: str, aid: str, meta: bool) -> (bool, dict):
+        """Resolve a did:webs DID, serving and storing verified results through the resolution cache when enabled."""
+        if self.cache is not None:
+            cached = await in_keystore(self.keystore, self.cache.get, self.hby, self.rgy, did, meta)
+            if cached is not None:
+                logger.info(f'Resolution cache hit for {did}')
+                return True, cached
+
+        result, data = await resolve(
+            hby=self.hby,
+            rgy=self.rgy,
+            did=did,
+            meta=meta,
+            load_url=self.load_url,
+            timeout=self.TimeoutArtifactResolution,
+            ingestor=self.ingestor,
+            keystore=self.keystore,
+            digests=self.digests,
+            view=self.view,
+        )
+        if result and self.cache is not None:
+            await in_keystore(self.keystore, self.cache.put, self.hby, self.rgy, did, meta, aid, data)
+        return result, data
+
+
+class EscrowLifespan:
+    """
+    ASGI lifespan middleware running the Escrower sweeps as an asyncio task for the life of the app,
+    standing in for the Doist that runs the Escrower Doer in the HIO served resolver.
+    """
+
+    def __init__(self, escrower: escrowing.Escrower, keystore: futures.Executor | None = None):
+        self.escrower = escrower
+        self.keystore = keystore
+        self.task: asyncio.Task | None = None
+
+    async def sweep(self):
+        while True:
+            await in_keystore(self.keystore, self.escrower.sweep)
+            await asyncio.sleep(self.escrower.tock)
+
+    async def process_startup(self, scope, event):
+        self.task = asyncio.create_task(self.sweep())
+
+    async def process_shutdown(self, scope, event):
+        if self.task is not None:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+
+
+def asgi_app(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    cache_size: int = caching.ResolutionCache.DefaultSize,
+    cache_ttl: float = caching.ResolutionCache.DefaultTTL,
+    escrow_tock: float = escrowing.Escrower.DefaultTock,
+    escrow_budget: float = escrowing.Escrower.DefaultBudget,
+    scheme_policy: str = requesting.SchemeMemory.HttpsPreferred,
+    http_hosts: list[str] | None = None,
+    max_did_json_size: int = requesting.DidJsonMaxSize,
+    max_keri_cesr_size: int = requesting.KeriCesrMaxSize,
+) -> falcon.asgi.App:
+    """
+    Create a falcon ASGI resolver app serving /1.0/identifiers/{did}, /health, and /metrics.
+
+    Parameters:
+        hby (habbing.Habery): identifier database environment
+        rgy (credentialing.Regery): credential and registry data manager
+        cache_size (int): maximum number of cached resolution results, 0 disables the resolution cache
+        cache_ttl (float): seconds a cached resolution result may be served
+        escrow_tock (float): seconds between background escrow sweeps
+        escrow_budget (float): seconds of escrow sweeping allowed per tick
+        scheme_policy (str): URL scheme policy for loading artifacts, one of requesting.SchemeMemory.Policies
+        http_hosts (list[str] | None): hosts allowed to be loaded over HTTP under the https-only policy
+        max_did_json_size (int): bytes allowed for a did.json artifact, larger downloads are aborted
+        max_keri_cesr_size (int): bytes allowed for a keri.cesr artifact, larger downloads are aborted
+    """
+    keystore = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='dws-keystore')
+    ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+    escrower = escrowing.Escrower(ingestor=ingestor, tock=escrow_tock, budget=escrow_budget)
+    cache = caching.ResolutionCache(size=cache_size, ttl=cache_ttl, aliases=ingestor.aliases) if cache_size > 0 else None
+    schemes = requesting.SchemeMemory(policy=scheme_policy, http_hosts=http_hosts)
+    limits = requesting.SizeLimits(did_json=max_did_json_size, keri_cesr=max_keri_cesr_size)
+
+    app = falcon.asgi.App(
+        middleware=[resolving.cors_middleware(), resolving.RequestLoggerMiddleware(), EscrowLifespan(escrower, keystore)]
+    )
+    app.req_options.media_handlers = resolving.request_media_handlers()
+    app.resp_options.media_handlers = resolving.response_media_handlers()
+    resolver = UniversalResolverResource(
+        hby=hby,
+        rgy=rgy,
+        load_url=functools.partial(load_url, schemes=schemes, limits=limits),
+        cache=cache,
+        ingestor=ingestor,
+        keystore=keystore,
+        digests=caching.DigestCache(size=cache_size),
+        view=caching.DocumentView(size=cache_size, aliases=ingestor.aliases),
+    )
+    app.add_route('/1.0/identifiers/{did}', resolver)
+    app.add_route('/health', monitoring.AsyncHealthEnd())
+    app.add_route('/metrics', monitoring.AsyncMetricsEnd(sources={'escrows': escrower.metrics, 'parsing': parsing.metrics}))
+    return app
+
+
+def create_app() -> falcon.asgi.App:
+    """
+    ASGI app factory configured from environment variables, for ASGI servers like uvicorn --factory.
+
+    Environment:
+        DWS_NAME: name of the resolver keystore, required
+        DWS_BASE: optional prefix to the file location of the keystore
+        DWS_PASSCODE: encryption passcode of the keystore
+        DWS_CONFIG_DIR: directory override for configuration data
+        DWS_CONFIG_FILE: configuration filename override
+    """
+    name = os.environ.get('DWS_NAME')
+    if not name:
+        raise ValueError('DWS_NAME environment variable is required to create the ASGI resolver app')
+    base = os.environ.get('DWS_BASE', '')
+    cf = habs.get_habery_configer(
+        name=os.environ.get('DWS_CONFIG_FILE'), base=base, head_dir_path=os.environ.get('DWS_CONFIG_DIR')
+    )
+    hby, _ = habs.get_habery_and_doer(name, base, os.environ.get('DWS_PASSCODE'), cf)
+    rgy = credentialing.Regery(hby=hby, name=hby.name, base=hby.base, temp=hby.temp)
+    return asgi_app(hby, rgy)
@@ -12,6 +12,7 @@ from keri.vdr.credentialing import Regery
 from keri.vdr.viring import Reger
 
 from dws import UnknownAID, log_name, ogler
+from dws.app.logs import Payload
 from dws.core import didding, ends, resolving, webbing
 from dws.core.didding import DES_ALIASES_SCHEMA
 
@@ -38,21 +39,19 @@ def write_keri_cesr_file(output_dir: str, aid: str, keri_cesr: bytearray):
     kc_file_path = os.path.join(kc_file_path, ends.KERI_CESR)
     with open(kc_file_path, 'w') as kcf:
         tmsg = keri_cesr.decode('utf-8')
-        logger.debug(f'Writing CESR events to {kc_file_path}: \n{tmsg}')
+        logger.debug('Writing CESR events to %s: \n%s', kc_file_path, Payload(tmsg))
         kcf.write(tmsg)
 
 
 def get_self_issued_acdcs(aid: str, reger: credentialing.Reger, schema: str = didding.DES_ALIASES_SCHEMA):
     """Get self issued ACDCs filtered by schema"""
     creds_issued = reger.issus.get(keys=aid)
-    creds_by_schema = reger.schms.get(keys=schema.encode('utf-8'))
+    if not creds_issued:
+        return []
+    creds_by_schema = {cred_by_schm.qb64 for cred_by_schm in reger.schms.get(keys=schema.encode('utf-8'))}
 
     # self-attested, there is no issuee, and schema is designated aliases
-    return [
-        cred_issued
-        for cred_issued in creds_issued
-        if cred_issued.qb64 in [cred_by_schm.qb64 for cred_by_schm in creds_by_schema]
-    ]
+    return [cred_issued for cred_issued in creds_issued if cred_issued.qb64 in creds_by_schema]
 
 
 def gen_tel_cesr(reger: viring.Reger, evt_pre: str) -> bytearray:
@@ -111,10 +110,10 @@ def get_witness_loc_scheme_bytes(hab: habbing.Hab, wit_prefixes: list[str], sche
     msgs = bytearray()
     for eid in wit_prefixes:
         loc_scheme_msg = hab.loadLocScheme(eid=eid, scheme=scheme)
-        logger.debug(f'Found witness location scheme message for eid {eid}: {loc_scheme_msg}')
+        logger.debug('Found witness location scheme message for eid %s: %s', eid, Payload(loc_scheme_msg))
         msgs.extend(loc_scheme_msg if loc_scheme_msg else bytearray())
         end_role_msg = hab.loadEndRole(cid=eid, eid=eid, role=kering.Roles.controller)
-        logger.debug(f'Found witness endpoint role message for eid {eid}: {end_role_msg}')
+        logger.debug('Found witness endpoint role message for eid %s: %s', eid, Payload(end_role_msg))
         msgs.extend(end_role_msg if end_role_msg else bytearray())
     return msgs
 
@@ -125,11 +124,11 @@ def get_agent_loc_scheme_bytes(hab: habbing.Hab, aid: str, scheme: str = '') ->
     for (_, erole, eid), _ in hab.db.ends.getItemIter(keys=(aid, kering.Roles.agent)):
         # Get the location scheme message for the agent
         loc_scheme_msg = hab.loadLocScheme(eid=eid, scheme=scheme)
-        logger.debug(f'Found agent location scheme message for eid {eid}: {loc_scheme_msg}')
+        logger.debug('Found agent location scheme message for eid %s: %s', eid, Payload(loc_scheme_msg))
         msgs.extend(loc_scheme_msg if loc_scheme_msg else bytearray())
         # Get the endpoint role message for the agent
         end_role_msg = hab.loadEndRole(cid=aid, eid=eid, role=erole)
-        logger.debug(f'Found agent endpoint role message for eid {eid}: {end_role_msg}')
+        logger.debug('Found agent endpoint role message for eid %s: %s', eid, Payload(end_role_msg))
         msgs.extend(end_role_msg if end_role_msg else bytearray())
     return msgs
 
@@ -140,11 +139,11 @@ def get_mailbox_loc_scheme_endrole_bytes(hab: habbing.Hab, aid: str, scheme: str
     for (_, erole, eid), _ in hab.db.ends.getItemIter(keys=(aid, kering.Roles.mailbox)):
         # Get the location scheme message for the mailbox
         loc_scheme_msg = hab.loadLocScheme(eid=eid)
-        logger.debug(f'Found mailbox location scheme message for eid {eid}: {loc_scheme_msg}')
+        logger.debug('Found mailbox location scheme message for eid %s: %s', eid, Payload(loc_scheme_msg))
         msgs.extend(loc_scheme_msg if loc_scheme_msg else bytearray())
         # Get the endpoint role message for the mailbox
         end_role_msg = hab.loadEndRole(cid=aid, eid=eid, role=erole)
-        logger.debug(f'Found mailbox endpoint role message for eid {eid}: {end_role_msg}')
+        logger.debug('Found mailbox endpoint role message for eid %s: %s', eid, Payload(end_role_msg))
         msgs.extend(end_role_msg if end_role_msg else bytearray())
     return msgs
 
@@ -205,7 +204,7 @@ def generate_artifacts(hby: Habery, rgy: Regery, did: str, meta: bool = False, o
     dd_dir_path = make_did_json_path(output_dir, aid)
     write_did_json_file(dd_dir_path, did_json, meta)
 
-    logger.info(f'Generating CESR event stream data from local Habery keystore')
+    logger.info('Generating CESR event stream data from local Habery keystore')
     hab = hby.habs[aid]
     reger = rgy.reger
     keri_cesr = bytearray()
@@ -0,0 +1,471 @@
+"""
+dws.core.caching module
+
+In-process caches used by the did:webs resolver service.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, ClassVar
+
+from keri.app import habbing
+from keri.help import helping
+from keri.vdr import credentialing
+
+from dws import log_name, ogler
+from dws.core import didding, indexing, oobiing
+
+logger = ogler.getLogger(log_name)
+
+
+def kever_of(hby: habbing.Habery, aid: str):
+    """
+    Returns the Kever of the AID or None if the AID is not known to the local keystore. Unlike kevers.get
+    this reads through to the key states of the keystore, so key state stored by another process is found.
+    """
+    if aid not in hby.kevers:
+        return None
+    return hby.kevers[aid]
+
+
+def kel_tip(hby: habbing.Habery, aid: str) -> tuple[int, str] | None:
+    """
+    Returns the (sequence number, event digest) of the latest accepted KEL event for the AID
+    or None if the AID is not known to the local keystore.
+    """
+    kever = kever_of(hby, aid)
+    if kever is None:
+        return None
+    return kever.sner.num, kever.serder.said
+
+
+def alias_tel_state(
+    rgy: credentialing.Regery,
+    aid: str,
+    schema: str = didding.DES_ALIASES_SCHEMA,
+    aliases: indexing.AliasIndex | None = None,
+) -> tuple:
+    """
+    Returns a tuple of (credential SAID, TEL event count) pairs for every designated alias ACDC issued by the AID.
+    Any issuance or revocation of a designated alias ACDC changes this tuple. Read from the AliasIndex aliases
+    when given, otherwise from a scan of the ACDCs of the schema.
+    """
+    if aliases is not None:
+        return tuple((said, record.tels) for said, record in aliases.records(rgy, aid, schema).items())
+    saids = rgy.reger.issus.get(keys=aid)
+    if not saids:
+        return ()
+    schema_saids = {saider.qb64 for saider in rgy.reger.schms.get(keys=schema)}
+    return tuple((saider.qb64, rgy.reger.cntTels(saider.qb64)) for saider in saids if saider.qb64 in schema_saids)
+
+
+def resolution_state(
+    hby: habbing.Habery, rgy: credentialing.Regery, aid: str, aliases: indexing.AliasIndex | None = None
+) -> tuple | None:
+    """Returns the key state a resolution result depends on, the KEL tip and designated alias TEL state, or None."""
+    tip = kel_tip(hby, aid)
+    if tip is None:
+        return None
+    return tip, alias_tel_state(rgy, aid, aliases=aliases)
+
+
+def endpoint_state(hby: habbing.Habery, aid: str) -> tuple:
+    """
+    Returns the end role authorizations of the AID along with the location scheme URLs of its witnesses and
+    authorized endpoints, the records the service endpoints of its DID document are generated from.
+    """
+    kever = kever_of(hby, aid)
+    roles = tuple((role, eid, end.allowed, end.enabled) for (_, role, eid), end in hby.db.ends.getItemIter(keys=(aid,)))
+    eids = sorted({eid for _, eid, _, _ in roles}.union(kever.wits if kever is not None else ()))
+    locs = tuple((eid, scheme, loc.url) for eid in eids for (_, scheme), loc in hby.db.locs.getItemIter(keys=(eid,)))
+    return roles, locs
+
+
+def delegation_state(hby: habbing.Habery, aid: str, oobis: indexing.OobiIndex | None = None) -> tuple | None:
+    """
+    Returns the delegator of a local delegated AID along with the resolved OOBI of the delegator, the records the
+    delegation service of its DID document is generated from, or None when the AID is not a local delegated AID.
+    """
+    delpre = getattr(hby.habs.get(aid), 'delpre', None)
+    if delpre is None:
+        return None
+    return delpre, oobiing.get_resolved_oobi(hby, pre=delpre, oobis=oobis)
+
+
+def document_state(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    aid: str,
+    oobis: indexing.OobiIndex | None = None,
+    aliases: indexing.AliasIndex | None = None,
+) -> tuple | None:
+    """
+    Returns the state a generated DID document depends on, the resolution state, endpoint state and delegation
+    state, or None. Delegator OOBIs are looked up in the OobiIndex oobis and designated aliases in the AliasIndex
+    aliases when given.
+    """
+    state = resolution_state(hby, rgy, aid, aliases=aliases)
+    if state is None:
+        return None
+    return state + (endpoint_state(hby, aid), delegation_state(hby, aid, oobis))
+
+
+def refresh_retrieved(resolution: dict, meta: bool) -> dict:
+    """Copy of a stored DID document or resolution with the retrieval time of its resolution metadata set to now."""
+    resolution = copy.deepcopy(resolution)
+    if meta:
+        resolution[didding.DID_RES_META_FIELD]['retrieved'] = helping.nowUTC().strftime(didding.DID_TIME_FORMAT)
+    return resolution
+
+
+@dataclass
+class CacheEntry:
+    """A cached resolution result with the key state it was computed against."""
+
+    aid: str
+    state: tuple
+    expires: float
+    value: Any
+
+
+class ResolutionCache:
+    """
+    LRU cache of successful DID resolution results keyed by (DID, meta).
+
+    Entries are validated on every read against the current KEL tip (sequence number and event digest)
+    of the AID and the TEL state of its designated alias ACDCs, so any newly ingested key event or alias
+    issuance or revocation invalidates the entry. The TTL bounds how long changes published by the
+    remote host, and not yet ingested, go unnoticed.
+
+    The TTL is a hard maximum age counted from when the result was stored. A hit validated against unchanged
+    key state does not extend it, since validation only consults the local keystore and never the host, so
+    extending it would serve a hot DID without ever loading its artifacts again. Once expired the DID is
+    resolved again, which revalidates the artifacts with conditional requests and verifies an unchanged
+    did.json by its digest rather than generating the DID document anew.
+    """
+
+    DefaultSize = 1024  # maximum number of cached resolution results
+    DefaultTTL = 300.0  # seconds a cached resolution result may be served
+
+    def __init__(
+        self,
+        size: int = DefaultSize,
+        ttl: float = DefaultTTL,
+        clock: Callable[[], float] = time.monotonic,
+        aliases: indexing.AliasIndex | None = None,
+    ):
+        """
+        Parameters:
+            size (int): maximum number of entries held before the least recently used entry is evicted
+            ttl (float): seconds an entry may be served after it was stored, however often it is hit
+            clock (Callable): monotonic time source, injectable for testing
+            aliases (AliasIndex | None): index the designated alias TEL state is read from, scanned if None
+        """
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self.aliases = aliases
+        self.entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(did: str, meta: Any) -> tuple:
+        """Cache key for a DID already canonicalized with didding.requote and the requested meta flag."""
+        return did, meta
+
+    def get(self, hby: habbing.Habery, rgy: credentialing.Regery, did: str, meta: Any) -> Any | None:
+        """Returns a copy of the cached resolution result if present, unexpired, and still valid for the AID key state."""
+        key = self.key(did, meta)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires <= self.clock():
+                del self.entries[key]
+                self.misses += 1
+                logger.debug('Resolution cache entry expired for %s', did)
+                return None
+        # read key state outside of the lock since it touches LMDB
+        if resolution_state(hby, rgy, entry.aid, aliases=self.aliases) != entry.state:
+            with self.lock:
+                if self.entries.get(key) is entry:
+                    del self.entries[key]
+                self.misses += 1
+            logger.debug('Resolution cache entry stale for %s', did)
+            return None
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry.value)
+
+    def put(self, hby: habbing.Habery, rgy: credentialing.Regery, did: str, meta: Any, aid: str, value: Any):
+        """Stores a resolution result computed against the current key state of the AID."""
+        if self.size <= 0:
+            return
+        state = resolution_state(hby, rgy, aid, aliases=self.aliases)
+        if state is None:
+            return
+        entry = CacheEntry(aid=aid, state=state, expires=self.clock() + self.ttl, value=copy.deepcopy(value))
+        key = self.key(did, meta)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, aid: str | None = None):
+        """Drops all entries for the AID, or every entry when no AID is given."""
+        with self.lock:
+            if aid is None:
+                self.entries.clear()
+                return
+            for key in [key for key, entry in self.entries.items() if entry.aid == aid]:
+                del self.entries[key]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+FailureArtifact = 'artifact'  # did.json or keri.cesr could not be loaded from the host
+FailureParse = 'parse'  # did.json or keri.cesr could not be parsed
+FailureUnknownAID = 'unknownAid'  # keri.cesr did not establish the AID of the DID
+FailureClasses = (FailureArtifact, FailureParse, FailureUnknownAID)
+
+
+class NegativeCache:
+    """
+    LRU cache of failed DID resolutions keyed by DID, so a failing DID is answered from memory instead of being
+    resolved from scratch on every request. Each failure class has its own short TTL, a TTL of 0 disables caching
+    failures of that class. Unlike ResolutionCache entries, failures are not validated against key state since
+    they are only ever held for seconds.
+    """
+
+    DefaultSize = 4096  # maximum number of cached failures
+    DefaultTTLs: ClassVar[dict[str, float]] = {
+        FailureArtifact: 15.0,
+        FailureParse: 60.0,
+        FailureUnknownAID: 30.0,
+    }  # seconds per failure class
+
+    def __init__(self, ttls: dict | None = None, size: int = DefaultSize, clock: Callable[[], float] = time.monotonic):
+        """
+        Parameters:
+            ttls (dict | None): seconds a failure is cached per failure class, overriding DefaultTTLs
+            size (int): maximum number of failures held before the least recently stored is evicted
+            clock (Callable): monotonic time source, injectable for testing
+        """
+        unknown = set(ttls or {}) - set(FailureClasses)
+        if unknown:
+            raise ValueError(f'Unknown failure classes {", ".join(sorted(unknown))}, expected {", ".join(FailureClasses)}')
+        self.ttls = {**self.DefaultTTLs, **(ttls or {})}
+        self.size = size
+        self.clock = clock
+        self.entries: OrderedDict[str, tuple[str, float, dict]] = OrderedDict()  # did -> (failure, expires, resolution)
+        self.lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, did: str) -> tuple[str, dict] | None:
+        """Returns the (failure class, resolution) of a cached unexpired failure of the DID."""
+        with self.lock:
+            entry = self.entries.get(did)
+            if entry is None:
+                return None
+            failure, expires, data = entry
+            if expires <= self.clock():
+                del self.entries[did]
+                return None
+            self.hits += 1
+            return failure, copy.deepcopy(data)
+
+    def put(self, did: str, failure: str, data: dict):
+        """Stores a failed resolution of the DID for the TTL of its failure class."""
+        ttl = self.ttls.get(failure, 0.0)
+        if ttl <= 0 or self.size <= 0:
+            return
+        with self.lock:
+            self.entries[did] = (failure, self.clock() + ttl, copy.deepcopy(data))
+            self.entries.move_to_end(did)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, did: str | None = None):
+        """Drops the cached failure of the DID, or every cached failure when no DID is given."""
+        with self.lock:
+            if did is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(did, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+@dataclass
+class DigestEntry:
+    """The expected resolution of a DID at a key state, its DID document digest, and did.json digests verified against it."""
+
+    state: tuple
+    digest: str
+    value: dict
+    verified: OrderedDict[str, None]
+
+
+class DigestCache:
+    """
+    LRU cache of the expected resolution of a DID and the RFC 8785 (JCS) digest of its DID document, keyed by
+    (DID, AID, meta) and valid for a single key state of the AID, its KEL tip and designated alias TEL state.
+
+    Each entry also remembers the digests of the raw did.json artifacts already verified against it, so verifying
+    a republished did.json against an unchanged KEL costs one hash of the fetched bytes rather than generating and
+    comparing the DID document again.
+    """
+
+    DefaultSize = 1024  # maximum number of cached expected resolutions
+    DefaultVerified = 4  # did.json digests remembered per expected resolution
+
+    def __init__(self, size: int = DefaultSize, verified: int = DefaultVerified):
+        """
+        Parameters:
+            size (int): maximum number of entries held before the least recently used entry is evicted
+            verified (int): did.json digests remembered per entry before the least recently verified is forgotten
+        """
+        self.size = size
+        self.verified = verified
+        self.entries: OrderedDict[tuple, DigestEntry] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, did: str, aid: str, meta: Any, state: tuple) -> DigestEntry | None:
+        """Returns the entry of the DID if it was computed against the given key state, dropping a stale entry."""
+        key = (did, aid, meta)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.state != state:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, did: str, aid: str, meta: Any, state: tuple, digest: str, value: dict) -> DigestEntry:
+        """Stores the expected resolution and DID document digest of the DID computed against the key state."""
+        entry = DigestEntry(state=state, digest=digest, value=copy.deepcopy(value), verified=OrderedDict())
+        if self.size <= 0:
+            return entry
+        key = (did, aid, meta)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return entry
+
+    def verified_raw(self, entry: DigestEntry, raw: str) -> bool:
+        """True when a did.json artifact with the raw digest was already verified against the entry."""
+        with self.lock:
+            if raw not in entry.verified:
+                return False
+            entry.verified.move_to_end(raw)
+            self.hits += 1
+            return True
+
+    def add_verified(self, entry: DigestEntry, raw: str):
+        """Remembers that a did.json artifact with the raw digest verified against the entry."""
+        with self.lock:
+            entry.verified[raw] = None
+            entry.verified.move_to_end(raw)
+            while len(entry.verified) > self.verified:
+                entry.verified.popitem(last=False)
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class DocumentView:
+    """
+    Materialized DID documents generated from the local keystore, keyed by (AID, DID, meta) so each form of the
+    DID of an AID, did:webs, did:web, or did:keri, with or without metadata, is generated once per key state.
+
+    Entries are validated on every read against the document state of the AID, so accepting a key event,
+    a witness rotation, an end role or location scheme reply, an issuance or revocation of a designated alias
+    ACDC, or resolving the OOBI of the delegator of a delegated AID replaces the stored document on its next read.
+    Validating rather than invalidating on ingestion keeps documents current when the keystore is written by
+    another process, such as a controller rotating a hosted AID or the writer process of the resolver. Reading the state touches a few keystore records while
+    generating a document derives the JWKs of every key. Designated aliases are read from an AliasIndex and
+    delegator OOBIs from an OobiIndex.
+    """
+
+    DefaultSize = 1024  # maximum number of materialized DID documents
+
+    def __init__(
+        self, size: int = DefaultSize, aliases: indexing.AliasIndex | None = None, oobis: indexing.OobiIndex | None = None
+    ):
+        """
+        Parameters:
+            size (int): maximum number of documents held before the least recently used document is evicted
+            aliases (AliasIndex | None): index designated aliases are read from, created if None
+            oobis (OobiIndex | None): index delegator OOBIs are read from, created if None
+        """
+        self.size = size
+        self.aliases = aliases if aliases is not None else indexing.AliasIndex()
+        self.oobis = oobis if oobis is not None else indexing.OobiIndex()
+        self.entries: OrderedDict[tuple, tuple[tuple, dict]] = OrderedDict()  # (aid, did, meta) -> (state, document)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def document(self, hby: habbing.Habery, rgy: credentialing.Regery, did: str, aid: str, meta: bool = False) -> dict:
+        """
+        Returns a copy of the DID document of the AID as didding.generate_did_doc would generate it, generating
+        and storing it only when it is not stored for the current document state of the AID.
+
+        Raises:
+            UnknownAID: when the AID is not known to the local keystore
+        """
+        key = (aid, did, meta)
+        state = document_state(hby, rgy, aid, oobis=self.oobis, aliases=self.aliases)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and state is not None and entry[0] == state:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return refresh_retrieved(entry[1], meta)
+            self.misses += 1
+        doc = didding.generate_did_doc(hby, rgy, did=did, aid=aid, meta=meta, aliases=self.aliases, oobis=self.oobis)
+        if state is not None and self.size > 0:
+            with self.lock:
+                self.entries[key] = (state, copy.deepcopy(doc))
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+        return doc
+
+    def invalidate(self, aid: str | None = None):
+        """Drops the documents of the AID, or every document when no AID is given."""
+        with self.lock:
+            if aid is None:
+                self.entries.clear()
+                return
+            for key in [key for key in self.entries if key[0] == aid]:
+                del self.entries[key]
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,88 @@
+"""
+dws.core.coalescing module
+
+Single flight coalescing of concurrent identical work, such as resolutions of a popular DID whose cached
+resolution just expired.
+"""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent import futures
+from typing import Any
+
+from dws import log_name, ogler
+
+logger = ogler.getLogger(log_name)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key. The first caller of a key, the leader, runs the work while
+    callers arriving before it finishes, the followers, wait for the leader's result or exception instead of
+    running the work again. Each follower waits with its own deadline. A key is forgotten as soon as its
+    leader finishes so later calls run the work again.
+    """
+
+    def __init__(self):
+        self.flights: dict[Hashable, futures.Future] = {}  # key -> result of the leader in flight
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, timeout: float | None = None, **kwa) -> Any:
+        """
+        Runs fn(*args, **kwa) unless a call with the same key is in flight, in which case its outcome is shared.
+
+        Parameters:
+            key (Hashable): identity of the work, like a canonical DID
+            fn (Callable): the work
+            timeout (float | None): seconds a follower waits for the leader, without limit if None
+
+        Returns:
+            Any: the result of fn, of this call or the leader's
+
+        Raises:
+            concurrent.futures.TimeoutError: when a follower's deadline passes before the leader finishes
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = futures.Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            try:
+                return flight.result(timeout=timeout)
+            except futures.TimeoutError:
+                with self.lock:
+                    self.timeouts += 1
+                raise
+
+        try:
+            result = fn(*args, **kwa)
+        except BaseException as ex:
+            flight.set_exception(ex)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+    def in_flight(self) -> int:
+        with self.lock:
+            return len(self.flights)
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {
+                'in_flight': len(self.flights),
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'timeouts': self.timeouts,
+            }
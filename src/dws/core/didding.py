@@ -5,26 +5,25 @@ dws.core.didding module
 """
 
 import itertools
-import json
 import math
 import re
 import urllib.parse
 from base64 import urlsafe_b64encode
-from functools import reduce
 
 from keri import kering
 from keri.app import habbing
-from keri.core import coring
 from keri.core.eventing import Kever, Kevery
 from keri.db.basing import Baser
 from keri.help import helping
 from keri.vdr import credentialing
 
 from dws import DidWebsError, UnknownAID, log_name, ogler
-from dws.core import habs, oobiing
+from dws.app.logs import Payload
+from dws.core import habs, oobiing, parsing
 
 logger = ogler.getLogger(log_name)
 
+# Grammar of the DIDs accepted by the single pass parsers of dws.core.parsing, which parse without backtracking
 DID_KERI_RE = re.compile(
     pattern=r'\Adid:keri:'
     r'(?:(?P<aid>[^:?]+))'
@@ -74,45 +73,22 @@ VMETH_FIELD = 'verificationMethod'
 
 def parse_did_keri(did):
     """
-    Parse a did:keri DID with regex to return the AID
+    Parse a did:keri DID to return the AID
 
     Returns:
         str: AID extracted from the did:keri DID
     """
-    match = DID_KERI_RE.match(did)
-    if match is None:
-        raise ValueError(f'{did} is not a valid did:keri DID')
-
-    aid = match.group('aid')
-    query = match.group('query')
-
-    try:
-        _ = coring.Prefixer(qb64=aid)
-    except Exception as e:
-        raise ValueError(f'{aid} is an invalid AID')
-
-    return aid, query
+    return parsing.parse_did_keri(did)
 
 
 def parse_did_webs(did: str):
     """
-    Parse a did:webs DID with regex to return the domain, port, path, and AID
+    Parse a did:webs DID to return the domain, port, path, and AID
 
     Returns:
         (str, str, str, str, str): domain, port, path, AID
     """
-    match = DID_WEBS_RE.match(did)
-    if match is None:
-        raise ValueError(f'{did} is not a valid did:web(s) DID')
-
-    domain, port, path, aid, query = match.group('domain', 'port', 'path', 'aid', 'query')
-
-    try:
-        _ = coring.Prefixer(qb64=aid)
-    except Exception as e:
-        raise ValueError(f'{aid} is an invalid AID')
-
-    return domain, port, path, aid, query
+    return parsing.parse_did_webs(did)
 
 
 def parse_query_string(query: str) -> dict:
@@ -141,33 +117,7 @@ def re_encode_invalid_did_webs(did: str):
     re-encoding it as %3A, while preserving path, AID, and query. This compensates for URL path
     quote/unquote handling in the Falcon/HIO WSGI request path.
     """
-    if NO_AID_UNENCODED_PORT_RE.match(did):
-        raise ValueError(f'{did} is missing an AID')
-
-    match = DID_WEBS_UNENCODED_PORT_RE.match(did)
-    if match is None:
-        match = DID_WEBS_RE.match(did)
-        if match is not None:
-            return did  # already encoded correctly
-        raise ValueError(f'{did} is not an invalidly encoded did:web(s) DID')
-
-    domain, port, path, aid, query = match.group('domain', 'port', 'path', 'aid', 'query')
-
-    try:
-        _ = coring.Prefixer(qb64=aid)
-    except Exception as e:
-        raise ValueError(f'{aid} is an invalid AID')
-
-    encoded = f'did:webs:{domain}'
-    if port:
-        encoded += f'%3A{port}'
-    if path:
-        encoded += f':{path}'
-    # always add the AID
-    encoded += f':{aid}'
-    if query:
-        encoded += f'{query}'
-    return encoded
+    return parsing.re_encode_invalid_did_webs(did)
 
 
 def requote(encoded_did: str):
@@ -179,14 +129,7 @@ def requote(encoded_did: str):
     This specific attribute of the WSGI environment uses urllib.parse.quote to encode the path, so we need to decode it
     environ['PATH_INFO'] = quote(requestant.path)
     """
-    if encoded_did.lower().startswith('did%3awebs') or encoded_did.lower().startswith('did%3akeri'):
-        # The DID is incorrectly fully URL-encoded, happens with some WSGI servers, so must decode and re-encode it
-        # this happens in Falcon
-        did = urllib.parse.unquote(encoded_did)
-        did = re_encode_invalid_did(did)
-        return did
-    else:
-        return encoded_did
+    return parsing.requote(encoded_did)
 
 
 def re_encode_invalid_did(did: str):
@@ -197,16 +140,10 @@ def re_encode_invalid_did(did: str):
     Returns:
         (str, str, str, str): domain, port, path, AID
     """
-    if did.startswith('did:webs:'):
-        return re_encode_invalid_did_webs(did)
-    elif did.startswith('did:keri:'):  # included for completion's sake and uniformity when parsing DIDs
-        aid, query = parse_did_keri(did)
-        return f'did:keri:{aid}{query if query else ""}'
-    else:
-        raise ValueError(f'{did} is not a valid did:webs or did:keri DID')
+    return parsing.re_encode_invalid_did(did)
 
 
-def generate_json_web_key_vm(pubkey, did, kid, x):
+def generate_json_web_key_vm(pubkey, did, kid, x, controller=None):
     """
     Generate a JSON Web Key (JWK) verification method for a given public key.
 
@@ -215,23 +152,19 @@ def generate_json_web_key_vm(pubkey, did, kid, x):
         did (str): The DID to associate with the verification method.
         kid (str): The key ID for the JWK.
         x (str): The base64url-encoded public key value.
+        controller (str): The DID without its query, computed from the DID when not given.
     """
     return dict(
         id=f'#{pubkey}',
         type='JsonWebKey',
-        controller=strip_query(did),
+        controller=controller if controller is not None else strip_query(did),
         publicKeyJwk=dict(kid=f'{kid}', kty='OKP', crv='Ed25519', x=f'{x}'),
     )
 
 
 def strip_query(did: str):
-    if did.startswith('did:webs:') or did.startswith('did:web:'):
-        domain, port, path, aid, query = parse_did_webs(did=did)
-        if query is None or query == '':
-            return did
-        return f'did:webs:{domain}%3A{port}:{path}:{aid}'
-    else:
-        return did  # for did:keri
+    """The DID without its query, see parsing.strip_query."""
+    return parsing.strip_query(did)
 
 
 def generate_verification_methods(verfers, thold, did, aid):
@@ -248,24 +181,26 @@ def generate_verification_methods(verfers, thold, did, aid):
     Returns:
         list: A list of verification methods in the format required for a DID document.
     """
+    # the controller is the same for every verification method so the DID is parsed once rather than once per key
+    controller = strip_query(did)
     # for each public key (Verfer) in the Kever, generate a verification method
     vms = []
-    for idx, verfer in enumerate(verfers):
+    for verfer in verfers:
         kid = verfer.qb64
         x = urlsafe_b64encode(verfer.raw).rstrip(b'=').decode('utf-8')
-        vms.append(generate_json_web_key_vm(kid, did, kid, x))
+        vms.append(generate_json_web_key_vm(kid, did, kid, x, controller=controller))
 
     # Handle multi-key or multisig AID cases
     if isinstance(thold, int):
         if thold > 1:
             conditions = [vm.get('id') for vm in vms]
-            vms.append(generate_threshold_proof2022(aid, did, thold, conditions))
+            vms.append(generate_threshold_proof2022(aid, did, thold, conditions, controller=controller))
     elif isinstance(thold, list):
-        vms.append(generate_weighted_threshold_proof(thold, verfers, vms, did, aid))
+        vms.append(generate_weighted_threshold_proof(thold, verfers, vms, did, aid, controller=controller))
     return vms
 
 
-def generate_threshold_proof2022(aid, did, thold, conditions):
+def generate_threshold_proof2022(aid, did, thold, conditions, controller=None):
     """
     Generate a ConditionalProof2022 verification method for a multisig DID.
 
@@ -274,6 +209,7 @@ def generate_threshold_proof2022(aid, did, thold, conditions):
         did (str): The DID to associate with the conditional proof.
         thold (int): The multisig signing threshold.
         conditions (list): List of condition verification method IDs.
+        controller (str): The DID without its query, computed from the DID when not given.
 
     Returns:
         dict: A ConditionalProof2022 verification method
@@ -281,13 +217,13 @@ def generate_threshold_proof2022(aid, did, thold, conditions):
     return dict(
         id=f'#{aid}',
         type='ConditionalProof2022',
-        controller=strip_query(did),
+        controller=controller if controller is not None else strip_query(did),
         threshold=thold,
         conditionThreshold=conditions,
     )
 
 
-def generate_weighted_threshold_proof2022(aid, did, threshold, conditions):
+def generate_weighted_threshold_proof2022(aid, did, threshold, conditions, controller=None):
     """
     Generate a ConditionalProof2022 verification method for a multisig DID with weighted conditions.
 
@@ -296,6 +232,7 @@ def generate_weighted_threshold_proof2022(aid, did, threshold, conditions):
         did (str): The DID to associate with the conditional proof.
         threshold (float): The multisig signing threshold.
         conditions (list): List of condition verification method IDs with weights.
+        controller (str): The DID without its query, computed from the DID when not given.
 
     Returns:
         dict: A ConditionalProof2022 verification method with weighted conditions.
@@ -303,13 +240,13 @@ def generate_weighted_threshold_proof2022(aid, did, threshold, conditions):
     return dict(
         id=f'#{aid}',
         type='ConditionalProof2022',
-        controller=strip_query(did),
+        controller=controller if controller is not None else strip_query(did),
         threshold=threshold,
         conditionWeightedThreshold=conditions,
     )
 
 
-def generate_weighted_threshold_proof(thold, verfers, vms, did, aid):
+def generate_weighted_threshold_proof(thold, verfers, vms, did, aid, controller=None):
     """
     Compute the weighted threshold proof for a multisig DID based on the provided fraction threshold
      weights and public keys (Verfers).
@@ -320,14 +257,13 @@ def generate_weighted_threshold_proof(thold, verfers, vms, did, aid):
         vms (list): A list of verification methods already generated for the public keys.
         did (str): The DID to associate with the weighted threshold proof.
         aid (str): The controlling AID to associate with the weighted threshold proof.
+        controller (str): The DID without its query, computed from the DID when not given.
     """
     lcd = int(math.lcm(*[fr.denominator for fr in thold[0]]))
     threshold = float(lcd / 2)
     numerators = [int(fr.numerator * lcd / fr.denominator) for fr in thold[0]]
-    conditions = []
-    for idx, verfer in enumerate(verfers):
-        conditions.append(dict(condition=vms[idx]['id'], weight=numerators[idx]))
-    return generate_weighted_threshold_proof2022(aid, did, threshold, conditions)
+    conditions = [{'condition': vms[idx]['id'], 'weight': numerators[idx]} for idx in range(len(verfers))]
+    return generate_weighted_threshold_proof2022(aid, did, threshold, conditions, controller=controller)
 
 
 def gen_did_document(did, verification_methods, service_endpoints, also_known_as):
@@ -384,18 +320,22 @@ def get_witness_list(baser: Baser, kever: Kever):
     return witness_list
 
 
-def get_equiv_aka_ids(did: str, aid: str, hby: habbing.Habery, rgy: credentialing.Regery):
+def get_equiv_aka_ids(did: str, aid: str, hby: habbing.Habery, rgy: credentialing.Regery, aliases=None):
+    """
+    Returns the equivalentId and alsoKnownAs ids of the DID from the designated aliases of the AID, read from the
+    indexing.AliasIndex aliases when given.
+    """
     equiv_ids = []
     aka_ids = []
     if did.startswith('did:webs') or did.startswith('did:web'):
-        for s in gen_designated_aliases(hby, rgy, aid):
+        for s in gen_designated_aliases(hby, rgy, aid, aliases=aliases):
             if s.startswith('did:webs'):
                 equiv_ids.append(s)
             aka_ids.append(s)
     return equiv_ids, aka_ids
 
 
-def generate_did_doc(hby: habbing.Habery, rgy: credentialing.Regery, did, aid, meta=False):
+def generate_did_doc(hby: habbing.Habery, rgy: credentialing.Regery, did, aid, meta=False, aliases=None, oobis=None):
     """
     Generates a DID document for the given DID and AID.
 
@@ -413,6 +353,8 @@ def generate_did_doc(hby: habbing.Habery, rgy: credentialing.Regery, did, aid, m
         did (str): The DID to generate the document for.
         aid (str): The AID associated with the DID.
         meta (bool, optional): If True, include metadata in the response. Defaults to False.
+        aliases (indexing.AliasIndex, optional): index the designated aliases are read from, scanned if None.
+        oobis (indexing.OobiIndex, optional): index the delegator OOBI is read from, scanned if None.
 
     Returns:
         dict of DID document structure; DID document, metadata and resolution metadata or just the DID document
@@ -424,7 +366,7 @@ def generate_did_doc(hby: habbing.Habery, rgy: credentialing.Regery, did, aid, m
     if did.startswith('did:keri'):
         aid, query = parse_did_keri(did=did)
         did = f'did:keri:{aid}'  # strip of query for did doc generation as is not needed. OOBI should be resolved by now.
-    logger.debug(f'Generating DID document for\n\t{did}\nwith aid\n\t{aid}\nand metadata\n\t{meta}')
+    logger.debug('Generating DID document for\n\t%s\nwith aid\n\t%s\nand metadata\n\t%s', did, aid, meta)
 
     hab: habbing.Hab | None = None
     if aid in hby.habs:
@@ -437,8 +379,8 @@ def generate_did_doc(hby: habbing.Habery, rgy: credentialing.Regery, did, aid, m
         raise UnknownAID(aid, did)
 
     verification_methods = generate_verification_methods(kever.verfers, kever.tholder.thold, did, aid)
-    service_endpoints = gen_service_endpoints(hby, hab, kever, aid)
-    equiv_ids, aka_ids = get_equiv_aka_ids(did, aid, hby, rgy)
+    service_endpoints = gen_service_endpoints(hby, hab, kever, aid, oobis=oobis)
+    equiv_ids, aka_ids = get_equiv_aka_ids(did, aid, hby, rgy, aliases=aliases)
 
     did_doc = gen_did_document(did, verification_methods, service_endpoints, aka_ids)
     if meta is True:
@@ -481,12 +423,12 @@ def diddoc_to_did_webs(diddoc: dict):
     # Apply the replacement only if necessary
     if 'did:web' in diddoc['id'] and 'did:webs' not in diddoc['id']:
         diddoc['id'] = diddoc['id'].replace('did:web', 'did:webs')
-        logger.debug(f'Updated id in fromDidWeb: {diddoc["id"]}')
+        logger.debug('Updated id in fromDidWeb: %s', diddoc['id'])
 
     for verificationMethod in diddoc['verificationMethod']:
         if 'did:web' in verificationMethod['controller'] and 'did:webs' not in verificationMethod['controller']:
             verificationMethod['controller'] = verificationMethod['controller'].replace('did:web', 'did:webs')
-            logger.debug(f'Updated controller in fromDidWeb: {verificationMethod["controller"]}')
+            logger.debug('Updated controller in fromDidWeb: %s', verificationMethod['controller'])
 
     return diddoc
 
@@ -499,7 +441,7 @@ def from_did_web(did_json: dict, meta: bool = False):
     """
     # Log the original state of the DID and controller
     if meta and DD_FIELD not in did_json:
-        logger.debug(f'DID resolution metadata did not contain {DD_FIELD}:\n{json.dumps(did_json, indent=2)}')
+        logger.debug('DID resolution metadata did not contain %s:\n%s', DD_FIELD, Payload(did_json))
         raise ValueError(f"Expected '{DD_FIELD}' in did.json when indicating resolution metadata in use.")
     diddoc = did_json[DD_FIELD] if meta else did_json
     initial_controller = diddoc['verificationMethod'][0]['controller']
@@ -527,7 +469,9 @@ def extract_desg_alias_from_cred(cred: dict) -> str | None:
     return None
 
 
-def gen_designated_aliases(hby: habbing.Habery, rgy: credentialing.Regery, aid: str, schema: str = DES_ALIASES_SCHEMA):
+def gen_designated_aliases(
+    hby: habbing.Habery, rgy: credentialing.Regery, aid: str, schema: str = DES_ALIASES_SCHEMA, aliases=None
+):
     """
     Searches the entire Regery database for non-revoked, self-attested designated alias ACDCs by schema and
     returns a list of designated alias IDs using their `a.ids` field.
@@ -537,15 +481,20 @@ def gen_designated_aliases(hby: habbing.Habery, rgy: credentialing.Regery, aid:
         rgy (credentialing.Regery): The Regery instance for credential and registry data.
         aid (str): The AID prefix to retrieve the ACDCs for.
         schema (str): The schema to use to select the target ACDC from the local registry. Default is DES_ALIASES_SCHEMA.
+        aliases (indexing.AliasIndex): index to read the designated aliases from instead of cloning the ACDCs.
 
     Returns:
         list: A list of designated alias IDs (a.ids) from self-attested ACDCs.
     """
+    if aliases is not None:
+        return aliases.aliases(rgy, aid, schema)
     da_ids = []
     saids = rgy.reger.issus.get(keys=aid)
-    scads = rgy.reger.schms.get(keys=schema)  # get credentials by schema
+    if not saids:
+        return da_ids
+    scads = {saider.qb64 for saider in rgy.reger.schms.get(keys=schema)}  # get credentials by schema
     # self-attested schema, and scehma is designated aliases
-    saids = [saider for saider in saids if saider.qb64 in [saider.qb64 for saider in scads]]
+    saids = [saider for saider in saids if saider.qb64 in scads]
     if not saids:
         return da_ids
     if aid in hby.habs:
@@ -558,7 +507,7 @@ def gen_designated_aliases(hby: habbing.Habery, rgy: credentialing.Regery, aid:
     return list(itertools.chain.from_iterable(da_ids))
 
 
-def gen_service_endpoints(hby: habbing.Habery, hab: habbing.Hab, kever: Kever, aid: str):
+def gen_service_endpoints(hby: habbing.Habery, hab: habbing.Hab, kever: Kever, aid: str, oobis=None):
     """Generate service endpoints including both witness and delegation service endpoints."""
     serv_ends = []
     # TODO: move Location Scheme and Endpoint Role Authorization to dedicated function
@@ -572,31 +521,36 @@ def gen_service_endpoints(hby: habbing.Habery, hab: habbing.Hab, kever: Kever, a
         serv_ends.extend(add_ends(ends))
 
     if hasattr(hab, 'delpre') and hab.delpre is not None:
-        del_serv_end = gen_delegation_service(hby=hby, pre=hab.pre, delpre=hab.delpre)
+        del_serv_end = gen_delegation_service(hby=hby, pre=hab.pre, delpre=hab.delpre, oobis=oobis)
         serv_ends.extend(del_serv_end)
     return serv_ends
 
 
 def add_ends(ends):
-    def process_role(role):
-        return reduce(lambda rs, eids: rs + process_eids(eids, role), ends.getall(role), [])
-
-    def process_eids(eids, role):
-        return reduce(lambda es, eid: es + process_eid(eid, eids[eid], role), eids, [])
-
-    def process_eid(eid, val, role):
-        v = dict(id=f'#{eid}/{role}', type=role, serviceEndpoint={proto: f'{host}' for proto, host in val.items()})
-        return [v]
-
-    return reduce(lambda emit, role: emit + process_role(role), ends, [])
+    """
+    Returns the service endpoints of the role URLs of an AID, role -> eid -> scheme -> URL, one service per eid
+    and role in the order of the role URLs. Services are appended so the cost is linear in the number of endpoints.
+    """
+    serv_ends = []
+    for role in ends:
+        for eids in ends.getall(role):
+            for eid, val in eids.items():
+                serv_ends.append(
+                    {
+                        'id': f'#{eid}/{role}',
+                        'type': role,
+                        'serviceEndpoint': {proto: f'{host}' for proto, host in val.items()},
+                    }
+                )
+    return serv_ends
 
 
-def gen_delegation_service(hby: habbing.Habery, pre: str, delpre: str):
+def gen_delegation_service(hby: habbing.Habery, pre: str, delpre: str, oobis=None):
     """Returns an array of delegation service endpoints for the delegator AID."""
     seal = dict(i=pre, s='0', d=pre)
     dserder = hby.db.fetchLastSealingEventByEventSeal(pre=delpre, seal=seal)
     approval_evt_digest = dserder.sad['a'][0]['d']
-    del_oobi = oobiing.get_resolved_oobi(hby=hby, pre=delpre)
+    del_oobi = oobiing.get_resolved_oobi(hby=hby, pre=delpre, oobis=oobis)
     if del_oobi is None:
         logger.error(f'No resolved OOBI found for delegate AID {delpre} for delegator AID {pre}')
         return []
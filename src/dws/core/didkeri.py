@@ -1,5 +1,4 @@
 import datetime
-import json
 from typing import List
 
 from hio.base import Doer, doing
@@ -10,6 +9,7 @@ from keri.help import helping
 from keri.vdr import credentialing
 
 from dws import log_name, ogler
+from dws.app.logs import Payload
 from dws.core import didding, habs
 
 logger = ogler.getLogger(log_name)
@@ -112,11 +112,11 @@ class KeriResolver(doing.DoDoer):
             yield from self.resolve_oobi(aid=aid, oobi=oobi, tock=tock)
 
             self.result = didding.generate_did_doc(hby, rgy=self.rgy, did=did, aid=aid, meta=meta)
-            logger.info(f'did:keri Resolution result: {json.dumps(self.result, indent=2)}')
+            logger.debug('did:keri Resolution result: %s', Payload(self.result))
             if self.verbose:
                 print(self.result)
-                logger.info(f'Resolution result for did:keri DID {self.did}:\n{json.dumps(self.result, indent=2)}')
-            logger.info(f'Verification success for did:keri DID: {self.did}')
+                logger.info('Resolution result for did:keri DID %s:\n%s', self.did, Payload(self.result))
+            logger.info('Verification success for did:keri DID: %s', self.did)
             print(f'did:keri verification success for {self.did}')
         except Exception as ex:
             logger.info(f'Verification failure for did:keri DID: {did}: {ex}')
@@ -0,0 +1,213 @@
+"""
+dws.core.diffing module
+
+Structural comparison of DID documents producing RFC 6902 JSON Patch operations, and RFC 8785 JSON
+Canonicalization Scheme (JCS) digests of DID documents.
+"""
+
+import json
+import math
+from collections import Counter
+from decimal import Decimal
+
+from keri.core import coring
+
+from dws import log_name, ogler
+
+logger = ogler.getLogger(log_name)
+
+DefaultUnordered = frozenset({'service', 'alsoKnownAs'})  # DID document properties whose arrays are sets
+DefaultLimit = 100  # most patch operations reported for a single comparison
+
+
+def pointer(path: tuple) -> str:
+    """RFC 6901 JSON Pointer for a path of object keys and array indexes."""
+    return ''.join('/' + str(part).replace('~', '~0').replace('/', '~1') for part in path)
+
+
+def jcs_number(value: float) -> str:
+    """Serializes a number as an ECMAScript number, as RFC 8785 requires."""
+    if isinstance(value, int) and abs(value) < 2**53:
+        return str(value)
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f'{value} is not allowed in canonical JSON')
+    if value == 0:
+        return '0'
+    _, digits, exponent = Decimal(repr(abs(value))).as_tuple()
+    digits = ''.join(map(str, digits))
+    stripped = digits.rstrip('0')
+    exponent += len(digits) - len(stripped)
+    digits, k = stripped, len(stripped)
+    n = k + exponent  # value is 0.digits times 10 to the n
+    if k <= n <= 21:
+        text = digits + '0' * (n - k)
+    elif 0 < n <= 21:
+        text = f'{digits[:n]}.{digits[n:]}'
+    elif -6 < n <= 0:
+        text = f'0.{"0" * -n}{digits}'
+    else:
+        mantissa = digits[0] + (f'.{digits[1:]}' if k > 1 else '')
+        text = f'{mantissa}e{"+" if n - 1 > 0 else "-"}{abs(n - 1)}'
+    return f'-{text}' if value < 0 else text
+
+
+def jcs(value) -> str:
+    """RFC 8785 canonical JSON text of a value: sorted keys, no whitespace, and ECMAScript number serialization."""
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (int, float)):
+        return jcs_number(value)
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: item[0].encode('utf-16-be'))  # UTF-16 code unit order
+        return '{' + ','.join(f'{jcs(key)}:{jcs(item)}' for key, item in items) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(jcs(item) for item in value) + ']'
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def canonicalize(value) -> bytes:
+    """RFC 8785 canonical JSON serialization of a value."""
+    return jcs(value).encode('utf-8')
+
+
+def digest_bytes(raw: bytes) -> str:
+    """Blake3-256 digest of the bytes as CESR qb64."""
+    return coring.Diger(ser=bytes(raw), code=coring.MtrDex.Blake3_256).qb64
+
+
+def digest(value) -> str:
+    """Blake3-256 digest of the RFC 8785 canonical serialization of a value as CESR qb64."""
+    return digest_bytes(canonicalize(value))
+
+
+def canonical(value) -> str:
+    """Order independent JSON text of a value, used to compare array elements as set members."""
+    return jcs(value)
+
+
+def unordered_key(path: tuple, unordered: frozenset) -> bool:
+    """True when the array at the path is a set, matched on the name of the property holding it."""
+    return bool(path) and isinstance(path[-1], str) and path[-1] in unordered
+
+
+def equal(expected, actual, unordered: frozenset = DefaultUnordered, path: tuple = ()) -> bool:
+    """
+    True when the documents are equal, comparing the arrays of unordered properties as sets. Stops at the
+    first mismatch rather than collecting differences.
+    """
+    if expected == actual:
+        return True
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if expected.keys() != actual.keys():
+            return False
+        return all(equal(value, actual[key], unordered, path + (key,)) for key, value in expected.items())
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return False
+        if unordered_key(path, unordered):
+            return Counter(map(canonical, expected)) == Counter(map(canonical, actual))
+        return all(equal(e, a, unordered, path + (i,)) for i, (e, a) in enumerate(zip(expected, actual)))
+    return False
+
+
+class Differ:
+    """Collects the JSON Patch operations turning one document into another, up to a limit of operations."""
+
+    def __init__(self, unordered: frozenset = DefaultUnordered, limit: int = DefaultLimit):
+        self.unordered = unordered
+        self.limit = limit
+        self.ops: list[dict] = []
+        self.truncated = False
+
+    def emit(self, op: dict) -> bool:
+        """Records the operation, returns False once the limit is reached and the patch is truncated."""
+        if len(self.ops) >= self.limit:
+            self.truncated = True
+            return False
+        self.ops.append(op)
+        return True
+
+    def walk(self, expected, actual, path: tuple) -> bool:
+        """Diffs the values at the path, returns False once the patch is truncated."""
+        if expected == actual:
+            return True
+        if isinstance(expected, dict) and isinstance(actual, dict):
+            return self.walk_object(expected, actual, path)
+        if isinstance(expected, list) and isinstance(actual, list):
+            if unordered_key(path, self.unordered):
+                return self.walk_set(expected, actual, path)
+            return self.walk_array(expected, actual, path)
+        return self.emit({'op': 'replace', 'path': pointer(path), 'value': actual})
+
+    def walk_object(self, expected: dict, actual: dict, path: tuple) -> bool:
+        for key, value in expected.items():
+            if key not in actual:
+                if not self.emit({'op': 'remove', 'path': pointer(path + (key,))}):
+                    return False
+            elif not self.walk(value, actual[key], path + (key,)):
+                return False
+        for key, value in actual.items():
+            if key not in expected and not self.emit({'op': 'add', 'path': pointer(path + (key,)), 'value': value}):
+                return False
+        return True
+
+    def walk_array(self, expected: list, actual: list, path: tuple) -> bool:
+        common = min(len(expected), len(actual))
+        for i in range(common):
+            if not self.walk(expected[i], actual[i], path + (i,)):
+                return False
+        for i in range(len(expected) - 1, common - 1, -1):  # from the end so earlier indexes stay valid
+            if not self.emit({'op': 'remove', 'path': pointer(path + (i,))}):
+                return False
+        for value in actual[common:]:
+            if not self.emit({'op': 'add', 'path': pointer(path + ('-',)), 'value': value}):
+                return False
+        return True
+
+    def walk_set(self, expected: list, actual: list, path: tuple) -> bool:
+        missing = Counter(map(canonical, actual))
+        removed = []
+        for i, value in enumerate(expected):
+            key = canonical(value)
+            if missing[key] > 0:
+                missing[key] -= 1
+            else:
+                removed.append(i)
+        for i in reversed(removed):
+            if not self.emit({'op': 'remove', 'path': pointer(path + (i,))}):
+                return False
+        for value in actual:
+            key = canonical(value)
+            if missing[key] > 0:
+                missing[key] -= 1
+                if not self.emit({'op': 'add', 'path': pointer(path + ('-',)), 'value': value}):
+                    return False
+        return True
+
+
+def diff(expected, actual, unordered: frozenset = DefaultUnordered, limit: int = DefaultLimit) -> (list, bool):
+    """
+    Returns the RFC 6902 JSON Patch operations that turn the expected document into the actual one.
+
+    Arrays of unordered properties are compared as sets, so reordering their elements is not a difference and
+    a changed element is reported as a remove and an add. Other arrays are compared by index.
+
+    Parameters:
+        expected: the document that was expected, like a DID document generated from the KEL
+        actual: the document that was found, like a fetched did.json
+        unordered (frozenset): property names whose arrays are compared as sets
+        limit (int): most operations returned, bounding the output for very large documents
+
+    Returns:
+        (list, bool): the patch operations and True when the patch was truncated at the limit
+    """
+    differ = Differ(unordered=unordered, limit=limit)
+    differ.walk(expected, actual, ())
+    return differ.ops, differ.truncated
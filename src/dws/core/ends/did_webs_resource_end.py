@@ -5,7 +5,7 @@ import falcon
 from keri.app import habbing
 from keri.vdr import credentialing
 
-from dws.core import didding
+from dws.core import caching, didding
 
 DID_JSON = 'did.json'
 
@@ -15,7 +15,9 @@ class DIDWebsResourceEnd:
     did.json HTTP resource for accessing did:webs DID documents for KERI AIDs.
     """
 
-    def __init__(self, hby: habbing.Habery, rgy: credentialing.Regery, meta: bool = False):
+    def __init__(
+        self, hby: habbing.Habery, rgy: credentialing.Regery, meta: bool = False, view: caching.DocumentView | None = None
+    ):
         """
         Initialize did:webs did.json artifact endpoint that will pull designated aliases from the specified registry
         and will optionally include metadata in the DID document.
@@ -24,10 +26,12 @@ class DIDWebsResourceEnd:
             hby (Habery): Database environment for AIDs to expose
             rgy (Regery): Registry for credential and registry data
             meta (bool): Whether to include metadata in the DID document. Default is False.
+            view (DocumentView | None): materialized DID documents to serve from, generated per request if None
         """
         self.hby = hby
         self.rgy = rgy
         self.meta = meta
+        self.view = view
         super().__init__()
 
     def on_get(self, req, rep, aid):
@@ -53,7 +57,10 @@ class DIDWebsResourceEnd:
         did = f'did:web:{req.host}{port_str}{path}'
 
         # Generate the DID Doc and return
-        diddoc = didding.generate_did_doc(self.hby, self.rgy, did, aid, meta=self.meta)
+        if self.view is not None:
+            diddoc = self.view.document(self.hby, self.rgy, did, aid, meta=self.meta)
+        else:
+            diddoc = didding.generate_did_doc(self.hby, self.rgy, did, aid, meta=self.meta)
 
         rep.status = falcon.HTTP_200
         rep.content_type = 'application/json'
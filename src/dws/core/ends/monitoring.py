@@ -8,3 +8,32 @@ class HealthEnd:
     def on_get(self, req, resp):
         resp.status = falcon.HTTP_OK
         resp.media = {'message': f'Health is okay. Time is {nowIso8601()}'}
+
+
+class MetricsEnd:
+    """Metrics resource reporting the current values of named metric sources, like escrow sizes and sweep durations"""
+
+    def __init__(self, sources: dict | None = None):
+        """
+        Parameters:
+            sources (dict): mapping of metric group name to a callable returning a JSON serializable dict
+        """
+        self.sources = sources if sources is not None else {}
+
+    def on_get(self, req, resp):
+        resp.status = falcon.HTTP_OK
+        resp.media = {name: source() for name, source in self.sources.items()}
+
+
+class AsyncHealthEnd(HealthEnd):
+    """Health resource for the ASGI resolver app"""
+
+    async def on_get(self, req, resp):
+        super().on_get(req, resp)
+
+
+class AsyncMetricsEnd(MetricsEnd):
+    """Metrics resource for the ASGI resolver app"""
+
+    async def on_get(self, req, resp):
+        super().on_get(req, resp)
@@ -0,0 +1,118 @@
+"""
+dws.core.escrowing module
+
+Background processing of KERI escrows for the resolver service.
+"""
+
+import time
+from collections.abc import Callable
+
+from hio.base import doing
+
+from dws import log_name, ogler
+from dws.core import ingesting
+
+logger = ogler.getLogger(log_name)
+
+
+def escrow_sizes(ingestor: ingesting.Ingestor) -> dict[str, int]:
+    """Returns the number of entries in each escrow table, keyed by table name, skipping tables this keri lacks."""
+    sizes = {}
+    for tables in ingesting.ESCROW_TABLES.values():
+        for attr, name in tables:
+            lmdber = ingestor.hby.db if attr == 'db' else ingestor.rgy.reger
+            table = getattr(lmdber, name, None)
+            if table is None:
+                continue
+            sizes[name] = table.cntAll() if hasattr(table, 'cntAll') else lmdber.cnt(table)
+    return sizes
+
+
+class Escrower(doing.Doer):
+    """
+    Doer that sweeps the escrows of a shared Ingestor in the background so resolution requests do not pay
+    for every other identifier's out of order or partially signed events.
+
+    Each run processes the sweep stages (KEL, TEL, exn, Verifier, reply) round robin until the per tick
+    time budget is spent, resuming with the next stage on the following tick. A single stage is never
+    interrupted since keripy sweeps an escrow table in one call. The ingestor lock is only held for one
+    stage at a time so resolutions interleave with a sweep.
+    """
+
+    DefaultTock = 1.0  # seconds between escrow sweeps
+    DefaultBudget = 0.25  # seconds of sweeping allowed per tick
+
+    def __init__(
+        self,
+        ingestor: ingesting.Ingestor,
+        tock: float = DefaultTock,
+        budget: float = DefaultBudget,
+        clock: Callable[[], float] = time.perf_counter,
+        **kwa,
+    ):
+        """
+        Parameters:
+            ingestor (Ingestor): message processors whose escrows are swept
+            tock (float): seconds between sweeps, the cadence of the worker
+            budget (float): seconds of sweeping allowed per tick, at least one stage runs per tick
+            clock (Callable): time source for budgets and durations, injectable for testing
+        """
+        self.ingestor = ingestor
+        self.budget = budget
+        self.clock = clock
+        self.stages: list[tuple[str, Callable]] = [
+            ('kel', ingestor.kvy.processEscrows),
+            ('tel', ingestor.tvy.processEscrows),
+            ('exn', ingestor.exc.processEscrow),
+            ('vry', ingestor.vry.processEscrows),
+            ('rpy', ingestor.rvy.processEscrowReply),
+        ]
+        self.next = 0  # index of the stage to run first on the next tick
+        self.ticks = 0
+        self.durations = {name: 0.0 for name, _ in self.stages}  # last sweep duration per stage
+        self.totals = {name: 0.0 for name, _ in self.stages}  # cumulative sweep duration per stage
+        self.counts = {name: 0 for name, _ in self.stages}  # number of sweeps per stage
+        ingestor.background = True
+        super().__init__(tock=tock, **kwa)
+
+    def recur(self, tyme=None):
+        """Doer lifecycle function run every tock, sweeps escrows within the budget and never completes."""
+        self.sweep()
+        return False
+
+    def sweep(self) -> list[str]:
+        """Runs sweep stages round robin until the budget is spent or every stage ran once. Returns the stages run."""
+        start = self.clock()
+        ran = []
+        for _ in range(len(self.stages)):
+            if ran and self.clock() - start >= self.budget:
+                break
+            name, process = self.stages[self.next]
+            self.next = (self.next + 1) % len(self.stages)
+            began = self.clock()
+            try:
+                with self.ingestor.lock:
+                    process()
+                    self.ingestor.index_accepted()
+                    self.ingestor.drain_cues()
+            except Exception:
+                logger.exception(f'Escrow sweep of stage {name} failed')
+            elapsed = self.clock() - began
+            self.durations[name] = elapsed
+            self.totals[name] += elapsed
+            self.counts[name] += 1
+            ran.append(name)
+        self.ticks += 1
+        if len(ran) < len(self.stages):
+            logger.debug(f'Escrow sweep budget of {self.budget}s spent after stages {ran}')
+        return ran
+
+    def metrics(self) -> dict:
+        """Escrow table sizes along with the last and cumulative sweep durations and counts per stage."""
+        return {
+            'ticks': self.ticks,
+            'sizes': escrow_sizes(self.ingestor),
+            'durations': dict(self.durations),
+            'totals': dict(self.totals),
+            'counts': dict(self.counts),
+        }
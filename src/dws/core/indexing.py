@@ -0,0 +1,290 @@
+"""
+dws.core.indexing module
+
+Secondary indexes over the local keystore serving DID document generation without scanning or cloning records.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from keri import kering
+from keri.app import habbing
+from keri.core import serdering
+from keri.db import dbing, koming
+from keri.vdr import credentialing
+
+from dws import log_name, ogler
+from dws.core import didding
+
+logger = ogler.getLogger(log_name)
+
+REGISTRY_ILKS = (kering.Ilks.vcp, kering.Ilks.vrt)  # TEL events of a registry rather than of an ACDC
+ISSUANCE_ILKS = (kering.Ilks.iss, kering.Ilks.bis)
+
+
+@dataclass(frozen=True)
+class AliasRecord:
+    """The designated alias ids of an ACDC and the number of its TEL events, one when issued and two once revoked."""
+
+    ids: tuple
+    tels: int
+
+    @property
+    def revoked(self) -> bool:
+        return self.tels > 1
+
+
+class AliasIndex:
+    """
+    Index of designated alias ACDCs by (issuer AID, schema) holding the a.ids and revocation status of each ACDC,
+    in place of cloning every credential an AID issued to read two fields.
+
+    The index is kept up to date by the ingesting.Ingestor, which has it watch the TEL events of each stream it
+    ingests and index them once they, and the ACDCs they issue, are accepted, whether while parsing the stream or
+    later when sweeping escrows. Reading the records of an issuer is then a dictionary lookup, and only the first
+    read of an issuer scans the ACDCs it issued. TEL events and ACDCs accepted by another process or component
+    change the number of records in the TEL event and saved ACDC tables of the Regery, read in constant time on every
+    lookup, and every issuer is scanned again on its next read when the numbers differ from those indexed.
+    """
+
+    DefaultPending = 4096  # TEL events and ACDCs awaiting acceptance that are watched
+
+    def __init__(self, pending: int = DefaultPending):
+        """
+        Parameters:
+            pending (int): TEL events and ACDCs awaiting acceptance that are watched before the oldest is dropped
+        """
+        self.entries: dict[tuple[str, str], dict[str, AliasRecord]] = {}  # (issuer, schema) -> said -> record
+        self.seen: tuple[int, int] | None = None  # TEL events and ACDCs of the Regery indexed, None until read
+        self.generation = 0  # number of times every issuer was dropped to be scanned again
+        self.pending: OrderedDict[tuple, tuple[str | None, int]] = OrderedDict()  # watched -> (ACDC SAID, generation)
+        self.size = pending
+        self.lock = threading.Lock()
+        self.loads = 0  # ACDCs read from the Regery
+        self.scans = 0  # issuers scanned
+
+    @staticmethod
+    def counts(rgy: credentialing.Regery) -> tuple[int, int]:
+        """Number of TEL events and saved ACDCs of the Regery, read from the LMDB statistics of their tables."""
+        reger = rgy.reger
+        return table_entries(reger.env, reger.tels), entries(reger.saved)
+
+    @staticmethod
+    def accepted(reger: credentialing.Reger, key: tuple) -> bool:
+        """True when the watched TEL event or ACDC is accepted into the Regery."""
+        if key[0] == 'acdc':
+            return reger.saved.get(keys=key[1]) is not None
+        _, pre, sn, said = key
+        dig = reger.getTel(dbing.snKey(pre, sn))
+        return dig is not None and bytes(dig).decode('utf-8') == said
+
+    def watch(self, rgy: credentialing.Regery, serders: Iterable[serdering.SerderKERI]) -> list[tuple]:
+        """
+        Watches the TEL events about to be ingested, and the ACDCs issued by them, that are not yet accepted.
+
+        Returns:
+            list: keys of the watched TEL events and ACDCs, handed to accept once the events are parsed
+        """
+        reger = rgy.reger
+        keys = []
+        for serder in serders:
+            said = None if serder.ilk in REGISTRY_ILKS else serder.pre  # TEL prefix of a credential is the ACDC SAID
+            key = ('tel', serder.pre, serder.sn, serder.said)
+            if not self.accepted(reger, key):
+                keys.append((key, said))
+            if serder.ilk in ISSUANCE_ILKS and not self.accepted(reger, ('acdc', said)):
+                keys.append((('acdc', said), said))
+        with self.lock:
+            for key, said in keys:
+                self.pending[key] = (said, self.generation)
+                self.pending.move_to_end(key)
+            while len(self.pending) > self.size:
+                self.pending.popitem(last=False)
+        return [key for key, _ in keys]
+
+    def accept(self, rgy: credentialing.Regery, keys: list[tuple] | None = None):
+        """
+        Indexes the watched TEL events and ACDCs of keys, or every watched one when None, that were accepted.
+        Those watched before every issuer was last dropped are already counted by the scans that follow.
+        """
+        reger = rgy.reger
+        with self.lock:
+            keys = list(self.pending) if keys is None else [key for key in keys if key in self.pending]
+        done = [key for key in keys if self.accepted(reger, key)]
+        saids = []
+        with self.lock:
+            tels = creds = 0
+            for key in done:
+                if key not in self.pending:
+                    continue
+                said, generation = self.pending.pop(key)
+                if generation != self.generation:
+                    continue
+                if key[0] == 'acdc':
+                    creds += 1
+                else:
+                    tels += 1
+                if said is not None and said not in saids:
+                    saids.append(said)
+            if self.seen is not None:
+                self.seen = (self.seen[0] + tels, self.seen[1] + creds)
+        for said in saids:
+            self.index(reger, said)
+
+    def index(self, reger: credentialing.Reger, said: str):
+        """Brings the record of an ACDC up to date with the Regery when its issuer was already read."""
+        creder = reger.creds.get(keys=said)
+        if creder is None:
+            return
+        key = (creder.issuer, creder.schema)
+        with self.lock:
+            if key not in self.entries:
+                return  # scanned when the issuer is first read
+        record = self.load(reger, said, creder.schema)
+        with self.lock:
+            records = self.entries.get(key)
+            if records is None:
+                return
+            records = dict(records)  # readers hold on to the records they were handed
+            if record is None:
+                records.pop(said, None)
+            else:
+                records[said] = record
+            self.entries[key] = records
+
+    def records(self, rgy: credentialing.Regery, aid: str, schema: str = didding.DES_ALIASES_SCHEMA) -> dict[str, AliasRecord]:
+        """
+        Returns the records of the ACDCs of the schema issued by the AID, scanning the ACDCs it issued only when
+        the issuer was not read since it was last dropped.
+
+        Returns:
+            dict: said -> AliasRecord of the issued ACDCs in issuance index order
+        """
+        counts = self.counts(rgy)
+        key = (aid, schema)
+        with self.lock:
+            if counts != self.seen:
+                self.entries.clear()
+                self.seen = counts
+                self.generation += 1
+            records = self.entries.get(key)
+            generation = self.generation
+        if records is not None:
+            return records
+        records = self.scan(rgy.reger, aid, schema)
+        with self.lock:
+            if self.generation == generation:
+                self.entries.setdefault(key, records)
+        return records
+
+    def scan(self, reger: credentialing.Reger, aid: str, schema: str) -> dict[str, AliasRecord]:
+        """Reads the records of the ACDCs of the schema issued by the AID from the Regery."""
+        self.scans += 1
+        records = {}
+        for saider in reger.issus.get(keys=aid):
+            record = self.load(reger, saider.qb64, schema)
+            if record is not None:
+                records[saider.qb64] = record
+        return records
+
+    def load(self, reger: credentialing.Reger, said: str, schema: str) -> AliasRecord | None:
+        """Reads the designated alias ids of an ACDC, None when it is not saved, of another schema or has no TEL events."""
+        creder = reger.creds.get(keys=said)
+        if creder is None or creder.schema != schema or reger.saved.get(keys=said) is None:
+            return None
+        tels = reger.cntTels(said)
+        if tels == 0:
+            return None
+        self.loads += 1
+        return AliasRecord(ids=tuple(creder.sad['a']['ids']), tels=tels)
+
+    def aliases(self, rgy: credentialing.Regery, aid: str, schema: str = didding.DES_ALIASES_SCHEMA) -> list[str]:
+        """Returns the designated alias ids of the unrevoked ACDCs of the schema issued by the AID."""
+        return [alias for record in self.records(rgy, aid, schema).values() if not record.revoked for alias in record.ids]
+
+    def invalidate(self, aid: str | None = None):
+        """Drops the records of the AID, or every record when no AID is given."""
+        with self.lock:
+            if aid is None:
+                self.entries.clear()
+                return
+            for key in [key for key in self.entries if key[0] == aid]:
+                del self.entries[key]
+
+    def __len__(self):
+        return sum(len(records) for records in self.entries.values())
+
+
+def table_entries(env, sdb) -> int:
+    """Number of records in an LMDB table, read from the statistics of the table rather than counted."""
+    with env.begin(db=sdb, write=False) as txn:
+        return txn.stat(sdb)['entries']
+
+
+def entries(komer: koming.Komer) -> int:
+    """Number of records in a keystore table, read from the LMDB statistics of the table rather than counted."""
+    return table_entries(komer.db.env, komer.sdb)
+
+
+class OobiIndex:
+    """
+    Reverse index of resolved OOBIs by the AID they resolved, cid -> OOBI URLs, over the resolved OOBI table of a
+    Habery (Baser.roobi) which is keyed by OOBI URL and otherwise needs a full scan to find the OOBI of an AID.
+
+    The index is built by a single scan of the table and kept consistent by adding the OOBIs resolved through
+    this resolver as they are resolved. OOBIs resolved by another process or component change the number of
+    records in the table, which is read in constant time on every lookup, and the index is rebuilt when the
+    number differs from the number of records indexed. Indexed OOBIs are confirmed against the table when read.
+    """
+
+    def __init__(self):
+        self.oobis: dict[str, list[str]] = {}  # cid -> OOBI URLs
+        self.cids: dict[str, str] = {}  # OOBI URL -> cid
+        self.seen: int | None = None  # records of the table indexed, None until built
+        self.lock = threading.Lock()
+        self.builds = 0
+
+    def build(self, hby: habbing.Habery):
+        """Indexes every resolved OOBI of the Habery."""
+        count = entries(hby.db.roobi)
+        oobis, cids = {}, {}
+        for (oobi,), obr in hby.db.roobi.getItemIter():
+            cids[oobi] = obr.cid
+            if obr.cid:
+                oobis.setdefault(obr.cid, []).append(oobi)
+        with self.lock:
+            self.oobis, self.cids, self.seen = oobis, cids, count
+            self.builds += 1
+        logger.debug('Indexed %d resolved OOBIs', count)
+
+    def add(self, hby: habbing.Habery, oobi: str):
+        """Indexes an OOBI just resolved into the Habery."""
+        obr = hby.db.roobi.get(keys=(oobi,))
+        with self.lock:
+            if self.seen is None or obr is None:
+                return
+            if oobi not in self.cids:
+                self.seen += 1
+            previous = self.cids.get(oobi)
+            if previous != obr.cid:
+                if previous:
+                    self.oobis[previous].remove(oobi)
+                if obr.cid:
+                    self.oobis.setdefault(obr.cid, []).append(oobi)
+            self.cids[oobi] = obr.cid
+
+    def resolved_oobi(self, hby: habbing.Habery, cid: str) -> str | None:
+        """Returns a resolved OOBI of the AID, None when no OOBI of the AID was resolved."""
+        with self.lock:
+            current = self.seen == entries(hby.db.roobi)
+        if not current:
+            self.build(hby)
+        with self.lock:
+            candidates = list(self.oobis.get(cid, ()))
+        for oobi in candidates:
+            obr = hby.db.roobi.get(keys=(oobi,))
+            if obr is not None and obr.cid == cid:
+                return oobi
+        return None
@@ -0,0 +1,418 @@
+"""
+dws.core.ingesting module
+
+Ingestion of keri.cesr streams into the local keystore.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+from keri import kering
+from keri.app import habbing
+from keri.core import counting, eventing, routing, serdering
+from keri.db import dbing
+from keri.peer import exchanging
+from keri.vdr import credentialing, verifying
+from keri.vdr import eventing as teventing
+
+from dws import log_name, ogler
+from dws.core import diffing, indexing
+
+logger = ogler.getLogger(log_name)
+
+KEL_ILKS = (kering.Ilks.icp, kering.Ilks.rot, kering.Ilks.ixn, kering.Ilks.dip, kering.Ilks.drt)
+TEL_ILKS = (kering.Ilks.vcp, kering.Ilks.vrt, kering.Ilks.iss, kering.Ilks.rev, kering.Ilks.bis, kering.Ilks.brv)
+ISSUANCE_ILKS = (kering.Ilks.iss, kering.Ilks.bis)
+
+# Escrow tables, by the sweep stage that drains them, as (database attribute, table name) pairs
+ESCROW_TABLES = {
+    'kel': [
+        ('db', name)
+        for name in ('ooes', 'pses', 'pwes', 'ures', 'vres', 'ldes', 'uwes', 'qnfs', 'misfits', 'delegables', 'pdes', 'udes')
+    ],
+    'tel': [('reger', name) for name in ('oots', 'twes', 'taes')],
+    'exn': [('db', 'epse')],
+    'vry': [('reger', name) for name in ('mre', 'mce', 'mse')],
+    'rpy': [('db', 'rpes')],
+}
+
+ATTACHMENT_GROUPS = (counting.CtrDex_1_0.AttachmentGroup, counting.CtrDex_1_0.BigAttachmentGroup)
+
+
+@dataclass
+class Frame:
+    """A message in a CESR stream along with its attachments, spanning ims[start:end]."""
+
+    serder: serdering.Serder
+    start: int
+    end: int
+
+
+def frame_stream(ims: bytes) -> Iterator[Frame]:
+    """
+    Yields the leading messages of a text domain CESR stream whose attachments are wrapped in an attachment
+    group counter (-V), which is how KEL events are cloned by Hab.replay. Framing stops at the first message
+    that cannot be delimited without fully parsing its attachments, so the remainder of the stream from the
+    end of the last yielded frame must be handed to the parser.
+    """
+    serdery = serdering.Serdery(version=kering.Version)
+    buf = bytearray(ims)
+    total = len(buf)
+    while buf:
+        start = total - len(buf)
+        try:
+            if kering.sniff(buf) != kering.Colds.msg:
+                return
+            serder = serdery.reap(ims=buf)
+            if not buf or kering.sniff(buf) != kering.Colds.txt:
+                return
+            counter = counting.Counter(qb64b=buf, gvrsn=kering.Vrsn_1_0)
+        except (kering.KeriError, ValueError) as ex:
+            logger.debug(f'Stopped framing CESR stream at byte {start}: {ex}')
+            return
+        if counter.code not in ATTACHMENT_GROUPS:
+            return
+        size = len(counter.qb64b) + counter.count * 4
+        if size > len(buf):
+            return
+        del buf[:size]
+        yield Frame(serder=serder, start=start, end=total - len(buf))
+
+
+class FramedStream(bytes):
+    """A CESR stream along with the frames of its leading messages, framed as the stream was downloaded."""
+
+    frames: list[Frame]
+
+    def __new__(cls, ims: bytes, frames: list[Frame]):
+        stream = super().__new__(cls, ims)
+        stream.frames = frames
+        return stream
+
+
+class CesrFramer:
+    """
+    Frames the leading messages of a CESR stream as its bytes arrive, the incremental counterpart of frame_stream,
+    so reaping the messages overlaps with downloading the stream. Only the bytes of the message being framed are
+    buffered. Once a message cannot be framed, framing stops for the rest of the stream and the bytes are no
+    longer buffered.
+    """
+
+    def __init__(self):
+        self.serdery = serdering.Serdery(version=kering.Version)
+        self.buf = bytearray()
+        self.offset = 0  # position in the stream of the first buffered byte
+        self.frames: list[Frame] = []
+        self.done = False
+
+    def feed(self, chunk: bytes):
+        """
+        Buffers the chunk and frames every message completed by it.
+
+        Raises:
+            ValueError: when the stream starts with bytes that are not a CESR message or counter, which would
+                otherwise stall the parser
+        """
+        if self.done:
+            return
+        self.buf.extend(chunk)
+        while self.buf and not self.done and self.frame():
+            pass
+
+    def frame(self) -> bool:
+        """Frames the buffered message, returns False when more bytes are needed or framing stopped."""
+        buf = self.buf
+        try:
+            if kering.sniff(buf) != kering.Colds.msg:
+                self.stop()
+                return False
+            size = kering.smell(buf).size
+        except kering.ShortageError:
+            return False
+        except (kering.KeriError, ValueError) as ex:
+            if self.offset == 0:
+                raise ValueError(f'Not a CESR stream: {ex}') from ex
+            self.stop()
+            return False
+        if len(buf) < size + 4:  # shortest counter is 4 characters
+            return False
+        try:
+            if kering.sniff(buf[size : size + 1]) != kering.Colds.txt:
+                self.stop()
+                return False
+            counter = counting.Counter(qb64b=buf[size:], gvrsn=kering.Vrsn_1_0)
+        except kering.ShortageError:
+            return False
+        except (kering.KeriError, ValueError):
+            self.stop()
+            return False
+        if counter.code not in ATTACHMENT_GROUPS:
+            self.stop()
+            return False
+        end = size + len(counter.qb64b) + counter.count * 4
+        if end > len(buf):
+            return False
+        serder = self.serdery.reap(ims=bytearray(buf[:size]))
+        self.frames.append(Frame(serder=serder, start=self.offset, end=self.offset + end))
+        del buf[:end]
+        self.offset += end
+        return True
+
+    def stop(self):
+        logger.debug(f'Stopped framing CESR stream at byte {self.offset}')
+        self.done = True
+        self.buf = bytearray()
+
+    def stream(self, ims: bytes) -> FramedStream:
+        """Returns the complete downloaded stream carrying the frames of its leading messages."""
+        return FramedStream(ims, self.frames)
+
+
+def stream_frames(ims: bytes) -> Iterator[Frame]:
+    """Frames of the leading messages of the CESR stream, those framed while downloading it when available."""
+    return iter(ims.frames) if isinstance(ims, FramedStream) else frame_stream(ims)
+
+
+def is_stored(hby: habbing.Habery, serder: serdering.Serder) -> bool:
+    """True when the key event is accepted into the local KEL, matched on prefix, sequence number, and event digest."""
+    if serder.ilk not in KEL_ILKS:
+        return False
+    dig = hby.db.getKeLast(dbing.snKey(serder.pre, serder.sn))
+    return dig is not None and bytes(dig).decode('utf-8') == serder.said
+
+
+def stored_prefix_length(hby: habbing.Habery, ims: bytes) -> int:
+    """
+    Returns the length in bytes of the leading run of key events in the CESR stream that are already accepted
+    into the local KELs. A duplicitous or unknown event ends the run so it, and everything after it, is handed
+    to the parser for full validation.
+    """
+    length = 0
+    for frame in stream_frames(ims):
+        if not is_stored(hby, frame.serder):
+            break
+        length = frame.end
+    return length
+
+
+def pending_key_events(hby: habbing.Habery, ims: bytes) -> bool:
+    """True when a framed key event of the CESR stream is not accepted into the local KELs, so it sits in an escrow."""
+    return any(not is_stored(hby, frame.serder) for frame in stream_frames(ims) if frame.serder.ilk in KEL_ILKS)
+
+
+def is_tel_stored(rgy: credentialing.Regery, serder: serdering.Serder) -> bool:
+    """True when the TEL event is accepted into the local TEL, matched on prefix, sequence number, and event digest."""
+    if serder.ilk not in TEL_ILKS:
+        return False
+    dig = rgy.reger.getTel(dbing.snKey(serder.pre, serder.sn))
+    return dig is not None and bytes(dig).decode('utf-8') == serder.said
+
+
+def pending_credentials(rgy: credentialing.Regery, ims: bytes) -> bool:
+    """
+    True when a framed TEL event of the CESR stream is not accepted into the local TELs, or the ACDC issued by
+    a framed issuance event is not saved, so they sit in the TEL or credential escrows. ACDCs follow the TEL
+    events issuing them in keri.cesr and end the framing, so they are checked through their issuance events.
+    """
+    for frame in stream_frames(ims):
+        serder = frame.serder
+        if serder.ilk not in TEL_ILKS:
+            continue
+        if not is_tel_stored(rgy, serder):
+            return True
+        if serder.ilk in ISSUANCE_ILKS and rgy.reger.saved.get(keys=serder.pre) is None:  # TEL prefix is the ACDC SAID
+            return True
+    return False
+
+
+def tel_events(ims: bytes) -> list[serdering.Serder]:
+    """TEL events framed from the CESR stream."""
+    return [frame.serder for frame in stream_frames(ims) if frame.serder.ilk in TEL_ILKS]
+
+
+def unseen_tail(hby: habbing.Habery, ims: bytes) -> bytes:
+    """Returns the part of the CESR stream following the key events already stored in the local keystore."""
+    skip = stored_prefix_length(hby, ims)
+    if skip:
+        logger.debug(f'Skipping {skip} of {len(ims)} bytes of already stored key events')
+    return ims[skip:]
+
+
+class IngestedStreams:
+    """
+    Digests of the keri.cesr stream each AID was last fully ingested from, so a resolution loading the very same
+    stream again skips ingesting it. Each resolution compares the digest of the bytes it loaded itself, so whether
+    they came from a cache or a download, and what concurrent resolutions loaded, does not matter. A stream is only
+    recorded once ingested with none of its key events left in escrow, so a failed ingestion is retried by the next
+    resolution loading the stream. Accessed under the lock of the ingestor holding it.
+    """
+
+    DefaultSize = 4096  # AIDs whose last ingested stream is remembered
+
+    def __init__(self, size: int = DefaultSize):
+        self.size = size
+        self.digests: OrderedDict[str, str] = OrderedDict()  # AID -> digest of the stream it was last ingested from
+
+    @staticmethod
+    def digest(ims: bytes) -> str:
+        return diffing.digest_bytes(ims)
+
+    def seen(self, aid: str, digest: str) -> bool:
+        """True when the AID was last fully ingested from the stream with the digest."""
+        if self.digests.get(aid) != digest:
+            return False
+        self.digests.move_to_end(aid)
+        return True
+
+    def add(self, aid: str, digest: str):
+        self.digests[aid] = digest
+        self.digests.move_to_end(aid)
+        while len(self.digests) > self.size:
+            self.digests.popitem(last=False)
+
+
+class Ingestor:
+    """
+    Long lived set of CESR message processors (Router, Revery, Exchanger, Kevery, Tevery, Verifier) for a
+    Habery and Regery, created once and shared by every resolution instead of being rebuilt per keri.cesr stream.
+
+    The processors are not thread safe, so all parsing and escrow processing is serialized through a reentrant
+    lock. Cues emitted while parsing are not acted upon by the resolver and are drained after each ingestion
+    so they do not accumulate over the life of the service.
+
+    When an escrowing.Escrower sweeps the escrows in the background, background is True and resolutions only
+    sweep the escrows holding the events of their own stream inline, as long as those hold few enough events.
+
+    The TEL events of every ingested stream are watched by the indexing.AliasIndex aliases and indexed as they
+    and their ACDCs are accepted, while parsing or sweeping escrows, so reading designated aliases needs no scan.
+    """
+
+    InlineLimit = 1024  # escrowed events a resolution sweeps inline, more are left to the background Escrower
+
+    def __init__(
+        self,
+        hby: habbing.Habery,
+        rgy: credentialing.Regery,
+        aliases: indexing.AliasIndex | None = None,
+        inline_limit: int = InlineLimit,
+    ):
+        """
+        Parameters:
+            hby (Habery): identifier database environment the streams are ingested into
+            rgy (Regery): credential and registry data manager the TEL events and ACDCs are ingested into
+            aliases (AliasIndex | None): index of designated aliases kept up to date on ingestion, created if None
+            inline_limit (int): escrowed events a resolution sweeps inline when a background Escrower runs
+        """
+        self.hby = hby
+        self.rgy = rgy
+        self.rtr = routing.Router()
+        self.rvy = routing.Revery(db=hby.db, rtr=self.rtr)  # Have to create the Revery before Kevery so the Kevery.kvr is set.
+        self.exc = exchanging.Exchanger(hby=hby, handlers=[])
+        self.kvy = eventing.Kevery(db=hby.db, rvy=self.rvy)
+        self.tvy = teventing.Tevery(db=hby.db, reger=rgy.reger)
+        self.vry = verifying.Verifier(hby=hby, reger=rgy.reger)
+        self.kvy.registerReplyRoutes(router=self.rtr)  # make sure LocScheme and EndRole records are processed
+        self.tvy.registerReplyRoutes(router=self.rtr)  # make sure ACDC rpy messages are processed
+        self.lock = threading.RLock()
+        self.background = False  # True when a background Escrower sweeps the escrows
+        self.streams = IngestedStreams()
+        self.aliases = aliases if aliases is not None else indexing.AliasIndex()
+        self.inline_limit = inline_limit
+
+    def ingest(self, ims: bytes, aid: str | None = None, incremental: bool = True):
+        """
+        Parses a CESR stream into the keystore with the shared message processors.
+
+        Parameters:
+            ims (bytes): the CESR stream to ingest
+            aid (str): the AID the stream belongs to, used to tell whether its events are local
+            incremental (bool): when True only the part of the stream following the key events already
+                stored locally is parsed
+        """
+        with self.lock:
+            if incremental:
+                ims = unseen_tail(self.hby, ims)
+            if ims:
+                local = aid in self.hby.habs
+                watched = self.aliases.watch(self.rgy, tel_events(ims))
+                self.hby.psr.parse(
+                    ims=bytearray(ims), kvy=self.kvy, tvy=self.tvy, vry=self.vry, rvy=self.rvy, exc=self.exc, local=local
+                )
+                self.aliases.accept(self.rgy, watched)
+            self.drain_cues()
+
+    def process_escrows(self):
+        """Processes all escrows of the shared message processors so out of order events are accepted."""
+        with self.lock:
+            self.kvy.processEscrows()
+            self.tvy.processEscrows()
+            self.exc.processEscrow()
+            self.vry.processEscrows()
+            self.rvy.processEscrowReply()
+            self.index_accepted()
+            self.drain_cues()
+
+    def process_key_escrows(self):
+        """Processes the KEL and reply escrows so out of order key events and the replies they sign are accepted."""
+        with self.lock:
+            self.kvy.processEscrows()
+            self.rvy.processEscrowReply()
+            self.drain_cues()
+
+    def process_credential_escrows(self):
+        """Processes the TEL and credential escrows so out of order TEL events and ACDCs are accepted."""
+        with self.lock:
+            self.tvy.processEscrows()
+            self.vry.processEscrows()
+            self.index_accepted()
+            self.drain_cues()
+
+    def index_accepted(self):
+        """Indexes the watched TEL events and ACDCs accepted from the escrows since they were ingested."""
+        if self.aliases.pending:
+            self.aliases.accept(self.rgy)
+
+    def escrowed(self, *stages: str) -> int:
+        """Number of events held in the escrow tables of the sweep stages, read from the LMDB table statistics."""
+        count = 0
+        for stage in stages:
+            for attr, name in ESCROW_TABLES[stage]:
+                lmdber = self.hby.db if attr == 'db' else self.rgy.reger
+                table = getattr(lmdber, name, None)
+                if table is not None:
+                    count += indexing.table_entries(lmdber.env, getattr(table, 'sdb', table))
+        return count
+
+    def sweep_inline(self, process: Callable[[], None], *stages: str) -> bool:
+        """Runs an inline escrow sweep unless the escrows it sweeps hold more than inline_limit events."""
+        escrowed = self.escrowed(*stages)
+        if escrowed > self.inline_limit:
+            logger.info(f'Leaving {escrowed} escrowed events of {stages} to the background escrow sweep')
+            return False
+        process()
+        return True
+
+    def settle(self, ims: bytes):
+        """
+        Processes the escrows a just ingested CESR stream needs to be fully accepted. Every escrow is swept
+        inline unless a background Escrower runs. Otherwise only the KEL and reply escrows are swept inline
+        when key events of this stream are still escrowed and the resolution would see a stale KEL, and only
+        the TEL and credential escrows when its TEL events or ACDCs are and it would miss designated aliases.
+
+        keripy sweeps a whole escrow table in one call and cannot be limited to the events of a single AID,
+        so an inline sweep costs as much as the escrows hold. It is skipped, and the events of the stream
+        left to the background Escrower, when those escrows hold more than inline_limit events.
+        """
+        if not self.background:
+            self.process_escrows()
+            return
+        if pending_key_events(self.hby, ims):
+            self.sweep_inline(self.process_key_escrows, 'kel', 'rpy')
+        if pending_credentials(self.rgy, ims):
+            self.sweep_inline(self.process_credential_escrows, 'tel', 'vry')
+
+    def drain_cues(self):
+        for cues in (self.kvy.cues, self.tvy.cues, self.vry.cues, self.rvy.cues, self.exc.cues):
+            cues.clear()
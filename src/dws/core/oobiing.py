@@ -1,7 +1,10 @@
 from keri.app import habbing
 
 
-def get_resolved_oobi(hby: habbing.Habery, pre: str) -> str | None:
+def get_resolved_oobi(hby: habbing.Habery, pre: str, oobis=None) -> str | None:
+    """Returns a resolved OOBI of the AID, looked up in the indexing.OobiIndex oobis when given."""
+    if oobis is not None:
+        return oobis.resolved_oobi(hby, pre)
     for (oobi,), obr in hby.db.roobi.getItemIter():
         if obr.cid == pre:
             return oobi
@@ -0,0 +1,283 @@
+"""
+dws.core.parsing module
+
+Single pass did:webs, did:web and did:keri DID parsing with memoized results and input length limits.
+
+The parsers accept exactly the DIDs matched by the grammar of the regular expressions in dws.core.didding,
+DID_WEBS_RE, DID_WEBS_UNENCODED_PORT_RE, NO_AID_UNENCODED_PORT_RE and DID_KERI_RE, including which part of an
+ambiguous DID becomes the path and which the AID, but scan each DID a constant number of times where the lazy
+path group of the regular expressions backtracks over every colon of a crafted path. AIDs are validated against
+the CESR prefix code table instead of constructing a Prefixer.
+"""
+
+import functools
+import re
+import urllib.parse
+
+from keri.core import coring
+
+from dws import log_name, ogler
+
+logger = ogler.getLogger(log_name)
+
+MAX_DID_LENGTH = 2048  # longest DID parsed, longer DIDs are rejected before they are scanned
+PARSE_CACHE_SIZE = 1024  # parse results memoized per parser
+
+PREFIX_CODES = frozenset(coring.PreDex)  # membership tests on the codex itself walk all of its fields
+B64_INDEX = {char: idx for idx, char in enumerate(coring.B64_CHARS)}  # URL safe Base64 character -> sextet
+B64_RE = re.compile(r'[A-Za-z0-9_-]*')
+
+DID_WEBS_PREFIX_RE = re.compile(r'did:webs?:', flags=re.IGNORECASE)
+DID_KERI_PREFIX = 'did:keri:'
+
+
+def valid_aid(aid: str) -> bool:
+    """
+    True when the AID is the qb64 of a CESR prefix code and nothing more: a code of coring.PreDex, the exact
+    length of the code, URL safe Base64 characters, and zeroed pad bits, the checks a Prefixer makes.
+    """
+    hs = coring.Matter.Hards.get(aid[:1])
+    if hs is None or aid[:hs] not in PREFIX_CODES:
+        return False
+    hs, ss, _, fs, ls = coring.Matter.Sizes[aid[:hs]]
+    cs = hs + ss
+    if ss or ls or len(aid) != fs or not B64_RE.fullmatch(aid):
+        return False
+    ps = cs % 4  # prepad bytes, their 2 * ps bits beyond the code lead the first sextet after the code
+    return ps == 0 or B64_INDEX[aid[cs]] >> (6 - 2 * ps) == 0
+
+
+def check_aid(aid: str):
+    if not valid_aid(aid):
+        raise ValueError(f'{aid} is an invalid AID')
+
+
+def check_length(did: str):
+    if len(did) > MAX_DID_LENGTH:
+        raise ValueError(f'DID of {len(did)} characters exceeds the {MAX_DID_LENGTH} characters allowed')
+
+
+def match_aid_query(did: str, start: int, newline: int) -> tuple[str, str | None] | None:
+    """
+    Matches ([^:?]+)(\\?.*)?\\Z from start, the AID and the optional query ending a DID. The AID runs to the first
+    ':' or '?' and the query may not hold a newline, which is last found at index newline, -1 for none.
+    """
+    end = len(did)
+    colon = did.find(':', start)
+    question = did.find('?', start, colon if colon >= 0 else end)
+    stop = question if question >= 0 else colon if colon >= 0 else end
+    if stop == start or stop == colon:
+        return None
+    if stop == end:
+        return did[start:], None
+    if newline > stop:
+        return None
+    return did[start:stop], did[stop:]
+
+
+def match_path_aid_query(did: str, start: int) -> tuple[str | None, str, str | None] | None:
+    """
+    Matches (?::(.+?))?:([^:?]+)(\\?.*)?\\Z from start, with the shortest path that lets the rest match, or no
+    path at all when no path does, as the regular expression would after backtracking.
+
+    Candidate ends of the path are the colons after the first character of the path up to the first newline,
+    which a path may not hold. The next colon and the next '?' after a candidate are carried forward rather than
+    searched for again, so the DID is scanned a constant number of times however many colons it has.
+    """
+    if did[start : start + 1] != ':':
+        return None
+    end = len(did)
+    newline = did.rfind('\n', start)
+    if newline < 0:
+        # the shortest path ends at the last colon before the first '?' when an AID follows that colon
+        question = did.find('?', start)
+        question = end if question < 0 else question
+        colon = did.rfind(':', start + 2, question)
+        if colon >= 0 and colon + 1 < question:
+            return did[start + 1 : colon], did[colon + 1 : question], did[question:] if question < end else None
+    first_newline = did.find('\n', start)
+    limit = first_newline if first_newline >= 0 else end  # a path ends before the first newline
+    question = -1  # next '?' after the candidate, found lazily
+    colon = did.find(':', start + 2, limit)
+    while colon >= 0:
+        next_colon = did.find(':', colon + 1)
+        if question != end and question <= colon:
+            question = did.find('?', colon + 1)
+            question = end if question < 0 else question
+        stop = min(question, next_colon if next_colon >= 0 else end)
+        if stop > colon + 1 and stop != next_colon and (stop == end or newline < stop):
+            return did[start + 1 : colon], did[colon + 1 : stop], did[stop:] if stop < end else None
+        colon = next_colon if 0 <= next_colon < limit else -1
+    matched = match_aid_query(did, start + 1, newline)
+    return None if matched is None else (None, *matched)
+
+
+def match_prefix_domain(did: str) -> tuple[int, int] | None:
+    """Matches \\Adid:web(s)?:([^%:]+), returns the start and end of the domain, None when the DID does not start so."""
+    prefix = DID_WEBS_PREFIX_RE.match(did)
+    if prefix is None:
+        return None
+    start = prefix.end()
+    percent, colon = did.find('%', start), did.find(':', start)
+    stop = colon if percent < 0 or 0 <= colon < percent else percent
+    if stop <= start:
+        return None
+    return start, stop
+
+
+def match_port(did: str, start: int, marker: str) -> int | None:
+    """Matches the marker then \\d+ at start followed by ':', returns the end of the port digits."""
+    if did[start : start + len(marker)].lower() != marker:
+        return None
+    idx = start + len(marker)
+    while idx < len(did) and did[idx].isdecimal():
+        idx += 1
+    if idx == start + len(marker) or did[idx : idx + 1] != ':':
+        return None
+    return idx
+
+
+def match_did_webs(did: str, marker: str = '%3a') -> tuple | None:
+    """
+    Matches a did:webs or did:web DID as (domain, port, path, AID, query) without validating the AID, with the
+    port after the domain separated by marker, '%3a' as DID_WEBS_RE, or ':' as DID_WEBS_UNENCODED_PORT_RE.
+    """
+    domain = match_prefix_domain(did)
+    if domain is None:
+        return None
+    domain_start, domain_end = domain
+    domain = did[domain_start:domain_end]
+    port_end = match_port(did, domain_end, marker)
+    if port_end is not None:
+        rest = match_path_aid_query(did, port_end)
+        if rest is not None:
+            return domain, did[domain_end + len(marker) : port_end], *rest
+    rest = match_path_aid_query(did, domain_end)
+    return None if rest is None else (domain, None, *rest)
+
+
+def missing_aid(did: str) -> bool:
+    """True for the malformed did:webs:<domain>:<port>[?<query>] matched by NO_AID_UNENCODED_PORT_RE."""
+    domain = match_prefix_domain(did)
+    if domain is None or did[domain[1]] != ':':
+        return False
+    domain_end = domain[1]
+    idx = domain_end + 1
+    while idx < len(did) and did[idx].isdecimal():
+        idx += 1
+    if idx == domain_end + 1:
+        return False
+    return idx == len(did) or (did[idx] == '?' and '\n' not in did[idx:])
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_did_webs(did: str) -> tuple[str, str | None, str | None, str, str | None]:
+    """
+    Parse a did:webs or did:web DID into its domain, port, path, AID and query.
+
+    Returns:
+        (str, str, str, str, str): domain, port, path, AID, query, None for absent optional parts
+
+    Raises:
+        ValueError: when the DID is too long, is not a did:web(s) DID, or its AID is invalid
+    """
+    check_length(did)
+    matched = match_did_webs(did)
+    if matched is None:
+        raise ValueError(f'{did} is not a valid did:web(s) DID')
+    check_aid(matched[3])
+    return matched
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_did_keri(did: str) -> tuple[str, str | None]:
+    """
+    Parse a did:keri DID into its AID and query.
+
+    Raises:
+        ValueError: when the DID is too long, is not a did:keri DID, or its AID is invalid
+    """
+    check_length(did)
+    matched = None
+    if did[: len(DID_KERI_PREFIX)].lower() == DID_KERI_PREFIX:
+        matched = match_aid_query(did, len(DID_KERI_PREFIX), did.rfind('\n'))
+    if matched is None:
+        raise ValueError(f'{did} is not a valid did:keri DID')
+    check_aid(matched[0])
+    return matched
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def re_encode_invalid_did_webs(did: str) -> str:
+    """Re-encodes an unencoded did:webs port separator, :<port>, as %3A keeping the path, AID and query."""
+    check_length(did)
+    if missing_aid(did):
+        raise ValueError(f'{did} is missing an AID')
+    matched = match_did_webs(did, marker=':')
+    if matched is None:
+        if match_did_webs(did) is not None:
+            return did  # already encoded correctly
+        raise ValueError(f'{did} is not an invalidly encoded did:web(s) DID')
+    domain, port, path, aid, query = matched
+    check_aid(aid)
+    encoded = f'did:webs:{domain}'
+    if port:
+        encoded += f'%3A{port}'
+    if path:
+        encoded += f':{path}'
+    encoded += f':{aid}'
+    if query:
+        encoded += f'{query}'
+    return encoded
+
+
+def re_encode_invalid_did(did: str) -> str:
+    """Re-encodes a fully URL decoded did:webs or did:keri DID."""
+    if did.startswith('did:webs:'):
+        return re_encode_invalid_did_webs(did)
+    elif did.startswith('did:keri:'):
+        aid, query = parse_did_keri(did)
+        return f'did:keri:{aid}{query if query else ""}'
+    else:
+        raise ValueError(f'{did} is not a valid did:webs or did:keri DID')
+
+
+def requote(encoded_did: str) -> str:
+    """Decodes and re-encodes a DID whose colons were URL encoded by the WSGI container, others are returned as is."""
+    if encoded_did.lower().startswith('did%3awebs') or encoded_did.lower().startswith('did%3akeri'):
+        return re_encode_invalid_did(urllib.parse.unquote(encoded_did))
+    return encoded_did
+
+
+def strip_query(did: str) -> str:
+    """The DID without its query, the controller of the verification methods of its DID document."""
+    if did.startswith(('did:webs:', 'did:web:')):
+        domain, port, path, aid, query = parse_did_webs(did)
+        if query is None or query == '':
+            return did
+        stripped = f'{"did:webs:" if did.startswith("did:webs:") else "did:web:"}{domain}'
+        if port:
+            stripped += f'%3A{port}'
+        if path:
+            stripped += f':{path}'
+        return f'{stripped}:{aid}'
+    return did  # for did:keri
+
+
+PARSERS = (parse_did_webs, parse_did_keri, re_encode_invalid_did_webs)
+
+
+def metrics() -> dict:
+    """Hits, misses and size of the parse result caches."""
+    infos = [parser.cache_info() for parser in PARSERS]
+    return {
+        'hits': sum(info.hits for info in infos),
+        'misses': sum(info.misses for info in infos),
+        'size': sum(info.currsize for info in infos),
+    }
+
+
+def clear():
+    """Empties the parse result caches."""
+    for parser in PARSERS:
+        parser.cache_clear()
@@ -1,5 +1,10 @@
 import datetime
+import threading
+import time
 import urllib.parse
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
 import requests
@@ -7,40 +12,572 @@ from hio.base import doing
 from hio.core import http
 from keri.help import helping
 
-from dws import ArtifactResolveError, log_name, ogler
+from dws import ArtifactResolveError, ArtifactTooLargeError, log_name, ogler
+from dws.core import ingesting
 
 logger = ogler.getLogger(log_name)
 
+Schemes = ('https', 'http')  # schemes tried in order for a host without a remembered working scheme
 
-def load_url_with_requests(url: str, timeout: float = 5.0) -> bytes:
-    logger.debug(f'Loading URL {url} with requests')
-    https_url = url[:]
-    if not https_url.startswith('https://'):
-        https_url = 'https://' + https_url.lstrip('http://')
-    response = None
+
+def load_deadline(timeout: float) -> float:
+    """Monotonic time by which a load trying every scheme, each for up to timeout seconds, has to finish."""
+    return time.monotonic() + timeout * len(Schemes)
+
+
+class SessionPool:
+    """
+    Pool of keep-alive requests Sessions, one per (scheme, host, port), so repeated artifact loads from the same
+    host reuse open TCP connections and TLS sessions instead of paying a new handshake on every request.
+
+    Each Session mounts an HTTPAdapter bounded to pool_size connections. At most max_hosts Sessions are held,
+    the least recently used one is closed beyond that, and Sessions idle for longer than idle_timeout are closed
+    on the next use of the pool. Instances have the same get(url, timeout=, headers=) call shape as requests.
+    """
+
+    DefaultPoolSize = 4  # connections kept alive per host
+    DefaultMaxHosts = 64  # hosts with open Sessions
+    DefaultIdleTimeout = 60.0  # seconds a Session may sit unused before it is closed
+
+    def __init__(
+        self,
+        pool_size: int = DefaultPoolSize,
+        max_hosts: int = DefaultMaxHosts,
+        idle_timeout: float = DefaultIdleTimeout,
+        verify: bool | str = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Parameters:
+            pool_size (int): maximum number of connections kept alive per host
+            max_hosts (int): maximum number of hosts with an open Session
+            idle_timeout (float): seconds a Session may be unused before it is closed
+            verify (bool | str): TLS certificate verification, or a path to a CA bundle, for every Session
+            clock (Callable): monotonic time source, injectable for testing
+        """
+        self.pool_size = pool_size
+        self.max_hosts = max_hosts
+        self.idle_timeout = idle_timeout
+        self.verify = verify
+        self.clock = clock
+        self.sessions: OrderedDict[tuple, tuple[requests.Session, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> tuple:
+        parsed = urllib.parse.urlsplit(url)
+        return parsed.scheme, parsed.hostname, parsed.port
+
+    def session(self, url: str) -> requests.Session:
+        """Returns the Session for the host of the URL, creating it and evicting idle or excess Sessions as needed."""
+        key = self.key(url)
+        now = self.clock()
+        closing = []
+        with self.lock:
+            for other, (session, used) in list(self.sessions.items()):
+                if other != key and now - used > self.idle_timeout:
+                    closing.append(self.sessions.pop(other)[0])
+            if key in self.sessions:
+                session = self.sessions[key][0]
+            else:
+                session = requests.Session()
+                session.verify = self.verify
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+            self.sessions[key] = (session, now)
+            self.sessions.move_to_end(key)
+            while len(self.sessions) > self.max_hosts:
+                closing.append(self.sessions.popitem(last=False)[1][0])
+        for stale in closing:
+            stale.close()
+        return session
+
+    def get(self, url: str, **kwa) -> requests.Response:
+        """Performs a GET for the URL with the pooled Session of its host, accepting the keyword arguments of requests.get."""
+        return self.session(url).get(url, **kwa)
+
+    def close(self):
+        """Closes every pooled Session and its connections."""
+        with self.lock:
+            sessions = [session for session, _ in self.sessions.values()]
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+class SchemeMemory:
+    """
+    Remembers which URL scheme works for each host so known hosts go straight to it instead of trying HTTPS
+    and falling back to HTTP on every request.
+
+    Policies:
+        https-only: only HTTPS is used, except for the hosts in http_hosts which may fall back to HTTP
+        https-preferred: HTTPS is tried first and HTTP used as a fallback for any host
+
+    A scheme is remembered for a host after a successful load and forgotten once it fails or its memory
+    expires, after which the host is probed in the order of the policy again.
+    """
+
+    HttpsOnly = 'https-only'
+    HttpsPreferred = 'https-preferred'
+    Policies = (HttpsOnly, HttpsPreferred)
+    DefaultTTL = 300.0  # seconds a working scheme is remembered for a host
+
+    def __init__(
+        self,
+        policy: str = HttpsPreferred,
+        http_hosts: list[str] | None = None,
+        ttl: float = DefaultTTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Parameters:
+            policy (str): one of SchemeMemory.Policies
+            http_hosts (list[str] | None): hosts, as host or host:port, allowed to fall back to HTTP under https-only
+            ttl (float): seconds a working scheme is remembered for a host
+            clock (Callable): monotonic time source, injectable for testing
+        """
+        if policy not in self.Policies:
+            raise ValueError(f'Unknown scheme policy {policy}, expected one of {", ".join(self.Policies)}')
+        self.policy = policy
+        self.http_hosts = set(http_hosts or [])
+        self.ttl = ttl
+        self.clock = clock
+        self.schemes: dict[str, tuple[str, float]] = {}  # host -> (working scheme, expiration)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urllib.parse.urlsplit(url).netloc
+
+    def http_allowed(self, url: str) -> bool:
+        if self.policy == self.HttpsPreferred:
+            return True
+        parsed = urllib.parse.urlsplit(url)
+        return parsed.netloc in self.http_hosts or parsed.hostname in self.http_hosts
+
+    def order(self, url: str) -> list[str]:
+        """Schemes to try for the URL, the remembered working scheme first."""
+        allowed = list(Schemes) if self.http_allowed(url) else [Schemes[0]]
+        with self.lock:
+            remembered = self.schemes.get(self.host(url))
+        if remembered is None:
+            return allowed
+        scheme, expires = remembered
+        if expires <= self.clock() or scheme not in allowed:
+            self.forget(url)
+            return allowed
+        return [scheme] + [other for other in allowed if other != scheme]
+
+    def remember(self, url: str, scheme: str):
+        with self.lock:
+            self.schemes[self.host(url)] = (scheme, self.clock() + self.ttl)
+
+    def forget(self, url: str):
+        with self.lock:
+            self.schemes.pop(self.host(url), None)
+
+
+class CircuitBreaker:
+    """
+    Per host circuit breaker for hosts serving did:webs artifacts, so a dead host fails requests fast instead
+    of costing a load timeout on every request.
+
+    States:
+        closed: requests are allowed, the circuit opens after threshold consecutive failures
+        open: requests fail fast until the backoff passes
+        half-open: a single probe request is allowed, success closes the circuit while failure opens it
+            again with the backoff doubled up to max_backoff
+
+    A probe that never reports its outcome is replaced by a new probe once the backoff passes again.
+    """
+
+    Closed = 'closed'
+    Open = 'open'
+    HalfOpen = 'half-open'
+    DefaultThreshold = 3  # consecutive failures opening the circuit
+    DefaultBackoff = 5.0  # seconds the circuit stays open after opening
+    DefaultMaxBackoff = 300.0  # longest seconds the circuit stays open after failed probes
+
+    def __init__(
+        self,
+        threshold: int = DefaultThreshold,
+        backoff: float = DefaultBackoff,
+        max_backoff: float = DefaultMaxBackoff,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Parameters:
+            threshold (int): consecutive failures opening the circuit of a host
+            backoff (float): seconds the circuit stays open after opening
+            max_backoff (float): longest seconds the circuit stays open after failed probes
+            clock (Callable): monotonic time source, injectable for testing
+        """
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.circuits: dict[str, dict] = {}  # host -> {state, failures, backoff, until}, only for hosts failing
+        self.lock = threading.Lock()
+
+    def state(self, host: str) -> str:
+        with self.lock:
+            circuit = self.circuits.get(host)
+            return circuit['state'] if circuit is not None else self.Closed
+
+    def allow(self, host: str) -> bool:
+        """True when a request to the host may be made, admitting one probe when an open circuit's backoff passed."""
+        with self.lock:
+            circuit = self.circuits.get(host)
+            if circuit is None or circuit['state'] == self.Closed:
+                return True
+            now = self.clock()
+            if now < circuit['until']:
+                return False
+            circuit['state'] = self.HalfOpen
+            circuit['until'] = now + circuit['backoff']  # time after which a lost probe is replaced
+            logger.info(f'Circuit half-open for {host}, probing')
+            return True
+
+    def retry_after(self, host: str) -> float:
+        """Seconds until a request to the host is allowed again, 0 when allowed now."""
+        with self.lock:
+            circuit = self.circuits.get(host)
+            if circuit is None or circuit['state'] == self.Closed:
+                return 0.0
+            return max(0.0, circuit['until'] - self.clock())
+
+    def success(self, host: str):
+        with self.lock:
+            if self.circuits.pop(host, None) is not None:
+                logger.info(f'Circuit closed for {host}')
+
+    def failure(self, host: str):
+        with self.lock:
+            circuit = self.circuits.setdefault(
+                host, {'state': self.Closed, 'failures': 0, 'backoff': self.backoff, 'until': 0.0}
+            )
+            circuit['failures'] += 1
+            if circuit['state'] == self.HalfOpen:
+                circuit['backoff'] = min(circuit['backoff'] * 2, self.max_backoff)
+            elif circuit['state'] == self.Open or circuit['failures'] < self.threshold:
+                return
+            circuit['state'] = self.Open
+            circuit['until'] = self.clock() + circuit['backoff']
+            logger.error(f'Circuit open for {host} for {circuit["backoff"]} seconds after {circuit["failures"]} failures')
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {host: {'state': c['state'], 'failures': c['failures']} for host, c in self.circuits.items()}
+
+
+DidJsonMaxSize = 1024 * 1024  # default bytes allowed for a did.json artifact
+KeriCesrMaxSize = 32 * 1024 * 1024  # default bytes allowed for a keri.cesr artifact
+ChunkSize = 64 * 1024  # bytes read from a response at a time
+
+
+@dataclass
+class SizeLimits:
+    """Bytes allowed for each did:webs artifact, any other URL is allowed as many bytes as a keri.cesr artifact."""
+
+    did_json: int = DidJsonMaxSize
+    keri_cesr: int = KeriCesrMaxSize
+
+    def limit(self, url: str) -> int:
+        return self.did_json if artifact_name(url) == 'did.json' else self.keri_cesr
+
+
+def artifact_name(url: str) -> str:
+    """Last path segment of the URL, like did.json or keri.cesr."""
+    return urllib.parse.urlsplit(url).path.rsplit('/', 1)[-1]
+
+
+def read_body(response: requests.Response, url: str, limits: SizeLimits | None = None, deadline: float | None = None) -> bytes:
+    """
+    Reads the body of a streamed response in chunks, aborting as soon as it exceeds the size allowed for the
+    artifact, or the deadline of its load passes, rather than buffering all of it. A keri.cesr body is framed
+    as it arrives, so the returned ingesting.FramedStream carries the frames of its leading messages and
+    ingestion does not frame it again.
+
+    Raises:
+        ArtifactTooLargeError: when the Content-Length or the bytes read exceed the size allowed for the artifact
+        ArtifactResolveError: when a keri.cesr body does not start with a CESR message or counter, or when the
+            monotonic deadline passes before the body is read
+    """
+    limits = limits if limits is not None else SizeLimits()
+    limit = limits.limit(url)
+    framer = ingesting.CesrFramer() if artifact_name(url) == 'keri.cesr' else None
+    chunks = []
+    size = 0
     try:
-        response = requests.get(url=https_url, timeout=timeout)
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f'Failed to connect to HTTPS URL {https_url}: {e}')
-    except Exception as e:
-        logger.error(f'Failed to load HTTPS URL {https_url}: {e}')
-    # Ensure the request was successful
-    if response is not None:
-        if response.status_code == 200:
-            return response.content if response.content else b''
-    logger.error(f'Failed to load URL {url}, trying with HTTP')
-
-    http_url = url[:]
-    http_url = http_url.replace('https://', 'http://', 1)  # Try with HTTP if HTTPS fails
+        length = response.headers.get('Content-Length')
+        if length is not None and str(length).isdigit() and int(length) > limit:
+            raise ArtifactTooLargeError(f'Artifact {url} of {length} bytes exceeds the {limit} bytes allowed')
+        for chunk in response.iter_content(chunk_size=ChunkSize):
+            size += len(chunk)
+            if size > limit:
+                raise ArtifactTooLargeError(f'Artifact {url} exceeds the {limit} bytes allowed')
+            if deadline is not None and time.monotonic() > deadline:
+                raise ArtifactResolveError(f'Timed out reading artifact {url}')
+            chunks.append(chunk)
+            if framer is not None:
+                framer.feed(chunk)
+        body = b''.join(chunks)
+        return framer.stream(body) if framer is not None else body
+    except ValueError as e:
+        raise ArtifactResolveError(f'Invalid keri.cesr artifact {url}: {e}') from e
+    finally:
+        response.close()
+
+
+def with_scheme(url: str, scheme: str) -> str:
+    """Returns the URL with its scheme replaced, adding the scheme to URLs without one."""
+    if '://' not in url:
+        url = f'{scheme}://{url}'
+    return urllib.parse.urlsplit(url)._replace(scheme=scheme).geturl()
+
+
+def request_with_requests(
+    url: str,
+    timeout: float = 5.0,
+    headers: dict | None = None,
+    pool: SessionPool | None = None,
+    schemes: SchemeMemory | None = None,
+    deadline: float | None = None,
+) -> requests.Response:
+    """
+    Performs an HTTP GET for the URL with requests, trying HTTPS first and falling back to HTTP.
+
+    A response is accepted when it is 200 OK or 304 Not Modified, otherwise the request is retried with the
+    next scheme. The response of the last attempt is returned whatever its status. Responses are streamed so
+    their bodies must be read with read_body, or the responses closed.
+
+    Parameters:
+        url (str): URL to load, any scheme is replaced by the scheme of each attempt
+        timeout (float): timeout for each HTTP request in seconds
+        headers (dict | None): request headers, such as conditional request validators
+        pool (SessionPool | None): keep-alive Sessions to send the requests with, one off connections if None
+        schemes (SchemeMemory | None): scheme policy and per host memory, always HTTPS then HTTP if None
+        deadline (float | None): monotonic time after which no attempt is made, each attempt given at most
+            the time remaining until it
+
+    Returns:
+        requests.Response: the response of the successful attempt or the response of the last attempt
+    """
+    logger.debug(f'Loading URL {url} with requests')
+    get = pool.get if pool is not None else requests.get
+    order = schemes.order(url) if schemes is not None else list(Schemes)
+    for i, scheme in enumerate(order):
+        last = i == len(order) - 1
+        attempt_url = with_scheme(url, scheme)
+        remaining = timeout if deadline is None else min(timeout, deadline - time.monotonic())
+        if remaining <= 0:
+            raise ArtifactResolveError(f'Timed out loading {url} before trying {scheme.upper()}')
+        try:
+            response = get(attempt_url, timeout=remaining, headers=headers, stream=True)
+        except requests.exceptions.ConnectionError as e:
+            logger.error(f'Failed to connect to {scheme.upper()} URL {attempt_url}: {e}')
+            if schemes is not None:
+                schemes.forget(url)
+            if last:
+                raise ArtifactResolveError(f'Failed to connect to {scheme.upper()} URL {attempt_url}') from e
+            continue
+        except Exception as e:
+            logger.error(f'Failed to load {scheme.upper()} URL {attempt_url}: {e}')
+            if schemes is not None:
+                schemes.forget(url)
+            if last:
+                raise ArtifactResolveError(f'Failed to load {scheme.upper()} URL {attempt_url}') from e
+            continue
+        if response.status_code in (200, 304):
+            if schemes is not None:
+                schemes.remember(url, scheme)
+            return response
+        if last:
+            return response
+        response.close()
+        logger.error(f'Failed to load URL {attempt_url}, trying with {order[i + 1].upper()}')
+
+
+def load_url_with_requests(
+    url: str,
+    timeout: float = 5.0,
+    pool: SessionPool | None = None,
+    schemes: SchemeMemory | None = None,
+    limits: SizeLimits | None = None,
+) -> bytes:
+    """
+    Load a URL with requests, trying HTTPS first and falling back to HTTP. Returns empty bytes on a non-200 response.
+    The body is streamed and bounded by the size allowed for the artifact, see read_body. The whole load, fallback
+    included, is bounded by load_deadline so a load abandoned by its caller does not outlive it.
+    """
+    deadline = load_deadline(timeout)
+    response = request_with_requests(url, timeout=timeout, pool=pool, schemes=schemes, deadline=deadline)
+    if response.status_code == 200:
+        return read_body(response, url, limits=limits, deadline=deadline)
+    response.close()
+    return b''
+
+
+def parse_cache_control(value: str | None) -> dict:
+    """
+    Parses a Cache-Control header into a dict of lower cased directives. Directives without
+    a value, like no-store, map to True.
+    """
+    directives = {}
+    if not value:
+        return directives
+    for part in value.split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+
+def freshness_lifetime(headers) -> float:
+    """Seconds a response stays fresh according to its Cache-Control max-age and Age headers, 0 when it must be revalidated."""
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in directives:
+        return 0.0
     try:
-        response = requests.get(http_url, timeout=timeout)
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f'Failed to connect to HTTP URL {http_url}: {e}')
-        raise ArtifactResolveError(f'Failed to connect to HTTP URL {http_url}') from e
-    except Exception as e:
-        logger.error(f'Failed to load HTTP URL {http_url}: {e}')
-        raise ArtifactResolveError(f'Failed to load HTTP URL {http_url}') from e
-    return response.content if response.status_code == 200 else b''
+        max_age = float(directives.get('max-age', 0))
+        age = float(headers.get('Age', 0))
+    except (TypeError, ValueError):
+        return 0.0
+    return max(max_age - age, 0.0)
+
+
+@dataclass
+class CachedArtifact:
+    """Bytes of a fetched artifact along with the validators and freshness given by the hosting server."""
+
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    fresh_until: float
+
+
+class ArtifactCache:
+    """
+    Caches did.json and keri.cesr artifact bytes along with their HTTP validators (ETag, Last-Modified).
+
+    Loads are served directly from the cache while a response is fresh according to Cache-Control max-age.
+    Once stale the artifact is revalidated with a conditional request (If-None-Match, If-Modified-Since)
+    and a 304 Not Modified response reuses the cached bytes. Responses marked no-store are never cached.
+
+    The cache is bounded both by the number of artifacts and by the bytes of their bodies, evicting the least
+    recently used artifacts beyond either bound. Artifacts larger than the byte budget are not cached.
+
+    Instances are callables with the same contract as load_url_with_requests so they can be used
+    anywhere a load_url function is accepted.
+    """
+
+    DefaultSize = 512  # maximum number of cached artifacts
+    DefaultMaxBytes = 64 * 1024 * 1024  # maximum bytes of cached artifact bodies
+
+    def __init__(
+        self,
+        size: int = DefaultSize,
+        max_bytes: int = DefaultMaxBytes,
+        clock: Callable[[], float] = time.monotonic,
+        pool: SessionPool | None = None,
+        schemes: SchemeMemory | None = None,
+        limits: SizeLimits | None = None,
+    ):
+        """
+        Parameters:
+            size (int): maximum number of artifacts held before the least recently used one is evicted
+            max_bytes (int): maximum bytes of artifact bodies held before the least recently used one is evicted,
+                0 disables caching
+            clock (Callable): monotonic time source, injectable for testing
+            pool (SessionPool | None): keep-alive Sessions to load artifacts with, one off connections if None
+            schemes (SchemeMemory | None): scheme policy and per host memory, always HTTPS then HTTP if None
+            limits (SizeLimits | None): bytes allowed per artifact, the default limits if None
+        """
+        self.size = size
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.pool = pool
+        self.schemes = schemes
+        self.limits = limits if limits is not None else SizeLimits()
+        self.entries: OrderedDict[str, CachedArtifact] = OrderedDict()
+        self.bytes = 0  # bytes of the cached artifact bodies
+        self.lock = threading.Lock()
+
+    def __call__(self, url: str, timeout: float = 5.0) -> bytes:
+        return self.load(url, timeout=timeout)
+
+    def load(self, url: str, timeout: float = 5.0) -> bytes:
+        """Returns the artifact bytes for the URL, from the cache when fresh or not modified, otherwise downloaded."""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                self.entries.move_to_end(url)
+        if entry is not None and entry.fresh_until > self.clock():
+            logger.debug(f'Serving fresh cached artifact for {url}')
+            return entry.body
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        deadline = load_deadline(timeout)
+        response = request_with_requests(
+            url, timeout=timeout, headers=headers or None, pool=self.pool, schemes=self.schemes, deadline=deadline
+        )
+
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            logger.debug(f'Artifact not modified for {url}')
+            with self.lock:
+                entry.fresh_until = self.clock() + freshness_lifetime(response.headers)
+                entry.etag = response.headers.get('ETag', entry.etag)
+                entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+            return entry.body
+        if response.status_code != 200:
+            response.close()
+            self.evict(url)
+            return b''
+
+        body = read_body(response, url, limits=self.limits, deadline=deadline)
+        self.store(url, body, response.headers)
+        return body
+
+    def store(self, url: str, body: bytes, headers):
+        """
+        Caches the artifact bytes when the response allows it, carries a validator or a freshness lifetime, and
+        the bytes fit the byte budget.
+        """
+        if self.size <= 0 or len(body) > self.max_bytes or 'no-store' in parse_cache_control(headers.get('Cache-Control')):
+            self.evict(url)
+            return
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        lifetime = freshness_lifetime(headers)
+        if not etag and not last_modified and lifetime <= 0:
+            self.evict(url)
+            return
+        entry = CachedArtifact(body=body, etag=etag, last_modified=last_modified, fresh_until=self.clock() + lifetime)
+        with self.lock:
+            previous = self.entries.pop(url, None)
+            if previous is not None:
+                self.bytes -= len(previous.body)
+            self.entries[url] = entry
+            self.bytes += len(body)
+            while len(self.entries) > self.size or self.bytes > self.max_bytes:
+                self.bytes -= len(self.entries.popitem(last=False)[1].body)
+
+    def evict(self, url: str):
+        with self.lock:
+            entry = self.entries.pop(url, None)
+            if entry is not None:
+                self.bytes -= len(entry.body)
 
 
 def load_url_with_hio(url: str, timeout: float = 5.0, method: str = 'GET') -> bytes:
@@ -4,13 +4,21 @@ dws.core.resolving module
 
 """
 
+import contextlib
+import functools
 import io
 import json
 import logging
 import os
-from typing import Callable, List
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent import futures
 
 import falcon
+import falcon.asgi
 from falcon import media
 from hio.base import doing
 from hio.core import http, tcp
@@ -18,16 +26,15 @@ from keri import kering
 from keri.app import habbing, oobiing
 from keri.app.habbing import Habery
 from keri.app.oobiing import Oobiery
-from keri.core import eventing, routing
 from keri.db import basing
 from keri.help import helping
-from keri.peer import exchanging
-from keri.vdr import credentialing, verifying
-from keri.vdr import eventing as teventing
+from keri.vdr import credentialing
 from keri.vdr.credentialing import Regery
 
-from dws import ArtifactResolveError, log_name, ogler
-from dws.core import didding, ends, requesting
+from dws import ArtifactResolveError, UnknownAID, log_name, ogler
+from dws.app.logs import Payload
+from dws.core import caching, coalescing, didding, diffing, ends, escrowing, ingesting, parsing, requesting, working
+from dws.core.ends import monitoring
 from dws.core.requesting import load_url_with_requests
 
 logger = ogler.getLogger(log_name)
@@ -59,34 +66,69 @@ def gen_dws_urls(did: str) -> (str, str, str):
     return aid, dd_url, kc_url
 
 
-def get_dws_artifacts(did: str, load_url: Callable = load_url_with_requests, timeout: float = 5.0) -> (str, bytes, bytes):
+ArtifactLoaders = 32  # threads loading artifacts across all resolutions
+
+
+@functools.cache
+def artifact_executor() -> futures.ThreadPoolExecutor:
+    """Threads loading did.json and keri.cesr artifacts, shared by every resolution and started on first use."""
+    return futures.ThreadPoolExecutor(max_workers=ArtifactLoaders, thread_name_prefix='dws-artifacts')
+
+
+def get_dws_artifacts(
+    did: str, load_url: Callable = load_url_with_requests, timeout: float = 5.0, executor: futures.Executor | None = None
+) -> (str, bytes, bytes):
     """
     Execute HTTP calls for the did.json and keri.cesr artifacts for a did:webs DID.
 
+    Both artifacts are loaded concurrently under one overall deadline of timeout seconds for each scheme a load
+    may try, so an HTTPS attempt timing out still leaves its HTTP fallback the full timeout. If either load
+    fails the other is abandoned and the failure is raised without waiting on it.
+
     Parameters:
         did (str): The did:webs DID to resolve.
         load_url (Callable): Function to load URLs, can be mocked for testing.
-        timeout (float): Timeout for HTTP requests in seconds.
+        timeout (float): Timeout for each HTTP request in seconds.
+        executor (Executor | None): threads to load the artifacts on, the shared artifact_executor if None
 
     Returns:
         (str, bytes, bytes): The AID, did.json content, and keri.cesr content for the given did:webs DID.
     """
     aid, dd_url, kc_url = gen_dws_urls(did=did)
 
-    # Load the did doc
-    logger.info(f'Loading DID Doc from {dd_url}')
-    dd_res = load_url(dd_url, timeout=timeout)
-    logger.debug(f'Got DID doc: {dd_res.decode("utf-8")}')
-
-    # Load the KERI CESR
-    logger.info(f'Loading KERI CESR from {kc_url}')
-    kc_res = load_url(kc_url, timeout=timeout)
-    logger.debug(f'Got KERI CESR: {kc_res.decode("utf-8")}')
-
+    logger.info('Loading DID Doc from %s', dd_url)
+    logger.info('Loading KERI CESR from %s', kc_url)
+    executor = executor if executor is not None else artifact_executor()
+    wait = timeout * len(requesting.Schemes)
+    dd_future = executor.submit(load_url, dd_url, timeout=timeout)
+    kc_future = executor.submit(load_url, kc_url, timeout=timeout)
+    try:
+        done, pending = futures.wait([dd_future, kc_future], timeout=wait, return_when=futures.FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+        if pending:
+            raise ArtifactResolveError(f'Timed out after {wait} seconds loading did:webs artifacts for {did}')
+        dd_res = dd_future.result()
+        kc_res = kc_future.result()
+    finally:
+        for future in (dd_future, kc_future):
+            # abandon any load not yet started, requesting loads still running stop at the same deadline
+            future.cancel()
+
+    logger.debug('Got DID doc: %s', Payload(dd_res))
+    logger.debug('Got KERI CESR: %s', Payload(kc_res))
     return aid, dd_res, kc_res
 
 
-def save_cesr(hby: Habery, rgy: Regery, kc_res: bytes, aid: str = None):
+def save_cesr(
+    hby: Habery,
+    rgy: Regery,
+    kc_res: bytes,
+    aid: str | None = None,
+    incremental: bool = True,
+    ingestor: ingesting.Ingestor | None = None,
+):
     """
     Save the resolved keri.cesr stream to the local keystore by parsing the CESR objects in it
     with the appropriate message processor. This makes the designated aliases ACDC and the location
@@ -97,32 +139,43 @@ def save_cesr(hby: Habery, rgy: Regery, kc_res: bytes, aid: str = None):
         rgy (Regery): The Regery instance for credential and registry management.
         kc_res (bytes): The KERI CESR stream to save.
         aid (str): The AID of the identifier to which the CESR belongs. If None, it will be derived from the CESR.
+        incremental (bool): When True only the part of the stream following the key events already
+            stored locally is parsed, so ingestion cost scales with the number of new events.
+        ingestor (Ingestor): Long lived message processors shared across resolutions, created for this call if None.
     """
-    logger.debug('Saving KERI CESR to hby: %s', kc_res.decode('utf-8'))
-    # CESR message handlers
-    rtr = routing.Router()
-    rvy = routing.Revery(db=hby.db, rtr=rtr)  # Have to create the Revery before Kevery so the Kevery.kvr is set.
-    exc = exchanging.Exchanger(hby=hby, handlers=[])
-    kvy = eventing.Kevery(db=hby.db, rvy=rvy)
-    tvy = teventing.Tevery(db=hby.db, reger=rgy.reger)
-    vry = verifying.Verifier(hby=hby, reger=rgy.reger)
-    kvy.registerReplyRoutes(router=rtr)  # make sure LocScheme and EndRole records are processed
-    tvy.registerReplyRoutes(router=rtr)  # make sure ACDC rpy messages are processed
-    local = True if aid in hby.habs else False
-
-    # Call to parse the stream.
-    hby.psr.parse(ims=bytearray(kc_res), kvy=kvy, tvy=tvy, vry=vry, rvy=rvy, exc=exc, local=local)
+    logger.debug('Saving KERI CESR to hby: %s', Payload(kc_res))
+    ingestor = ingestor if ingestor is not None else ingesting.Ingestor(hby=hby, rgy=rgy)
+    ingestor.ingest(ims=kc_res, aid=aid, incremental=incremental)
 
     # After parsing then the AID should be in kevers, meaning the KEL for the AID is locally available
     if aid not in hby.kevers:
         raise kering.KeriError(f'KERI CESR parsing and saving failed, KERI AID {aid} not found in habery')
 
-    # Process escrows to ensure all events are processed
-    kvy.processEscrows()
-    tvy.processEscrows()
-    exc.processEscrow()
-    vry.processEscrows()
-    rvy.processEscrowReply()
+    # Process escrows to ensure all events are processed, left to the background Escrower when one runs
+    ingestor.settle(ims=kc_res)
+
+
+def keystore_lock(ingestor: ingesting.Ingestor | None):
+    """
+    Lock serializing keystore access between resolver worker threads and the background Escrower, the lock
+    of the shared Ingestor, or a no-op when resolutions do not share an Ingestor.
+    """
+    return ingestor.lock if ingestor is not None else contextlib.nullcontext()
+
+
+def ingest_cesr(hby: Habery, rgy: Regery, kc_res: bytes, aid: str, ingestor: ingesting.Ingestor = None):
+    """
+    Saves the keri.cesr stream with save_cesr unless the AID is known and was last fully ingested from this very
+    stream, as remembered by the IngestedStreams of a long lived ingestor. Called with the keystore lock held.
+    """
+    streams = getattr(ingestor, 'streams', None)
+    digest = streams.digest(kc_res) if streams is not None else None
+    if digest is not None and streams.seen(aid, digest) and aid in hby.kevers:
+        logger.info(f'KERI CESR for {aid} already ingested, skipping ingestion')
+        return
+    save_cesr(hby=hby, rgy=rgy, kc_res=kc_res, aid=aid, ingestor=ingestor)
+    if digest is not None and not ingesting.pending_key_events(hby, kc_res):
+        streams.add(aid, digest)
 
 
 def get_generated_did_doc(
@@ -130,6 +183,7 @@ def get_generated_did_doc(
     rgy: credentialing.Regery,
     did: str,
     meta: bool,
+    view: caching.DocumentView | None = None,
 ):
     """
     Get the did:webs DID document generated from the did.json and keri.cesr files loaded for a given did:webs DID.
@@ -140,18 +194,23 @@ def get_generated_did_doc(
         rgy (credentialing.Regery): The Regery instance for credential and registry management.
         did (str): The did:webs DID to generate the document for.
         meta (bool): Whether to include metadata in the DID document.
+        view (DocumentView | None): materialized DID documents to read from, generated per call if None
     """
     aid, dd_url, kc_url = gen_dws_urls(did=did)
-    dd = didding.generate_did_doc(hby, rgy, did=did, aid=aid, meta=meta)
+    if view is not None:
+        dd = view.document(hby, rgy, did=did, aid=aid, meta=meta)
+    else:
+        dd = didding.generate_did_doc(hby, rgy, did=did, aid=aid, meta=meta)
     if meta:
         dd[didding.DD_META_FIELD]['didDocUrl'] = dd_url
         dd[didding.DD_META_FIELD]['keriCesrUrl'] = kc_url
     return dd
 
 
-def error_resolution_response(error_message: str, differences: list) -> dict:
+def error_resolution_response(error_message: str, differences: list, truncated: bool = False) -> dict:
     """
-    Generate an error response for DID resolution.
+    Generate an error response for DID resolution, with the differences as JSON Patch operations turning the
+    expected DID document into the actual one and whether they were truncated.
     """
     resolution = dict()  # Copy the actual DID document to modify it
     resolution[didding.DD_FIELD] = None
@@ -159,13 +218,34 @@ def error_resolution_response(error_message: str, differences: list) -> dict:
     resolution[didding.DID_RES_META_FIELD]['error'] = 'notVerified'
     resolution[didding.DID_RES_META_FIELD]['errorMessage'] = error_message
     resolution[didding.DID_RES_META_FIELD]['differences'] = differences
+    if truncated:
+        resolution[didding.DID_RES_META_FIELD]['differencesTruncated'] = True
     return resolution
 
 
-def verify(dd_expected: dict, dd_actual: dict, meta: bool = False) -> (bool, dict):
+def failed_resolution(error: str, error_message: str) -> dict:
+    """DID resolution result of a failed resolution with the didResolutionMetadata error code and message."""
+    return {
+        didding.DD_FIELD: None,
+        didding.DID_RES_META_FIELD: {'error': error, 'errorMessage': error_message},
+        didding.DD_META_FIELD: {},
+    }
+
+
+def verify(dd_expected: dict, dd_actual: dict, meta: bool = False, digest: str | None = None) -> (bool, dict):
     """
     Verify the DID document against the KERI event stream.
 
+    The RFC 8785 (JCS) canonical digests of both DID documents are compared first, falling back to a structural
+    comparison only when they differ. A verified resolution with metadata carries the digest of its DID document
+    as didDocumentDigest in its didResolutionMetadata.
+
+    Parameters:
+        dd_expected (dict): DID document or resolution generated from the KEL
+        dd_actual (dict): DID document or resolution loaded from did.json
+        meta (bool): Whether the documents are resolutions with metadata
+        digest (str | None): canonical digest of the expected DID document, computed if None
+
     Returns:
          tuple(bool, dict): (verified, dd) where verified is a boolean indicating verification status
     """
@@ -175,67 +255,78 @@ def verify(dd_expected: dict, dd_actual: dict, meta: bool = False) -> (bool, dic
     if meta:
         dd_exp = dd_expected[didding.DD_FIELD]
         dd_act = dd_actual[didding.DD_FIELD]
-    verified, differences = compare_did_docs(dd_exp, dd_act)
-
-    if verified:
-        logger.info(f'DID document verified')
+    digest = digest if digest is not None else diffing.digest(dd_exp)
+    if diffing.digest(dd_act) == digest or diffing.equal(dd_exp, dd_act):
+        logger.info('DID document verified')
+        if meta:
+            dd_expected[didding.DID_RES_META_FIELD]['didDocumentDigest'] = digest
         return True, dd_expected
     else:
-        logger.info(f'DID document verification failed')
+        logger.info('DID document verification failed')
+        differences, truncated = diffing.diff(dd_exp, dd_act)
+        logger.error('Differences found in DID Doc verification: %s', Payload(differences))
         return (
             False,
             error_resolution_response(
-                error_message='The DID document could not be verified against the KERI event stream', differences=differences
+                error_message='The DID document could not be verified against the KERI event stream',
+                differences=differences,
+                truncated=truncated,
             ),
         )
 
 
 def compare_did_docs(expected, actual) -> (bool, list):
     """
-    Performs did:webs DID document verification by performing a simple, deep dictionary comparison
-    using Python's built-in equality operator comparison.
+    Performs did:webs DID document verification with a structural comparison that stops at the first mismatch,
+    comparing set valued properties like service and alsoKnownAs regardless of order.
 
     Returns:
         tuple(bool, list): (verified, differences) where verified is a boolean indicating verification status
+            and differences are the JSON Patch operations turning the expected document into the actual one
     """
     # TODO determine what to do with BADA RUN things like services (witnesses) etc.
-    if (
-        expected != actual
-    ):  # Python != and == perform a deep object value comparison; this is not reference equality, it is value equality
-        differences = diff_dicts(expected, actual)
-        logger.error(f'Differences found in DID Doc verification: {differences}')
-        return False, differences
-    else:
+    if diffing.equal(expected, actual):
         return True, []
+    differences, _ = diffing.diff(expected, actual)
+    logger.error('Differences found in DID Doc verification: %s', Payload(differences))
+    return False, differences
 
 
 def diff_dicts(expected, actual, path=''):
-    """Recursively compare two dictionaries and return differences."""
-    logger.error(f'Comparing dictionaries:\nexpected:\n{expected}\n \nand\n \nactual:\n{actual}')
+    """
+    Recursively compare two dictionaries and return differences as nested lists of (path, expected, actual)
+    tuples. Superseded by diffing.diff for DID document verification.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug(
+            'Comparing dictionaries at %s:\nexpected:\n%s\nactual:\n%s', path or '.', Payload(expected), Payload(actual)
+        )
     differences = []
 
     if isinstance(expected, dict):
         for k in expected.keys():
             # Construct current path
             current_path = f'{path}.{k}' if path else k
-            logger.error(f'Comparing key {current_path}')
+            if debug:
+                logger.debug('Comparing key %s', current_path)
 
             # Key not present in the actual dictionary
             if k not in actual:
                 differences.append((current_path, expected[k], None))
-                logger.error(f'Key {current_path} not found in the actual dictionary')
+                logger.error('Key %s not found in the actual dictionary', current_path)
                 continue
 
             # If value in expected is a dictionary but not in actual
             if isinstance(expected[k], dict) and not isinstance(actual[k], dict):
                 differences.append((current_path, expected[k], actual[k]))
-                logger.error(f'{current_path} is a dictionary in expected, but not in actual')
+                logger.error('%s is a dictionary in expected, but not in actual', current_path)
                 continue
 
             # If value in actual is a dictionary but not in expected
             if isinstance(actual[k], dict) and not isinstance(expected[k], dict):
                 differences.append((current_path, expected[k], actual[k]))
-                logger.error(f'{current_path} is a dictionary in actual, but not in expected')
+                logger.error('%s is a dictionary in actual, but not in expected', current_path)
                 continue
 
             # If value is another dictionary, recurse
@@ -244,7 +335,12 @@ def diff_dicts(expected, actual, path=''):
             # Compare non-dict values
             elif expected[k] != actual[k]:
                 differences.append((current_path, expected[k], actual[k]))
-                logger.error(f'Different values for key {current_path}: {expected[k]} (expected) vs. {actual[k]} (actual)')
+                logger.error(
+                    'Different values for key %s: %s (expected) vs. %s (actual)',
+                    current_path,
+                    Payload(expected[k]),
+                    Payload(actual[k]),
+                )
 
         if isinstance(actual, dict):
             # Check for keys in actual that are not present in expected
@@ -252,21 +348,23 @@ def diff_dicts(expected, actual, path=''):
                 current_path = f'{path}.{k}' if path else k
                 if k not in expected:
                     differences.append((current_path, None, actual[k]))
-                    logger.error(f'Key {current_path} not found in the expected dictionary')
+                    logger.error('Key %s not found in the expected dictionary', current_path)
         else:
             differences.append((path, expected, None))
-            logger.error(f'Expecting actual did document to contain dictionary {expected}')
+            logger.error('Expecting actual did document to contain dictionary %s', Payload(expected))
     elif isinstance(expected, list):
         if len(expected) != len(actual):
             differences.append((path, expected, actual))
-            logger.error(f'Expected list {expected} and actual list {actual} are not the same length')
+            logger.error('Expected list %s and actual list %s are not the same length', Payload(expected), Payload(actual))
         else:
             for i in range(len(expected)):
                 differences.append(diff_dicts(expected[i], actual[i], path))
     else:
         if expected != actual:
             differences.append((path, expected, actual))
-            logger.error(f'Different values for key {path}: {expected} (expected) vs. {actual} (actual)')
+            logger.error(
+                'Different values for key %s: %s (expected) vs. %s (actual)', path, Payload(expected), Payload(actual)
+            )
     return differences
 
 
@@ -286,6 +384,10 @@ def resolve(
     meta: bool = False,
     load_url: Callable = load_url_with_requests,
     timeout: float = 5.0,
+    ingestor: ingesting.Ingestor = None,
+    digests: caching.DigestCache | None = None,
+    view: caching.DocumentView | None = None,
+    executor: futures.Executor | None = None,
 ) -> (bool, dict):
     """
     Resolve a did:webs DID and returl the verification result.
@@ -297,28 +399,152 @@ def resolve(
         meta (bool): Whether to include metadata in the DID document.
         load_url (Callable): Function to load URLs, can be mocked for testing.
         timeout (float): Timeout for HTTP requests in seconds.
+        ingestor (Ingestor): Long lived message processors to ingest keri.cesr with, created per call if None.
+        digests (DigestCache | None): cache of expected resolutions and their digests, disabled if None
+        view (DocumentView | None): materialized DID documents to verify against, generated per call if None
+        executor (Executor | None): threads to load the artifacts on, the shared artifact_executor if None
 
     Returns:
         tuple(bool, dict): (verified, resolution) where verified is a boolean indicating verification status
     """
     try:
-        aid, dd_res, kc_res = get_dws_artifacts(did=did, load_url=load_url, timeout=timeout)
+        aid, dd_res, kc_res = get_dws_artifacts(did=did, load_url=load_url, timeout=timeout, executor=executor)
     except ArtifactResolveError as e:
         logger.error(f'Failed to resolve DID {did}: {e}')
         return False, {'error': str(e)}
     except Exception as e:
         logger.error(f'Unexpected error while resolving DID {did}: {e}')
         return False, {'error': f'Unexpected error while resolving DID {did}: {e}'}
-    save_cesr(hby=hby, rgy=rgy, kc_res=kc_res, aid=aid)
-    loaded_dd = json.loads(dd_res.decode('utf-8'))
-    if meta and didding.DD_FIELD not in loaded_dd:
-        loaded_dd = wrap_metadata(loaded_dd, did, aid, hby, rgy)
-    dd_actual = didding.from_did_web(loaded_dd, meta)
-    dd_expected = get_generated_did_doc(hby=hby, rgy=rgy, did=did, meta=meta)
-    return verify(dd_expected, dd_actual, meta=meta)
+    return verify_artifacts(
+        hby=hby,
+        rgy=rgy,
+        did=did,
+        aid=aid,
+        dd_res=dd_res,
+        kc_res=kc_res,
+        meta=meta,
+        ingestor=ingestor,
+        digests=digests,
+        view=view,
+    )
+
+
+def resolve_many(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    dids: Iterable[str],
+    meta: bool = False,
+    load_url: Callable = load_url_with_requests,
+    timeout: float = 5.0,
+    ingestor: ingesting.Ingestor = None,
+    concurrency: int = 8,
+) -> Iterator[dict]:
+    """
+    Resolve many did:webs DIDs in one keystore session, at most concurrency at once, yielding a record per
+    DID in completion order. Artifact loads run concurrently while keystore work is serialized by the ingestor.
+
+    Parameters:
+        hby (habbing.Habery): The Habery instance containing the KERI database.
+        rgy (credentialing.Regery): The Regery instance for credential and registry management.
+        dids (Iterable[str]): The did:webs DIDs to resolve.
+        meta (bool): Whether to include metadata in the DID documents.
+        load_url (Callable): Function to load URLs, can be mocked for testing.
+        timeout (float): Timeout for loading the artifacts of each DID in seconds.
+        ingestor (Ingestor): Message processors shared by all resolutions, created once for the batch if None.
+        concurrency (int): Number of DIDs resolved at once.
+
+    Returns:
+        Iterator[dict]: {did, verified, seconds, result} records, result holding the resolution or an error
+    """
+    ingestor = ingestor if ingestor is not None else ingesting.Ingestor(hby=hby, rgy=rgy)
+
+    def resolve_one(did: str) -> dict:
+        start = time.perf_counter()
+        try:
+            if not did.startswith('did:webs'):
+                raise ValueError(f'invalid did:webs DID: {did}')
+            verified, result = resolve(hby, rgy, did, meta=meta, load_url=load_url, timeout=timeout, ingestor=ingestor)
+        except Exception as e:
+            logger.exception(f'Failed to resolve DID {did}')
+            verified, result = False, {'error': str(e)}
+        return {'did': did, 'verified': verified, 'seconds': round(time.perf_counter() - start, 6), 'result': result}
+
+    with futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='dws-bulk') as executor:
+        pending = set()
+        for did in dids:
+            if len(pending) >= concurrency:  # bound the DIDs in flight so large inputs are not all queued at once
+                done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+            pending.add(executor.submit(resolve_one, did))
+        for future in futures.as_completed(pending):
+            yield future.result()
+
+
+def verify_artifacts(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    did: str,
+    aid: str,
+    dd_res: bytes,
+    kc_res: bytes,
+    meta: bool = False,
+    ingestor: ingesting.Ingestor = None,
+    digests: caching.DigestCache | None = None,
+    view: caching.DocumentView | None = None,
+) -> (bool, dict):
+    """
+    Ingests the keri.cesr artifact of a did:webs DID and verifies its did.json artifact against the DID document
+    generated from the local keystore. The keystore side of resolution, shared by the sync and async resolvers.
+
+    Documents are compared by their RFC 8785 (JCS) digests first. With a digest cache the expected resolution and
+    its digest are generated once per key state of the AID, and a did.json already verified against that key state
+    is recognized by the digest of its bytes alone. Resolutions with metadata carry the digest of the DID document
+    as the didDocumentDigest of their didResolutionMetadata.
 
+    Parameters:
+        hby (habbing.Habery): The Habery instance containing the KERI database.
+        rgy (credentialing.Regery): The Regery instance for credential and registry management.
+        did (str): The did:webs DID being resolved.
+        aid (str): The AID of the DID.
+        dd_res (bytes): The did.json artifact.
+        kc_res (bytes): The keri.cesr artifact.
+        meta (bool): Whether to include metadata in the DID document.
+        ingestor (Ingestor): Long lived message processors to ingest keri.cesr with, created per call if None.
+        digests (DigestCache | None): cache of expected resolutions and their digests, disabled if None
+        view (DocumentView | None): materialized DID documents to verify against, generated per call if None
 
-def keri_headers() -> List[str]:
+    Returns:
+        tuple(bool, dict): (verified, resolution) where verified is a boolean indicating verification status
+    """
+    with keystore_lock(ingestor):
+        ingest_cesr(hby=hby, rgy=rgy, kc_res=kc_res, aid=aid, ingestor=ingestor)
+        oobis, aliases = (view.oobis, view.aliases) if view is not None else (None, None)
+        state = caching.document_state(hby, rgy, aid, oobis=oobis, aliases=aliases) if digests is not None else None
+        entry = digests.get(did, aid, meta, state) if state is not None else None
+        raw = diffing.digest_bytes(dd_res) if state is not None else None
+        if entry is not None and digests.verified_raw(entry, raw):
+            logger.info('did.json of %s already verified against the current key state', did)
+            return True, caching.refresh_retrieved(entry.value, meta)
+
+        loaded_dd = json.loads(dd_res.decode('utf-8'))
+        if meta and didding.DD_FIELD not in loaded_dd:
+            loaded_dd = wrap_metadata(loaded_dd, did, aid, hby, rgy)
+        dd_actual = didding.from_did_web(loaded_dd, meta)
+        if state is None:
+            return verify(get_generated_did_doc(hby=hby, rgy=rgy, did=did, meta=meta, view=view), dd_actual, meta=meta)
+        if entry is None:
+            dd_expected = get_generated_did_doc(hby=hby, rgy=rgy, did=did, meta=meta, view=view)
+            digest = diffing.digest(dd_expected[didding.DD_FIELD] if meta else dd_expected)
+            if meta:
+                dd_expected[didding.DID_RES_META_FIELD]['didDocumentDigest'] = digest
+            entry = digests.put(did, aid, meta, state, digest, dd_expected)
+        verified, resolution = verify(caching.refresh_retrieved(entry.value, meta), dd_actual, meta=meta, digest=entry.digest)
+        if verified:
+            digests.add_verified(entry, raw)
+        return verified, resolution
+
+
+def keri_headers() -> list[str]:
     """HTTP header array for both CESR content types and Signify headers."""
     return [
         'cesr-attachment',
@@ -363,11 +589,19 @@ class RequestLoggerMiddleware:
         logger.info(f'Response status  : %s on %s %s', resp.status, req.method, req.url)
         logger.debug(f'Response headers: %s', resp.headers)
 
+    async def process_request_async(self, req: falcon.asgi.Request, resp: falcon.asgi.Response):
+        """Log incoming requests to the ASGI resolver app, leaving the body stream unread."""
+        logger.info('Request received : %s %s', req.method, req.url)
+        logger.debug('Request headers : %s', req.headers)
 
-def falcon_app() -> falcon.App:
-    """Create a Falcon app instance with open CORS settings."""
-    app = falcon.App(middleware=[cors_middleware(), RequestLoggerMiddleware()])
-    app.req_options.media_handlers = media.Handlers(
+    async def process_response_async(self, req: falcon.asgi.Request, resp: falcon.asgi.Response, resource, req_succeeded):
+        """Log outgoing responses of the ASGI resolver app."""
+        self.process_response(req, resp, resource, req_succeeded)
+
+
+def request_media_handlers() -> media.Handlers:
+    """Request media handlers of the resolver apps."""
+    return media.Handlers(
         {
             'application/json': media.JSONHandler(),
             'application/did+ld+json': media.JSONHandler(),  # Map DID JSON-LD to JSON parser
@@ -375,13 +609,24 @@ def falcon_app() -> falcon.App:
             'application/x-www-form-urlencoded': media.URLEncodedFormHandler(),
         }
     )
-    app.resp_options.media_handlers = media.Handlers(
+
+
+def response_media_handlers() -> media.Handlers:
+    """Response media handlers of the resolver apps."""
+    return media.Handlers(
         {
             'application/json': media.JSONHandler(),
             'application/did+ld+json': media.JSONHandler(),  # Ensure responses can use it
             'application/did-resolution': media.JSONHandler(),  # Map DID Resolution to JSON parser
         }
     )
+
+
+def falcon_app() -> falcon.App:
+    """Create a Falcon app instance with open CORS settings."""
+    app = falcon.App(middleware=[cors_middleware(), RequestLoggerMiddleware()])
+    app.req_options.media_handlers = request_media_handlers()
+    app.resp_options.media_handlers = response_media_handlers()
     return app
 
 
@@ -399,7 +644,29 @@ def tls_falcon_server(
 
 
 def setup_resolver(
-    hby, rgy, oobiery, http_port, static_files_dir=None, did_path=None, keypath=None, certpath=None, cafilepath=None
+    hby,
+    rgy,
+    oobiery,
+    http_port,
+    static_files_dir=None,
+    did_path=None,
+    keypath=None,
+    certpath=None,
+    cafilepath=None,
+    cache_size=caching.ResolutionCache.DefaultSize,
+    cache_ttl=caching.ResolutionCache.DefaultTTL,
+    escrow_tock=escrowing.Escrower.DefaultTock,
+    escrow_budget=escrowing.Escrower.DefaultBudget,
+    scheme_policy=requesting.SchemeMemory.HttpsPreferred,
+    http_hosts=None,
+    workers=working.WorkerPool.DefaultSize,
+    queue_depth=working.WorkerPool.DefaultQueueDepth,
+    negative_ttls=None,
+    breaker_threshold=requesting.CircuitBreaker.DefaultThreshold,
+    breaker_backoff=requesting.CircuitBreaker.DefaultBackoff,
+    max_did_json_size=requesting.DidJsonMaxSize,
+    max_keri_cesr_size=requesting.KeriCesrMaxSize,
+    artifact_cache_bytes=requesting.ArtifactCache.DefaultMaxBytes,
 ):
     """Setup serving package and endpoints
 
@@ -413,18 +680,57 @@ def setup_resolver(
         keypath (str | None): path to the TLS private key file, default is None (disabled)
         certpath (str | None): path to the TLS certificate file, default is None (disabled)
         cafilepath (str | None): path to the CA certificate file, default is None (disabled)
+        cache_size (int): maximum number of cached resolution results, 0 disables the resolution cache
+        cache_ttl (float): seconds a cached resolution result may be served
+        escrow_tock (float): seconds between background escrow sweeps
+        escrow_budget (float): seconds of escrow sweeping allowed per tick
+        scheme_policy (str): URL scheme policy for loading artifacts, one of requesting.SchemeMemory.Policies
+        http_hosts (list[str] | None): hosts allowed to be loaded over HTTP under the https-only policy
+        workers (int): worker threads resolving DIDs off the HTTP server loop, 0 resolves on the loop
+        queue_depth (int): resolutions allowed to wait for a worker before requests are rejected with 503
+        negative_ttls (dict | None): seconds failed resolutions are cached per failure class, overriding the defaults
+        breaker_threshold (int): consecutive artifact load failures opening the circuit of a host, 0 disables
+        breaker_backoff (float): seconds the circuit of a failing host stays open before it is probed
+        max_did_json_size (int): bytes allowed for a did.json artifact, larger downloads are aborted
+        max_keri_cesr_size (int): bytes allowed for a keri.cesr artifact, larger downloads are aborted
+        artifact_cache_bytes (int): bytes of did.json and keri.cesr artifacts cached for revalidation, 0 disables
     Returns:
         list: list of Doers to run in the Tymist
     """
     logger.info(f'Setting up Resolver HTTP server Doers on port {http_port}')
     app = falcon_app()
+    pool = working.WorkerPool(size=workers, queue_depth=queue_depth) if workers > 0 else None
+    wsgi = working.OffloopApp(app, pool=pool) if pool is not None else app
 
-    server = tls_falcon_server(app, http_port=http_port, keypath=keypath, certpath=certpath, cafilepath=cafilepath)
+    server = tls_falcon_server(wsgi, http_port=http_port, keypath=keypath, certpath=certpath, cafilepath=cafilepath)
     http_server_doer = http.ServerDoer(server=server)
 
-    load_ends(app, hby=hby, rgy=rgy, oobiery=oobiery, static_files_dir=static_files_dir, did_path=did_path)
+    ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+    cache = caching.ResolutionCache(size=cache_size, ttl=cache_ttl, aliases=ingestor.aliases) if cache_size > 0 else None
+    escrower = escrowing.Escrower(ingestor=ingestor, tock=escrow_tock, budget=escrow_budget)
+    load_ends(
+        app,
+        hby=hby,
+        rgy=rgy,
+        oobiery=oobiery,
+        static_files_dir=static_files_dir,
+        did_path=did_path,
+        cache=cache,
+        digests=caching.DigestCache(size=cache_size),
+        view=caching.DocumentView(size=cache_size, aliases=ingestor.aliases),
+        ingestor=ingestor,
+        escrower=escrower,
+        schemes=requesting.SchemeMemory(policy=scheme_policy, http_hosts=http_hosts),
+        pool=pool,
+        negative=caching.NegativeCache(ttls=negative_ttls),
+        breaker=requesting.CircuitBreaker(threshold=breaker_threshold, backoff=breaker_backoff)
+        if breaker_threshold > 0
+        else None,
+        limits=requesting.SizeLimits(did_json=max_did_json_size, keri_cesr=max_keri_cesr_size),
+        artifact_cache_bytes=artifact_cache_bytes,
+    )
 
-    doers = [http_server_doer]
+    doers = [http_server_doer, escrower]
 
     return doers
 
@@ -458,13 +764,117 @@ def load_ends(
     oobiery: oobiing.Oobiery,
     static_files_dir: str,
     did_path: str = '',
+    cache: caching.ResolutionCache | None = None,
+    ingestor: ingesting.Ingestor | None = None,
+    escrower: escrowing.Escrower | None = None,
+    schemes: requesting.SchemeMemory | None = None,
+    pool: working.WorkerPool | None = None,
+    keri_resolver: Callable | None = None,
+    negative: caching.NegativeCache | None = None,
+    breaker: requesting.CircuitBreaker | None = None,
+    limits: requesting.SizeLimits | None = None,
+    digests: caching.DigestCache | None = None,
+    view: caching.DocumentView | None = None,
+    artifact_cache_bytes: int = requesting.ArtifactCache.DefaultMaxBytes,
 ):
     """Set up Falcon HTTP server endpoints for resolving DIDs and hosting static files"""
     if static_files_dir is not None:
         serve_artifacts(app, hby, static_files_dir, did_path)
-    resolve_end = UniversalResolverResource(hby=hby, rgy=rgy, oobiery=oobiery, load_url=requesting.load_url_with_requests)
+    schemes = schemes if schemes is not None else requesting.SchemeMemory()
+    resolve_end = UniversalResolverResource(
+        hby=hby,
+        rgy=rgy,
+        oobiery=oobiery,
+        load_url=requesting.ArtifactCache(
+            max_bytes=artifact_cache_bytes, pool=requesting.SessionPool(), schemes=schemes, limits=limits
+        ),
+        cache=cache,
+        ingestor=ingestor,
+        keri_resolver=keri_resolver,
+        negative=negative,
+        breaker=breaker,
+        digests=digests,
+        view=view,
+    )
     app.add_route('/1.0/identifiers/{did}', resolve_end)
+    app.add_route('/1.0/identifiers', BatchResolverResource(resolve_end, pool=pool))
+    sources = {'coalescing': resolve_end.flights.metrics, 'parsing': parsing.metrics}
     app.add_route('/health', ends.HealthEnd())
+    if escrower is not None:
+        sources['escrows'] = escrower.metrics
+    if pool is not None:
+        sources['workers'] = pool.metrics
+    if negative is not None:
+        sources['negative'] = lambda: {'size': len(negative), 'hits': negative.hits}
+    if breaker is not None:
+        sources['circuits'] = breaker.metrics
+    if digests is not None:
+        sources['digests'] = digests.metrics
+    if view is not None:
+        sources['documents'] = view.metrics
+    app.add_route('/metrics', monitoring.MetricsEnd(sources=sources))
+
+
+def resolution_options(req: falcon.Request) -> (str | None, bool):
+    """Returns the (oobi, meta) options of a resolution request from its query parameters and Accept header."""
+    if 'oobi' in req.params:
+        oobi = req.params['oobi']
+        logger.info('From parameters %s got oobi: %s', req.params, oobi)
+    else:
+        oobi = None
+
+    accepts = req.get_header('Accept')
+    accepts = accepts.lower() if accepts else ''
+
+    if 'meta' in req.params:
+        meta = req.params['meta'].lower() in ('true', '1', 'yes')
+        logger.info('From parameters %s got meta: %s', req.params, meta)
+    elif accepts == 'application/did-resolution':
+        meta = True
+        logger.info('From accept header Accept got %s', accepts)
+    else:
+        meta = False
+    return oobi, meta
+
+
+ErrorNotFound = 'notFound'  # didResolutionMetadata error when artifacts or the AID could not be found
+ErrorInvalidDidDocument = 'invalidDidDocument'  # didResolutionMetadata error when artifacts could not be parsed
+ErrorHostUnavailable = 'hostUnavailable'  # didResolutionMetadata error while the circuit of the host is open
+
+
+def artifact_host(did: str) -> str:
+    """Host, as host or host:port, serving the artifacts of a did:webs DID."""
+    domain, port, _, _, _ = didding.parse_did_webs(did=did)
+    return f'{domain}:{port}' if port else domain
+
+
+def supported_did(did: str) -> bool:
+    """True for the DID methods the resolver resolves, did:webs and did:keri."""
+    return did.startswith(('did:webs', 'did:keri'))
+
+
+def respond_resolution(rep: falcon.Response, did: str, result: bool, data: dict):
+    """Sets the status, content type, and body of a resolution response from the resolution result."""
+    if not result:
+        logger.error('Failed to resolve DID %s', did)
+        logger.debug('Resolution data: %s', Payload(data))
+        rep.status = falcon.HTTP_417
+        rep.media = {'error': f'failed to resolve DID: {did}'}
+        if didding.DID_RES_META_FIELD in data:
+            rep.media[didding.DID_RES_META_FIELD] = data[didding.DID_RES_META_FIELD]
+        elif 'error' in data:
+            rep.media[didding.DID_RES_META_FIELD] = {'error': ErrorNotFound, 'errorMessage': data['error']}
+        return
+
+    logger.info('Successfully resolved %s', did)
+    rep.status = falcon.HTTP_200
+
+    if didding.DD_META_FIELD in data:  # meaning, resolution is a DID resolution result and has metadata
+        # application/did-resolution is expected by the HTTP Binding in the DID Resolution spec and the Universal Resolver
+        rep.set_header('Content-Type', 'application/did-resolution')
+    else:
+        rep.set_header('Content-Type', 'application/did+ld+json')
+    rep.media = data
 
 
 class UniversalResolverResource:
@@ -473,6 +883,7 @@ class UniversalResolverResource:
     """
 
     TimeoutArtifactResolution = 5.0  # seconds to wait for artifact resolution before timing out
+    TimeoutCoalesced = 10.0  # seconds to wait for a concurrent resolution of the same DID before timing out
 
     def __init__(
         self,
@@ -480,6 +891,14 @@ class UniversalResolverResource:
         rgy: credentialing.Regery,
         oobiery: oobiing.Oobiery,
         load_url: Callable = load_url_with_requests,
+        cache: caching.ResolutionCache | None = None,
+        ingestor: ingesting.Ingestor | None = None,
+        keri_resolver: Callable | None = None,
+        flights: coalescing.SingleFlight | None = None,
+        negative: caching.NegativeCache | None = None,
+        breaker: requesting.CircuitBreaker | None = None,
+        digests: caching.DigestCache | None = None,
+        view: caching.DocumentView | None = None,
     ):
         """Create Endpoints for discovery and resolution of OOBIs
 
@@ -488,6 +907,15 @@ class UniversalResolverResource:
             rgy (Regery): Credential and registry data manager
             oobiery (Oobiery): OOBI management environment
             load_url (Callable): HTTP request function to use to load did.json and keri.cesr - simplifies testing
+            cache (ResolutionCache): cache of verified did:webs resolution results, disabled if None
+            ingestor (Ingestor): message processors shared by all resolutions, created per resolution if None
+            keri_resolver (Callable): did:keri resolution function taking (hby, rgy, did, oobi, meta) and taking the
+                keystore lock itself, resolve_did_keri locking with the lock of the ingestor if None
+            flights (SingleFlight): coalesces concurrent resolutions of the same did:webs DID, created if None
+            negative (NegativeCache): cache of failed did:webs resolutions, disabled if None
+            breaker (CircuitBreaker): per host circuit breaker for artifact hosts, disabled if None
+            digests (DigestCache): cache of expected did:webs resolutions and their digests, disabled if None
+            view (DocumentView): materialized DID documents resolutions read from, generated per resolution if None
         """
         self.hby: Habery = hby
         self.rgy = (
@@ -495,6 +923,18 @@ class UniversalResolverResource:
         )
         self.oobiery: Oobiery = oobiery
         self.load_url = load_url  # Function to load URLs, can be mocked for testing
+        self.cache = cache
+        self.ingestor = ingestor
+        self.keri_resolver = (
+            keri_resolver
+            if keri_resolver is not None
+            else functools.partial(resolve_did_keri, view=view, lock=keystore_lock(ingestor))
+        )
+        self.flights = flights if flights is not None else coalescing.SingleFlight()
+        self.negative = negative
+        self.breaker = breaker
+        self.digests = digests
+        self.view = view
 
         super(UniversalResolverResource, self).__init__()
 
@@ -522,91 +962,318 @@ class UniversalResolverResource:
             rep.content_type = 'application/json'
             rep.media = {'message': f'invalid DID: {did}', 'error': str(e)}
             return
-        logger.info(f'Request to resolve did: {did}')
+        logger.info('Request to resolve did: %s', did)
+        oobi, meta = resolution_options(req)
 
-        if 'oobi' in req.params:
-            oobi = req.params['oobi']
-            logger.info(f'From parameters {req.params} got oobi: {oobi}')
-        else:
-            oobi = None
-
-        accepts = req.get_header('Accept')
-        accepts = accepts.lower() if accepts else ''
+        if not supported_did(did):
+            logger.error(f'Failed to resolve invalid DID: {did}')
+            rep.status = falcon.HTTP_400
+            rep.media = {'error': f'invalid DID: {did}'}
+            return
 
-        if 'meta' in req.params:
-            meta = req.params['meta'].lower() in ('true', '1', 'yes')
-            logger.info(f'From parameters {req.params} got meta: {meta}')
-        elif accepts == 'application/did-resolution':
-            meta = True
-            logger.info(f'From accept header Accept got {accepts}')
-        else:
-            meta = False
+        result, data = self.resolve_did(did=did, oobi=oobi, meta=meta)
+        respond_resolution(rep, did, result, data)
 
+    def resolve_did(self, did: str, oobi: str | None = None, meta: bool = False) -> (bool, dict):
+        """Resolve a did:webs or did:keri DID, the DID must be supported as told by supported_did."""
         if did.startswith('did:webs'):
             domain, port, path, aid, query = didding.parse_did_webs(did=did)
             query_vars = didding.parse_query_string(query)
             if 'meta' in query_vars:
                 meta = query_vars['meta']
+            return self.resolve_did_webs(did=did, aid=aid, meta=meta)
+        return self.keri_resolver(self.hby, self.rgy, did, oobi, meta)
+
+    def resolve_did_webs(self, did: str, aid: str, meta: bool) -> (bool, dict):
+        """
+        Resolve a did:webs DID, serving and storing verified results through the resolution cache when enabled.
+        Concurrent resolutions of the same DID are coalesced so only one of them loads and ingests the artifacts.
+        """
+        if self.cache is not None:
+            with keystore_lock(self.ingestor):
+                cached = self.cache.get(self.hby, self.rgy, did, meta)
+            if cached is not None:
+                logger.info('Resolution cache hit for %s', did)
+                return True, cached
+        if self.negative is not None:
+            failed = self.negative.get(did)
+            if failed is not None:
+                logger.info('Negative resolution cache hit for %s', did)
+                return False, failed[1]
+        if self.breaker is not None:
+            host = artifact_host(did)
+            if not self.breaker.allow(host):
+                logger.error(f'Circuit open for {host}, failing resolution of {did}')
+                retry = self.breaker.retry_after(host)
+                return False, failed_resolution(
+                    ErrorHostUnavailable,
+                    f'Artifact host {host} is failing, resolution of {did} not attempted, retry after {retry:.1f} seconds',
+                )
+
+        try:
+            return self.flights.do((did, meta), self.resolve_uncached, did, aid, meta, timeout=self.TimeoutCoalesced)
+        except futures.TimeoutError:
+            logger.error(f'Timed out waiting for concurrent resolution of {did}')
+            return False, {
+                'error': f'Timed out after {self.TimeoutCoalesced} seconds waiting for concurrent resolution of {did}'
+            }
+
+    def resolve_uncached(self, did: str, aid: str, meta: bool) -> (bool, dict):
+        """
+        Resolve a did:webs DID from its artifacts, storing a verified result in the resolution cache and a failed
+        one in the negative cache when enabled. Artifact load failures count against the circuit of the host.
+        """
+        failure = None
+        try:
             result, data = resolve(
-                hby=self.hby, rgy=self.rgy, did=did, meta=meta, load_url=self.load_url, timeout=self.TimeoutArtifactResolution
+                hby=self.hby,
+                rgy=self.rgy,
+                did=did,
+                meta=meta,
+                load_url=self.load_url,
+                timeout=self.TimeoutArtifactResolution,
+                ingestor=self.ingestor,
+                digests=self.digests,
+                view=self.view,
             )
-        elif did.startswith('did:keri'):
-            result, data = resolve_did_keri(self.hby, self.rgy, did, oobi, meta)
+        except (UnknownAID, kering.KeriError) as e:  # keri.cesr parsed yet did not establish the AID
+            logger.error(f'Failed to resolve DID {did}: {e}')
+            result, data, failure = False, failed_resolution(ErrorNotFound, str(e)), caching.FailureUnknownAID
+        except (ValueError, KeyError, TypeError) as e:  # did.json could not be decoded or read
+            logger.error(f'Failed to parse artifacts of DID {did}: {e}')
+            result, data, failure = False, failed_resolution(ErrorInvalidDidDocument, str(e)), caching.FailureParse
         else:
-            logger.error(f'Failed to resolve invalid DID: {did}')
+            if not result and didding.DID_RES_META_FIELD not in data:  # resolve reports load failures with a bare error
+                failure = caching.FailureArtifact
+                data = failed_resolution(ErrorNotFound, data.get('error', f'Failed to load artifacts of DID {did}'))
+
+        if self.breaker is not None:
+            if failure == caching.FailureArtifact:
+                self.breaker.failure(artifact_host(did))
+            else:
+                self.breaker.success(artifact_host(did))
+        if failure is not None and self.negative is not None:
+            self.negative.put(did, failure, data)
+        if result and self.cache is not None:
+            with keystore_lock(self.ingestor):
+                self.cache.put(self.hby, self.rgy, did, meta, aid, data)
+        return result, data
+
+
+def did_aid(did: str) -> str:
+    """AID of a did:webs or did:keri DID, raises ValueError for invalid DIDs."""
+    if did.startswith('did:webs'):
+        return didding.parse_did_webs(did=did)[3]
+    return didding.parse_did_keri(did)[0]
+
+
+class BatchResolverResource:
+    """
+    HTTP Resource resolving many DIDs in one call with POST /1.0/identifiers and a JSON array of DIDs.
+
+    Identical DIDs are resolved once. DIDs sharing an AID are resolved one after another in one task, so the
+    KEL of the AID is ingested by the first resolution and found locally by the others, while DIDs of different
+    AIDs resolve concurrently. Results are streamed back as NDJSON, one {"did", "verified", "result"} line per DID
+    in completion order, so the first answers arrive before the slowest host finishes. DIDs still unresolved
+    when the batch deadline passes are answered with a timeout error.
+
+    Tasks run on the WorkerPool shared with single DID resolutions, so batches count against its size and queue
+    depth. Each batch has at most concurrency tasks in flight and submits the next as one finishes, waiting for
+    room while the pool is full rather than queueing its tasks without bound.
+
+    The response iterator yields empty chunks, which the HIO server skips without writing, while no resolution
+    has completed so the server keeps serving other clients.
+    """
+
+    MaxDids = 256  # DIDs allowed in one batch
+    DefaultConcurrency = 8  # AIDs resolved at once per batch
+    TimeoutBatch = 30.0  # seconds to resolve the whole batch
+
+    def __init__(
+        self,
+        resolver: UniversalResolverResource,
+        pool: working.WorkerPool | None = None,
+        concurrency: int = DefaultConcurrency,
+        timeout: float = TimeoutBatch,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Parameters:
+            resolver (UniversalResolverResource): resolver each DID of a batch is resolved with
+            pool (WorkerPool | None): worker threads shared with single DID resolutions, a pool of concurrency
+                workers for batches alone if None
+            concurrency (int): number of AIDs resolved at once per batch
+            timeout (float): seconds to resolve a whole batch
+            clock (Callable): monotonic time source, injectable for testing
+        """
+        self.resolver = resolver
+        self.pool = pool if pool is not None else working.WorkerPool(size=concurrency, queue_depth=0)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.clock = clock
+
+    def on_post(self, req: falcon.Request, rep: falcon.Response):
+        """
+        Handle POST requests to resolve a JSON array of DIDs.
+
+        Parameters:
+            req (falcon.Request): The HTTP request object.
+            rep (falcon.Response): The HTTP response object.
+        """
+        dids = req.get_media(default_when_empty=None)
+        if not isinstance(dids, list) or not dids or not all(isinstance(did, str) for did in dids):
             rep.status = falcon.HTTP_400
-            rep.media = {'error': f'invalid DID: {did}'}
+            rep.media = {'error': 'invalid batch resolution request body, expected a JSON array of DIDs'}
             return
-
-        if not result:
-            logger.error(f'Failed to resolve DID {did}')
-            logger.debug(f'Resolution data: {data}')
-            rep.status = falcon.HTTP_417
-            rep.media = {'error': f'failed to resolve DID: {did}'}
+        dids = list(dict.fromkeys(dids))  # dedupe keeping request order
+        if len(dids) > self.MaxDids:
+            rep.status = falcon.HTTP_400
+            rep.media = {'error': f'too many DIDs in batch resolution request, at most {self.MaxDids} allowed'}
             return
+        _, meta = resolution_options(req)
+        logger.info(f'Request to resolve {len(dids)} DIDs in batch')
+
+        invalid = []
+        groups = {}  # AID -> DIDs of the AID
+        for did in dids:
+            try:
+                if not supported_did(did):
+                    raise ValueError(f'invalid DID: {did}')
+                groups.setdefault(did_aid(did), []).append(did)
+            except ValueError as e:
+                invalid.append(self.line(did, False, {'error': str(e)}))
 
-        logger.info(f'Successfully resolved {did}')
         rep.status = falcon.HTTP_200
+        rep.content_type = 'application/x-ndjson'
+        rep.stream = self.stream(invalid, list(groups.values()), meta, self.clock() + self.timeout)
 
-        if didding.DD_META_FIELD in data:  # meaning, resolution is a DID resolution result and has metadata
-            # application/did-resolution is expected by the HTTP Binding in the DID Resolution spec and the Universal Resolver
-            rep.set_header('Content-Type', 'application/did-resolution')
-        else:
-            rep.set_header('Content-Type', 'application/did+ld+json')
-        rep.media = data
-        return
-
-
-def resolve_did_keri(hby: habbing.Habery, rgy: credentialing.Regery, did: str, oobi: str = None, meta: bool = False):
+    def resolve_group(self, dids: list[str], meta: bool, results: queue.Queue, cancel: threading.Event):
+        """Resolves the DIDs of one AID in order, reporting each result as soon as it is known, then None."""
+        try:
+            for did in dids:
+                if cancel.is_set():
+                    return
+                try:
+                    result, data = self.resolver.resolve_did(did=did, meta=meta)
+                except Exception as e:
+                    logger.exception(f'Failed to resolve DID {did} in batch')
+                    result, data = False, {'error': f'Unexpected error while resolving DID {did}: {e}'}
+                results.put(self.line(did, result, data))
+        finally:
+            results.put(None)  # the group is done so the batch may submit another
+
+    def stream(self, invalid: list[bytes], groups: list[list[str]], meta: bool, deadline: float):
+        """
+        NDJSON response iterator submitting the groups of DIDs to the pool as room frees up, yielding each result
+        line as it completes and empty chunks while waiting.
+        """
+        yield from invalid
+        results = queue.Queue()
+        cancel = threading.Event()
+        waiting = deque(groups)
+        remaining = sum(len(group) for group in groups)
+        running = 0
+        answered = set()
+        try:
+            while remaining:
+                while waiting and running < self.concurrency:
+                    if self.pool.submit(self.resolve_group, waiting[0], meta, results, cancel) is None:
+                        break  # the pool is full, submitted again once the next chunk is yielded
+                    waiting.popleft()
+                    running += 1
+                try:
+                    line = results.get_nowait()
+                except queue.Empty:
+                    if self.clock() >= deadline:
+                        break
+                    yield b''
+                    continue
+                if line is None:
+                    running -= 1
+                    continue
+                answered.add(json.loads(line)['did'])
+                remaining -= 1
+                yield line
+        finally:
+            cancel.set()  # stops the groups still running when the deadline passes or the client goes away
+        for group in groups:
+            for did in group:
+                if did not in answered:
+                    yield self.line(did, False, {'error': f'Timed out after {self.timeout} seconds resolving DID {did}'})
+
+    @staticmethod
+    def line(did: str, verified: bool, result: dict) -> bytes:
+        return json.dumps({'did': did, 'verified': verified, 'result': result}).encode('utf-8') + b'\n'
+
+
+def resolve_did_keri(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    did: str,
+    oobi: str | None = None,
+    meta: bool = False,
+    view: caching.DocumentView | None = None,
+    timeout: float = 30.0,
+    tock: float = 0.03125,
+    lock=None,
+):
     """
     Performs a did:keri DID document resolution based on the KEL retrieved from an OOBI resolution.
 
+    The OOBI is resolved by stepping an Oobiery and sleeping between steps until the OOBI is resolved or the
+    timeout passes. The keystore lock is held for each step rather than while waiting on the OOBI host.
+
     Parameters:
         hby (Habery): identifier database environment
         rgy (Regery): Credential and registry data manager
         did (str): The did:keri DID to resolve.
         oobi (str): OOBI to use for resolution, if None then the AID must be known in the KERI database.
         meta (bool): Whether to include metadata in the DID document.
+        view (DocumentView | None): materialized DID documents to read from, generated per call if None
+        timeout (float): seconds to wait for the OOBI to resolve
+        tock (float): seconds slept between steps of the Oobiery
+        lock: lock serializing keystore access, see keystore_lock, none if None
     Returns:
         tuple(bool, dict): (verified, resolution) where verified is a boolean indicating verification status
     """
+    lock = lock if lock is not None else contextlib.nullcontext()
     aid, query = didding.parse_did_keri(did)
-    if oobi is None and hby.kevers.get(aid) is None:
-        return False, {'error': f'Unknown AID, cannot resolve DID {did}'}
-    if hby.kevers.get(aid) is not None:  # return early if AID is known
-        return True, didding.generate_did_doc(hby, rgy, did=did, aid=aid, meta=meta)
-    oobiery = oobiing.Oobiery(hby=hby)
-    doist = doing.Doist(limit=10.0, tock=0.03125, real=True)
-    deeds = doist.enter(oobiery.doers)
-
-    # Add OOBI record to Baser.oobis so it will be resolved
+    generate = view.document if view is not None else didding.generate_did_doc
+    with lock:
+        known = aid in hby.kevers  # reads key state stored by another process through, unlike kevers.get
+        if oobi is None and not known:
+            return False, {'error': f'Unknown AID, cannot resolve DID {did}'}
+        if known:  # return early if AID is known
+            return True, generate(hby, rgy, did=did, aid=aid, meta=meta)
+        oobiery = oobiing.Oobiery(hby=hby)
+        doist = doing.Doist(limit=timeout, tock=tock, real=True)
+        deeds = doist.enter(oobiery.doers)
+        queue_oobi(hby, aid, oobi)
+
+    def step() -> bool:
+        with lock:
+            doist.recur(deeds)
+            hby.kvy.processEscrows()  # for delegated AIDs so authorizing event seals (AES) from delegator ixn evts are found
+            return oobi_resolved(hby, aid, oobi)
+
+    deadline = time.monotonic() + timeout
+    while not step():
+        if time.monotonic() > deadline:
+            return False, {'error': f'Timed out resolving OOBI {oobi} for DID {did}'}
+        time.sleep(tock)
+    with lock:
+        if view is not None:
+            view.oobis.add(hby, oobi)
+        return True, generate(hby, rgy, did=did, aid=aid, meta=meta)
+
+
+def queue_oobi(hby: habbing.Habery, aid: str, oobi: str):
+    """Add OOBI record to Baser.oobis so it will be resolved by an Oobiery"""
     obr = basing.OobiRecord(date=helping.nowIso8601())
     obr.cid = aid
     hby.db.oobis.pin(keys=(oobi,), val=obr)
-    while (
-        hby.db.roobi.get(keys=(oobi,)) is None or aid not in hby.kevers
-    ):  # wait for aid in hby.kevers waits for delegates to have their AES found
-        doist.recur(deeds)
-        hby.kvy.processEscrows()  # for delegated AIDs so authorizing event seals (AES) from delegator ixn evts are found
 
-    return True, didding.generate_did_doc(hby, rgy, did=did, aid=aid, meta=meta)
+
+def oobi_resolved(hby: habbing.Habery, aid: str, oobi: str) -> bool:
+    """True once the OOBI is resolved and the AID is in kevers, which waits for delegates to have their AES found"""
+    return hby.db.roobi.get(keys=(oobi,)) is not None and aid in hby.kevers
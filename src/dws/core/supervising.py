@@ -0,0 +1,520 @@
+"""
+dws.core.supervising module
+
+Multi-process resolver deployment. A Supervisor starts one writer process and a number of worker processes
+that all open the same keystore. Worker processes share the listening port through SO_REUSEPORT, so the
+kernel spreads connections across them, and serve cache hits and keystore reads concurrently on their own
+cores. LMDB has a single writer anyway, so every KEL, TEL, and OOBI ingestion is sent over a local IPC queue
+to the writer process, which also runs the background escrow sweeps. Only streams with key events a worker
+does not already have locally are sent to the writer.
+"""
+
+import itertools
+import multiprocessing
+import queue
+import socket
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent import futures
+
+from hio.base import doing
+from hio.core import http, tcp
+from keri import kering
+from keri.app import directing, habbing, oobiing
+from keri.vdr import credentialing
+
+from dws import log_name, ogler
+from dws.core import caching, didding, escrowing, habs, ingesting, requesting, resolving, working
+
+logger = ogler.getLogger(log_name)
+
+JobIngest = 'ingest'  # parse a keri.cesr stream into the keystore
+JobOobi = 'oobi'  # resolve an OOBI into the keystore
+
+
+def reuse_port_supported() -> bool:
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+class ReusePortAcceptor:
+    """Mixin for hio tcp servers opening their listen socket with SO_REUSEPORT so processes share a port."""
+
+    def open(self):
+        """Opens and binds the listen socket in non blocking mode with SO_REUSEADDR and SO_REUSEPORT set."""
+        self.ss = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        bs = 2 * self.bs if sys.platform.startswith('linux') else self.bs  # Linux TCP allocates twice the requested size
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) < bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.bs)
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.bs)
+        self.ss.setblocking(0)
+        try:
+            self.ss.bind(self.ha)
+            self.ss.listen(self.bl)
+        except OSError as ex:
+            self.close()
+            logger.error(f'Error binding shared server listen socket: {ex}')
+            return False
+        self.ha = self.ss.getsockname()
+        self.opened = True
+        return True
+
+
+class ReusePortServer(ReusePortAcceptor, tcp.Server):
+    """Non blocking TCP server sharing its port with the other worker processes."""
+
+
+class ReusePortServerTls(ReusePortAcceptor, tcp.ServerTls):
+    """Non blocking TLS server sharing its port with the other worker processes."""
+
+
+def shared_port_server(
+    app, http_port: int, keypath: str | None = None, certpath: str | None = None, cafilepath: str | None = None
+) -> http.Server:
+    """HIO HTTP server for a worker process listening on a port shared with the other worker processes."""
+    if keypath is not None:
+        servant = ReusePortServerTls(
+            certify=False, keypath=keypath, certpath=certpath, cafilepath=cafilepath, host='', port=int(http_port)
+        )
+    else:
+        servant = ReusePortServer(host='', port=int(http_port))
+    return http.Server(port=int(http_port), app=app, servant=servant)
+
+
+class WriterDoer(doing.Doer):
+    """
+    Doer of the writer process applying the ingestion and OOBI jobs sent by worker processes to the keystore.
+
+    Jobs are (worker, job_id, kind, payload) tuples read from the shared requests queue. Each job is answered
+    with a (job_id, ok, error) tuple on the replies queue of the worker that sent it. Ingestion jobs are
+    answered once the stream is parsed. OOBI jobs are answered once the OOBI is resolved by the Oobiery of the
+    writer process or its resolution times out.
+    """
+
+    DefaultTock = 0.0  # check for jobs on every pass of the Doist
+    MaxJobs = 64  # jobs taken from the queue per pass so OOBI and escrow processing keep running
+    OobiTimeout = 30.0  # seconds to wait for an OOBI to resolve
+
+    def __init__(
+        self,
+        hby: habbing.Habery,
+        ingestor: ingesting.Ingestor,
+        requests,
+        replies: list,
+        oobi_timeout: float = OobiTimeout,
+        tock: float = DefaultTock,
+        clock: Callable[[], float] = time.monotonic,
+        **kwa,
+    ):
+        """
+        Parameters:
+            hby (Habery): identifier database environment of the writer process
+            ingestor (Ingestor): message processors the keri.cesr streams are ingested with
+            requests (Queue): jobs sent by all worker processes
+            replies (list[Queue]): reply queue of each worker process by worker index
+            oobi_timeout (float): seconds to wait for an OOBI to resolve before failing its job
+            tock (float): seconds between checks for jobs
+            clock (Callable): monotonic time source, injectable for testing
+        """
+        self.hby = hby
+        self.ingestor = ingestor
+        self.requests = requests
+        self.replies = replies
+        self.oobi_timeout = oobi_timeout
+        self.clock = clock
+        self.oobis = {}  # (worker, job_id) -> (aid, oobi, deadline) of OOBI jobs in progress
+        super().__init__(tock=tock, **kwa)
+
+    def recur(self, tyme=None):
+        for _ in range(self.MaxJobs):
+            try:
+                job = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            self.handle(*job)
+        self.check_oobis()
+        return False  # the writer runs for the life of the process
+
+    def handle(self, worker: int, job_id: int, kind: str, payload: dict):
+        try:
+            if kind == JobIngest:
+                with self.ingestor.lock:
+                    self.ingestor.ingest(ims=payload['ims'], aid=payload['aid'])
+                    self.ingestor.settle(ims=payload['ims'])
+                self.reply(worker, job_id, True)
+            elif kind == JobOobi:
+                if payload['aid'] in self.hby.kevers:
+                    self.reply(worker, job_id, True)
+                    return
+                resolving.queue_oobi(self.hby, payload['aid'], payload['oobi'])
+                self.oobis[(worker, job_id)] = (payload['aid'], payload['oobi'], self.clock() + self.oobi_timeout)
+            else:
+                self.reply(worker, job_id, False, f'unknown job kind {kind}')
+        except Exception as ex:
+            logger.exception(f'Writer failed {kind} job {job_id} of worker {worker}')
+            self.reply(worker, job_id, False, str(ex))
+
+    def check_oobis(self):
+        if not self.oobis:
+            return
+        self.hby.kvy.processEscrows()  # for delegated AIDs so authorizing event seals (AES) from delegator ixn evts are found
+        now = self.clock()
+        for (worker, job_id), (aid, oobi, deadline) in list(self.oobis.items()):
+            if resolving.oobi_resolved(self.hby, aid, oobi):
+                del self.oobis[(worker, job_id)]
+                self.reply(worker, job_id, True)
+            elif now >= deadline:
+                del self.oobis[(worker, job_id)]
+                self.reply(worker, job_id, False, f'Timed out resolving OOBI {oobi}')
+
+    def reply(self, worker: int, job_id: int, ok: bool, error: str | None = None):
+        self.replies[worker].put((job_id, ok, error))
+
+
+class WriterClient:
+    """
+    Sends jobs to the writer process and waits for their replies. Shared by all threads of a worker process,
+    a reader thread hands each reply on the worker reply queue to the thread waiting for it.
+    """
+
+    DefaultTimeout = 60.0  # seconds to wait for the writer to answer a job
+
+    def __init__(self, worker: int, requests, replies, timeout: float = DefaultTimeout):
+        """
+        Parameters:
+            worker (int): index of this worker process
+            requests (Queue): jobs queue read by the writer process
+            replies (Queue): reply queue of this worker process
+            timeout (float): seconds to wait for the writer to answer a job
+        """
+        self.worker = worker
+        self.requests = requests
+        self.replies = replies
+        self.timeout = timeout
+        self.jobs = itertools.count()
+        self.pending: dict[int, futures.Future] = {}
+        self.lock = threading.Lock()
+        self.reader = threading.Thread(target=self.read, name=f'dws-writer-client-{worker}', daemon=True)
+        self.reader.start()
+
+    def submit(self, kind: str, **payload):
+        """Sends a job to the writer and waits for it to be applied, raising KeriError when it fails."""
+        future = futures.Future()
+        with self.lock:
+            job_id = next(self.jobs)
+            self.pending[job_id] = future
+        self.requests.put((self.worker, job_id, kind, payload))
+        try:
+            ok, error = future.result(timeout=self.timeout)
+        except futures.TimeoutError:
+            with self.lock:
+                self.pending.pop(job_id, None)
+            raise kering.KeriError(f'Timed out after {self.timeout} seconds waiting for the writer to apply {kind} job')
+        if not ok:
+            raise kering.KeriError(f'Writer failed to apply {kind} job: {error}')
+
+    def read(self):
+        while True:
+            reply = self.replies.get()
+            if reply is None:
+                return
+            job_id, ok, error = reply
+            with self.lock:
+                future = self.pending.pop(job_id, None)
+            if future is not None:
+                future.set_result((ok, error))
+
+    def close(self):
+        self.replies.put(None)
+        self.reader.join(timeout=1.0)
+
+
+class RemoteIngestor:
+    """
+    Ingestor stand in for worker processes sending the unseen part of each keri.cesr stream, and any OOBI to
+    resolve, to the writer process. Once the writer applied a job the in memory key state of the AID and the
+    states of the registries it issues from are dropped so they are read through from the keystore the writer
+    updated.
+
+    Key events of an AID stored by the writer for another worker are already stored as far as unseen_tail is
+    concerned, so the in memory key state is also dropped whenever it is behind the key state in the keystore.
+    """
+
+    def __init__(
+        self,
+        hby: habbing.Habery,
+        rgy: credentialing.Regery,
+        writer: WriterClient,
+        view: caching.DocumentView | None = None,
+    ):
+        """
+        Parameters:
+            hby (Habery): identifier database environment of the worker process
+            rgy (Regery): credential and registry data manager of the worker process
+            writer (WriterClient): client of the writer process
+            view (DocumentView | None): materialized DID documents did:keri resolutions read from, generated if None
+        """
+        self.hby = hby
+        self.rgy = rgy
+        self.writer = writer
+        self.view = view
+        self.lock = threading.RLock()  # serializes keystore access of the threads of this worker process
+        self.background = True  # escrows are swept by the writer process
+        self.streams = ingesting.IngestedStreams()
+
+    def ingest(self, ims: bytes, aid: str | None = None, incremental: bool = True):
+        if incremental:
+            ims = ingesting.unseen_tail(self.hby, ims)
+        if ims:
+            self.writer.submit(JobIngest, ims=bytes(ims), aid=aid)
+            self.refresh(aid)
+        elif self.stale(aid):
+            self.refresh(aid)
+
+    def settle(self, ims: bytes):
+        """Escrows are processed by the writer process when it applies the ingestion."""
+
+    def stale(self, aid: str | None) -> bool:
+        """True when the key state of the AID in memory differs from the key state the writer stored."""
+        kever = dict.get(self.hby.kevers, aid)  # the in memory key state, without reading through to the keystore
+        if kever is None:
+            return False
+        ksr = self.hby.db.states.get(keys=aid)
+        return ksr is not None and ksr.d != kever.serder.said
+
+    def refresh(self, aid: str | None):
+        """
+        Drops the in memory key state of the AID and the states of the registries it issues from, or of every
+        registry when the AID of the stream is not known. Popped rather than deleted, deleting from the Reger
+        tevers also removes the stored registry state.
+        """
+        tevers = self.rgy.reger.tevers
+        if aid is None:
+            tevers.clear()
+            return
+        self.hby.kevers.pop(aid, None)
+        for regk in [regk for regk, tever in tevers.items() if tever.pre == aid]:
+            tevers.pop(regk, None)
+
+    def resolve_did_keri(
+        self, hby: habbing.Habery, rgy: credentialing.Regery, did: str, oobi: str | None = None, meta: bool = False
+    ):
+        """did:keri resolution for UniversalResolverResource sending OOBIs of unknown AIDs to the writer process"""
+        aid, _ = didding.parse_did_keri(did)
+        with self.lock:
+            known = aid in hby.kevers
+        if oobi is not None and not known:
+            try:
+                self.writer.submit(JobOobi, aid=aid, oobi=oobi)  # waits on the writer without holding the keystore lock
+            except kering.KeriError as ex:
+                return False, {'error': str(ex)}
+            with self.lock:
+                self.refresh(aid)
+        return resolving.resolve_did_keri(hby, rgy, did, None, meta, view=self.view, lock=self.lock)
+
+
+def setup_worker(
+    hby: habbing.Habery,
+    rgy: credentialing.Regery,
+    writer: WriterClient,
+    http_port: int,
+    static_files_dir: str | None = None,
+    did_path: str | None = None,
+    keypath: str | None = None,
+    certpath: str | None = None,
+    cafilepath: str | None = None,
+    cache_size: int = caching.ResolutionCache.DefaultSize,
+    cache_ttl: float = caching.ResolutionCache.DefaultTTL,
+    scheme_policy: str = requesting.SchemeMemory.HttpsPreferred,
+    http_hosts: list[str] | None = None,
+    workers: int = working.WorkerPool.DefaultSize,
+    queue_depth: int = working.WorkerPool.DefaultQueueDepth,
+    negative_ttls: dict | None = None,
+    breaker_threshold: int = requesting.CircuitBreaker.DefaultThreshold,
+    breaker_backoff: float = requesting.CircuitBreaker.DefaultBackoff,
+    max_did_json_size: int = requesting.DidJsonMaxSize,
+    max_keri_cesr_size: int = requesting.KeriCesrMaxSize,
+    artifact_cache_bytes: int = requesting.ArtifactCache.DefaultMaxBytes,
+) -> list[doing.Doer]:
+    """
+    Set up the resolver HTTP server of a worker process like resolving.setup_resolver, listening on the shared
+    port and ingesting through the writer process. Parameters are those of resolving.setup_resolver.
+    """
+    app = resolving.falcon_app()
+    pool = working.WorkerPool(size=workers, queue_depth=queue_depth) if workers > 0 else None
+    wsgi = working.OffloopApp(app, pool=pool) if pool is not None else app
+    server = shared_port_server(wsgi, http_port=http_port, keypath=keypath, certpath=certpath, cafilepath=cafilepath)
+
+    view = caching.DocumentView(size=cache_size)
+    ingestor = RemoteIngestor(hby=hby, rgy=rgy, writer=writer, view=view)
+    resolving.load_ends(
+        app,
+        hby=hby,
+        rgy=rgy,
+        oobiery=None,
+        static_files_dir=static_files_dir,
+        did_path=did_path,
+        cache=caching.ResolutionCache(size=cache_size, ttl=cache_ttl, aliases=view.aliases) if cache_size > 0 else None,
+        digests=caching.DigestCache(size=cache_size),
+        view=view,
+        ingestor=ingestor,
+        schemes=requesting.SchemeMemory(policy=scheme_policy, http_hosts=http_hosts),
+        pool=pool,
+        keri_resolver=ingestor.resolve_did_keri,
+        negative=caching.NegativeCache(ttls=negative_ttls),
+        breaker=requesting.CircuitBreaker(threshold=breaker_threshold, backoff=breaker_backoff)
+        if breaker_threshold > 0
+        else None,
+        limits=requesting.SizeLimits(did_json=max_did_json_size, keri_cesr=max_keri_cesr_size),
+        artifact_cache_bytes=artifact_cache_bytes,
+    )
+    return [http.ServerDoer(server=server)]
+
+
+def open_keystore(options: dict) -> (habbing.Habery, habbing.HaberyDoer, credentialing.Regery):
+    cf = habs.get_habery_configer(
+        name=options.get('config_file'), base=options['base'], head_dir_path=options.get('config_dir')
+    )
+    hby, hby_doer = habs.get_habery_and_doer(options['name'], options['base'], options.get('bran'), cf)
+    rgy = credentialing.Regery(hby=hby, name=hby.name, base=hby.base, temp=hby.temp)
+    return hby, hby_doer, rgy
+
+
+def run_writer(options: dict, requests, replies: list, ready):
+    """Entry point of the writer process, the only process ingesting into the keystore."""
+    hby, hby_doer, rgy = open_keystore(options)
+    oobiery = oobiing.Oobiery(hby=hby)
+    ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+    escrower = escrowing.Escrower(
+        ingestor=ingestor,
+        tock=options.get('escrow_tock', escrowing.Escrower.DefaultTock),
+        budget=options.get('escrow_budget', escrowing.Escrower.DefaultBudget),
+    )
+    writer = WriterDoer(hby=hby, ingestor=ingestor, requests=requests, replies=replies)
+    ready.set()
+    logger.info(f'Resolver writer process ready for {len(replies)} workers')
+    directing.runController(doers=[hby_doer, *oobiery.doers, escrower, writer], expire=0.0)
+
+
+def run_worker(worker: int, options: dict, requests, replies):
+    """Entry point of a worker process serving resolutions on the shared port."""
+    hby, hby_doer, rgy = open_keystore(options)
+    client = WriterClient(worker=worker, requests=requests, replies=replies)
+    doers = setup_worker(
+        hby,
+        rgy,
+        client,
+        http_port=options['http_port'],
+        static_files_dir=options.get('static_files_dir'),
+        did_path=options.get('did_path'),
+        keypath=options.get('keypath'),
+        certpath=options.get('certpath'),
+        cafilepath=options.get('cafilepath'),
+        cache_size=options.get('cache_size', caching.ResolutionCache.DefaultSize),
+        cache_ttl=options.get('cache_ttl', caching.ResolutionCache.DefaultTTL),
+        scheme_policy=options.get('scheme_policy', requesting.SchemeMemory.HttpsPreferred),
+        http_hosts=options.get('http_hosts'),
+        workers=options.get('workers', working.WorkerPool.DefaultSize),
+        queue_depth=options.get('queue_depth', working.WorkerPool.DefaultQueueDepth),
+        negative_ttls=options.get('negative_ttls'),
+        breaker_threshold=options.get('breaker_threshold', requesting.CircuitBreaker.DefaultThreshold),
+        breaker_backoff=options.get('breaker_backoff', requesting.CircuitBreaker.DefaultBackoff),
+        max_did_json_size=options.get('max_did_json_size', requesting.DidJsonMaxSize),
+        max_keri_cesr_size=options.get('max_keri_cesr_size', requesting.KeriCesrMaxSize),
+        artifact_cache_bytes=options.get('artifact_cache_bytes', requesting.ArtifactCache.DefaultMaxBytes),
+    )
+    logger.info(f'Resolver worker process {worker} serving on port {options["http_port"]}')
+    directing.runController(doers=[hby_doer, *doers], expire=0.0)
+
+
+class Supervisor(doing.Doer):
+    """
+    Doer starting the writer process and the worker processes of the multi-process resolver and restarting
+    worker processes that exit. The writer is started first and must open the keystore before any worker
+    does so the keystore is only ever created by a single process. When the writer exits every process is stopped.
+
+    Processes are started with the spawn method so no LMDB environment is inherited across a fork.
+    """
+
+    DefaultTock = 1.0  # seconds between checks of the supervised processes
+    ReadyTimeout = 30.0  # seconds to wait for the writer process to open the keystore
+
+    def __init__(
+        self,
+        processes: int,
+        options: dict,
+        tock: float = DefaultTock,
+        run_writer: Callable = run_writer,
+        run_worker: Callable = run_worker,
+        **kwa,
+    ):
+        """
+        Parameters:
+            processes (int): number of worker processes serving resolutions
+            options (dict): keystore and resolver options of the processes, the keyword arguments of
+                setup_worker and the name, base, bran, config_file, config_dir, escrow_tock, and escrow_budget
+            tock (float): seconds between checks of the supervised processes
+            run_writer (Callable): writer process entry point, injectable for testing
+            run_worker (Callable): worker process entry point, injectable for testing
+        """
+        if not reuse_port_supported():
+            raise ValueError('Multi-process resolver mode needs SO_REUSEPORT, which this platform does not support')
+        self.processes = processes
+        self.options = options
+        self.run_writer = run_writer
+        self.run_worker = run_worker
+        self.ctx = multiprocessing.get_context('spawn')
+        self.requests = None
+        self.replies = []
+        self.writer = None
+        self.workers: list[multiprocessing.Process | None] = []
+        self.restarts = 0
+        super().__init__(tock=tock, **kwa)
+
+    def enter(self):
+        self.requests = self.ctx.Queue()
+        self.replies = [self.ctx.Queue() for _ in range(self.processes)]
+        ready = self.ctx.Event()
+        self.writer = self.ctx.Process(
+            target=self.run_writer, args=(self.options, self.requests, self.replies, ready), name='dws-writer'
+        )
+        self.writer.start()
+        if not ready.wait(self.ReadyTimeout):
+            self.stop()
+            raise kering.KeriError(f'Resolver writer process not ready after {self.ReadyTimeout} seconds')
+        self.workers = [self.start_worker(i) for i in range(self.processes)]
+
+    def start_worker(self, worker: int) -> multiprocessing.Process:
+        process = self.ctx.Process(
+            target=self.run_worker,
+            args=(worker, self.options, self.requests, self.replies[worker]),
+            name=f'dws-worker-{worker}',
+        )
+        process.start()
+        return process
+
+    def recur(self, tyme=None):
+        if not self.writer.is_alive():
+            logger.error(f'Resolver writer process exited with {self.writer.exitcode}, stopping workers')
+            return True
+        for i, process in enumerate(self.workers):
+            if not process.is_alive():
+                logger.error(f'Resolver worker process {i} exited with {process.exitcode}, restarting it')
+                self.workers[i] = self.start_worker(i)
+                self.restarts += 1
+        return False
+
+    def exit(self):
+        self.stop()
+
+    def stop(self):
+        for process in [*self.workers, self.writer]:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in [*self.workers, self.writer]:
+            if process is not None:
+                process.join(timeout=5.0)
@@ -8,7 +8,7 @@ import falcon
 from keri.app import habbing
 from keri.vdr import credentialing
 
-from dws.core import ends
+from dws.core import caching, ends
 
 
 def load_endpoints(
@@ -25,5 +25,7 @@ def load_endpoints(
     """
     app.add_route('/health', ends.HealthEnd())
     did_webs_path = '' if not did_path else f'/{did_path}'
-    app.add_route(f'{did_webs_path}/{{aid}}/did.json', ends.DIDWebsResourceEnd(hby, rgy, meta=meta))
+    app.add_route(
+        f'{did_webs_path}/{{aid}}/did.json', ends.DIDWebsResourceEnd(hby, rgy, meta=meta, view=caching.DocumentView())
+    )
     app.add_route(f'{did_webs_path}/{{aid}}/keri.cesr', ends.KeriCesrResourceEnd(hby, rgy))
@@ -0,0 +1,141 @@
+"""
+dws.core.working module
+
+Off-loop worker pool so slow resolutions do not stall the single threaded HIO HTTP server.
+"""
+
+import json
+import threading
+from collections.abc import Callable, Iterable
+from concurrent import futures
+
+from dws import log_name, ogler
+
+logger = ogler.getLogger(log_name)
+
+
+class WorkerPool:
+    """
+    Bounded pool of worker threads. At most size tasks run at once and at most queue_depth more wait for a
+    worker. Submissions beyond that are rejected rather than queued without bound.
+    """
+
+    DefaultSize = 8  # worker threads
+    DefaultQueueDepth = 64  # tasks waiting for a worker before submissions are rejected
+
+    def __init__(self, size: int = DefaultSize, queue_depth: int = DefaultQueueDepth):
+        """
+        Parameters:
+            size (int): number of worker threads
+            queue_depth (int): number of tasks allowed to wait for a free worker
+        """
+        self.size = size
+        self.queue_depth = queue_depth
+        self.executor = futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix='dws-worker')
+        self.slots = threading.BoundedSemaphore(size + queue_depth)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn: Callable, *args, **kwa) -> futures.Future | None:
+        """Schedules fn on a worker and returns its Future, or None when the pool and its queue are full."""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+        with self.lock:
+            self.in_flight += 1
+        future = self.executor.submit(fn, *args, **kwa)
+        future.add_done_callback(self.release)
+        return future
+
+    def release(self, future: futures.Future):
+        with self.lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self.slots.release()
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {
+                'size': self.size,
+                'queue_depth': self.queue_depth,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class OffloopApp:
+    """
+    WSGI middleware running the requests for the offloaded path prefixes on a WorkerPool.
+
+    The wrapped app is called on a worker thread and its whole response is buffered there. Meanwhile the
+    HIO server gets a response iterator that yields empty chunks, which HIO skips without writing, until the
+    worker finishes. HIO services that iterator on every pass of its ServerDoer, so the Doer completes the
+    response as soon as it is ready while other clients keep being served. When the pool is full the request
+    is answered at once with 503 Service Unavailable. Requests for other paths, like /health and the batch
+    resolution endpoint which streams its results without blocking, run inline.
+    """
+
+    def __init__(self, app: Callable, pool: WorkerPool, prefixes: Iterable[str] = ('/1.0/identifiers/',)):
+        """
+        Parameters:
+            app (Callable): WSGI app to wrap, usually the resolver falcon.App
+            pool (WorkerPool): worker threads the offloaded requests run on
+            prefixes (Iterable[str]): path prefixes of the requests to run on the pool
+        """
+        self.app = app
+        self.pool = pool
+        self.prefixes = tuple(prefixes)
+
+    def __call__(self, environ: dict, start_response: Callable):
+        if not environ.get('PATH_INFO', '').startswith(self.prefixes):
+            return self.app(environ, start_response)
+        future = self.pool.submit(self.run, environ)
+        if future is None:
+            logger.error(f'Worker pool full, rejecting request for {environ.get("PATH_INFO")}')
+            body = json.dumps({'error': 'resolver busy, retry later'}).encode('utf-8')
+            start_response(
+                '503 Service Unavailable',
+                [('Content-Type', 'application/json'), ('Content-Length', str(len(body))), ('Retry-After', '1')],
+            )
+            return [body]
+        return self.respond(future, start_response)
+
+    def run(self, environ: dict) -> (str, list, bytes):
+        """Calls the wrapped app on a worker thread and returns its status, headers, and buffered body."""
+        response = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = list(headers)
+            return chunks.append
+
+        result = self.app(environ, start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], b''.join(chunks)
+
+    @staticmethod
+    def respond(future: futures.Future, start_response: Callable):
+        """Response iterator yielding empty chunks until the worker is done, then the buffered response."""
+        while not future.done():
+            yield b''
+        try:
+            status, headers, body = future.result()
+        except Exception:
+            logger.exception('Worker failed to handle request')
+            body = json.dumps({'error': 'internal resolver error'}).encode('utf-8')
+            status = '500 Internal Server Error'
+            headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))]
+        start_response(status, headers)
+        yield body
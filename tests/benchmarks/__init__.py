@@ -0,0 +1,5 @@
+"""
+Benchmarks of the resolver hot paths, run as modules from the repository root, for example
+
+    python -m tests.benchmarks.bench_logging
+"""
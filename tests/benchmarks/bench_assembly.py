@@ -0,0 +1,95 @@
+"""
+Scaling benchmark of DID document assembly from 1 to 1000 keys and endpoints. Compares service endpoint
+assembly by nested reduce with list concatenation against appending to one list, and verification methods
+that parse the DID once per key against parsing it once per document. Time per key or endpoint should stay
+flat as the count grows when assembly is linear.
+"""
+
+import functools
+import timeit
+from base64 import urlsafe_b64encode
+from functools import reduce
+
+from hio.help.hicting import Mict
+from keri.core import signing
+
+from dws.core import didding
+
+AID = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+DID = f'did:webs:example.com%3A7676:dws:{AID}?meta=true'
+COUNTS = (1, 10, 100, 1000)
+
+
+def role_urls(count: int) -> Mict:
+    """Role URLs of count endpoints, half witnesses and half mailboxes, as returned by Hab.fetchRoleUrls."""
+    ends = Mict()
+    for role in ('witness', 'mailbox'):
+        eids = Mict()
+        for i in range(count // 2 if role == 'mailbox' else count - count // 2):
+            eids.add(f'B{role[0]}{i:042d}', Mict([('http', f'http://{role}{i}.example.com:5642')]))
+        ends.add(role, eids)
+    return ends
+
+
+def verfers(count: int) -> list:
+    return [signer.verfer for signer in signing.Salter(raw=b'0123456789abcdef').signers(count=count, temp=True)]
+
+
+def reduce_ends(ends):
+    """add_ends before it was linear, concatenating lists at each level of the reduction."""
+
+    def process_role(role):
+        return reduce(lambda rs, eids: rs + process_eids(eids, role), ends.getall(role), [])
+
+    def process_eids(eids, role):
+        return reduce(lambda es, eid: es + process_eid(eid, eids[eid], role), eids, [])
+
+    def process_eid(eid, val, role):
+        return [{'id': f'#{eid}/{role}', 'type': role, 'serviceEndpoint': {proto: f'{host}' for proto, host in val.items()}}]
+
+    return reduce(lambda emit, role: emit + process_role(role), ends, [])
+
+
+def per_key_vms(keys, did, aid):
+    """generate_verification_methods before the controller was hoisted, parsing the DID for every key."""
+    vms = []
+    for verfer in keys:
+        kid = verfer.qb64
+        x = urlsafe_b64encode(verfer.raw).rstrip(b'=').decode('utf-8')
+        vms.append(didding.generate_json_web_key_vm(kid, did, kid, x))
+    if len(keys) > 1:
+        vms.append(didding.generate_threshold_proof2022(aid, did, len(keys), [vm['id'] for vm in vms]))
+    return vms
+
+
+def measure(label: str, fn, number: int, per: int = 1):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f'{label:<48} {seconds * 1e6:12.1f} us {seconds * 1e6 / per:10.2f} us/item')
+    return seconds
+
+
+def main():
+    for count in COUNTS:
+        ends = role_urls(count)
+        assert reduce_ends(ends) == didding.add_ends(ends)
+        number = max(1, 2000 // count)
+        before = measure(f'reduce service endpoints ({count})', functools.partial(reduce_ends, ends), number, count)
+        after = measure(f'add_ends ({count})', functools.partial(didding.add_ends, ends), number, count)
+        print(f'{"speedup":<48} {before / after:12.1f} x')
+
+    for count in COUNTS:
+        keys = verfers(count)
+        assert per_key_vms(keys, DID, AID) == didding.generate_verification_methods(keys, count, DID, AID)
+        number = max(1, 2000 // count)
+        before = measure(f'per key DID parsing ({count})', functools.partial(per_key_vms, keys, DID, AID), number, count)
+        after = measure(
+            f'generate_verification_methods ({count})',
+            functools.partial(didding.generate_verification_methods, keys, count, DID, AID),
+            number,
+            count,
+        )
+        print(f'{"speedup":<48} {before / after:12.1f} x')
+
+
+if __name__ == '__main__':
+    main()
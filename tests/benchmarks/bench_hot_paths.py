@@ -0,0 +1,282 @@
+"""
+Benchmark suite of the resolution and generation hot paths: parse_did_webs, generate_did_doc with and without
+metadata, gen_keri_cesr, save_cesr, compare_did_docs and diff_dicts, and end to end resolving.resolve with a
+load_url serving the controller's artifacts from memory.
+
+Each benchmark runs against controllers built in process for cases varying KEL length, witness count, key count
+and the number of designated alias ACDCs. By default each dimension is swept from a baseline of one event, no
+witnesses, one key and no aliases, and --grid runs every combination instead. Results print as a table and are
+written with --json for comparing releases, for example
+
+    python -m tests.benchmarks.bench_hot_paths --kel 10,100,1000 --json before.json
+"""
+
+import argparse
+import copy
+import datetime
+import functools
+import itertools
+import json
+import logging
+import platform
+import timeit
+from typing import NamedTuple
+
+import keri
+from hio.base import doing
+from keri.app import grouping, habbing
+from keri.core import coring, eventing, scheming, serdering
+from keri.vdr import credentialing, verifying
+
+import dws
+from dws import log_name, ogler
+from dws.core import artifacting, caching, didding, ingesting, parsing, resolving
+from dws.core.ends.keri_cesr_resource_end import gen_keri_cesr
+from tests import conftest
+
+logger = ogler.getLogger(log_name)
+
+CTLR_SALT = b'0ACB-gtnUTQModt9u_UC3LFQ'
+WITS_SALT = b'0AAB_Fidf5WeZf6VFc53IxVw'
+RESOLVER_SALT = b'0AAl3nvsqKGyKHp2Hz9wLy9t'
+REGISTRY_NONCE = '0ADV24br-aaezyRTB-oUsZJE'
+BASELINE = {'kel': 1, 'witnesses': 0, 'keys': 1, 'aliases': 0}
+
+
+class Case(NamedTuple):
+    kel: int  # key events wanted, at least those issuing the aliases and adding the witnesses
+    witnesses: int
+    keys: int
+    aliases: int  # designated alias ACDCs issued by the controller
+
+
+class Controller(NamedTuple):
+    hby: habbing.Habery
+    rgy: credentialing.Regery
+    hab: habbing.Hab
+    did: str
+    did_json: bytes
+    keri_cesr: bytes
+
+
+def cases(args) -> list[Case]:
+    """The grid of every combination of the dimensions, or each dimension swept from the baseline."""
+    dims = {name: getattr(args, name) for name in BASELINE}
+    if args.grid:
+        return [Case(*values) for values in itertools.product(*dims.values())]
+    swept = [Case(**BASELINE)]
+    for name, values in dims.items():
+        swept.extend(Case(**{**BASELINE, name: value}) for value in values if Case(**{**BASELINE, name: value}) not in swept)
+    return swept
+
+
+def load_schema(hby: habbing.Habery):
+    """Caches the designated aliases schema, as resolving its OOBI would."""
+    schema = conftest.Schema.designated_aliases_schema()
+    schemer = scheming.Schemer(raw=json.dumps(schema).encode(), typ=scheming.JSONSchema(), code=coring.MtrDex.Blake3_256)
+    scheming.CacheResolver(db=hby.db).add(schemer.said, schemer.raw)
+
+
+def issue_aliases(hby: habbing.Habery, rgy: credentialing.Regery, hab: habbing.Hab, count: int):
+    """Issues count designated alias ACDCs from a single registry, anchoring each issuance in the KEL."""
+    counselor = grouping.Counselor(hby=hby)
+    registrar = credentialing.Registrar(hby=hby, rgy=rgy, counselor=counselor)
+    verifier = verifying.Verifier(hby=hby, reger=rgy.reger)
+    credentialer = credentialing.Credentialer(hby=hby, rgy=rgy, registrar=registrar, verifier=verifier)
+    doist = doing.Doist(limit=1.0, tock=0.03125, real=True)
+    deeds = doist.enter(
+        doers=[habbing.HaberyDoer(habery=hby), counselor, registrar, credentialer, credentialing.RegeryDoer(rgy=rgy)]
+    )
+
+    load_schema(hby)
+    registry = rgy.makeRegistry(prefix=hab.pre, name=hab.name, noBackers=True, nonce=REGISTRY_NONCE)
+    seal = eventing.SealEvent(registry.regk, '0', registry.regd)._asdict()
+    registrar.incept(iserder=registry.vcp, anc=serdering.SerderKERI(raw=bytes(hab.interact(data=[seal]))))
+    while not registrar.complete(pre=registry.regk, sn=0):
+        doist.recur(deeds=deeds)
+
+    for i in range(count):
+        creder = credentialer.create(
+            regname=registry.name,
+            recp=None,
+            schema=didding.DES_ALIASES_SCHEMA,
+            source=None,
+            rules=conftest.Schema.designated_aliases_rules(),
+            data=conftest.self_attested_aliases_cred_subj(f'alias{i}.example.com', hab.pre, None, 'dws'),
+            private=False,
+        )
+        iss = registry.issue(said=creder.said, dt=creder.attrib['dt'])
+        seal = eventing.SealEvent(iss.pre, '0', iss.said)._asdict()
+        anc = serdering.SerderKERI(raw=bytes(hab.interact(data=[seal])))
+        credentialer.issue(creder, iss)
+        registrar.issue(creder, iss, anc)
+        while not credentialer.complete(said=creder.said):
+            doist.recur(deeds=deeds)
+            verifier.processEscrows()
+            rgy.processEscrows()
+
+
+def add_witnesses(hby: habbing.Habery, hab: habbing.Hab, wits_hby: habbing.Habery, count: int) -> list[habbing.Hab]:
+    """Rotates witnesses in and stores their location schemes, as if learned from their OOBIs."""
+    wits = [wits_hby.makeHab(name=f'wit{i}', transferable=False) for i in range(count)]
+    hab.rotate(adds=[wit.pre for wit in wits], toad=count)
+    msgs = bytearray()
+    for i, wit in enumerate(wits):
+        msgs.extend(wit.makeLocScheme(url=f'http://wit{i}.example.com:5642', scheme='http'))
+        msgs.extend(wit.makeEndRole(eid=wit.pre, role='controller'))
+    hby.psr.parse(ims=msgs)
+    return wits
+
+
+def receipt(hby: habbing.Habery, hab: habbing.Hab, wits_hby: habbing.Habery, wits: list[habbing.Hab]):
+    """Has every witness receipt every event of the KEL so resolvers accept the witnessed events."""
+    wits_hby.psr.parse(ims=bytearray(artifacting.gen_kel_cesr(hab, hab.pre)), local=True)
+    rcts = bytearray()
+    for msg in hby.db.clonePreIter(pre=hab.pre):
+        serder = serdering.SerderKERI(raw=bytes(msg))
+        for wit in wits:
+            if wit.pre in hby.kevers[hab.pre].wits:
+                rcts.extend(wit.witness(serder))
+    hby.psr.parse(ims=rcts)
+
+
+def controller(hby: habbing.Habery, wits_hby: habbing.Habery, case: Case) -> Controller:
+    hab = hby.makeHab(name='controller', icount=case.keys, ncount=case.keys)
+    rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+    if case.aliases:
+        issue_aliases(hby, rgy, hab, case.aliases)
+    wits = add_witnesses(hby, hab, wits_hby, case.witnesses) if case.witnesses else []
+    while hab.kever.sn + 1 < case.kel:
+        hab.interact()
+    if wits:
+        receipt(hby, hab, wits_hby, wits)
+    did = f'did:webs:example.com:dws:{hab.pre}'
+    doc = didding.generate_did_doc(hby, rgy, did=did, aid=hab.pre)
+    did_json = json.dumps(didding.to_did_web(copy.deepcopy(doc))).encode()
+    return Controller(hby, rgy, hab, did, did_json, bytes(gen_keri_cesr(hab, rgy.reger, hab.pre)))
+
+
+def loader(ctlr: Controller):
+    def load_url(url, timeout=None):
+        return ctlr.did_json if url.endswith('did.json') else ctlr.keri_cesr
+
+    return load_url
+
+
+def differing(doc: dict) -> dict:
+    """The document with its first verification method key and last service changed."""
+    other = copy.deepcopy(doc)
+    other['verificationMethod'][0]['publicKeyJwk']['x'] = 'A' * 43
+    if other['service']:
+        other['service'][-1]['serviceEndpoint'] = {'http': 'http://changed.example.com'}
+    return other
+
+
+def measure(label: str, fn, repeat: int) -> tuple[float, int]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(number=number, repeat=repeat)) / number
+    print(f'{label:<40} {seconds * 1e6:14.1f} us')
+    return seconds, number
+
+
+def bench_case(case: Case, repeat: int) -> list[dict]:
+    results = []
+    with (
+        habbing.openHby(name='controller', salt=CTLR_SALT, temp=True) as hby,
+        habbing.openHby(name='witnesses', salt=WITS_SALT, temp=True) as wits_hby,
+    ):
+        ctlr = controller(hby, wits_hby, case)
+        events = ctlr.hab.kever.sn + 1
+        print(f'{case} with {events} events, {len(ctlr.keri_cesr)} bytes of keri.cesr')
+
+        def record(name: str, fn):
+            seconds, number = measure(name, fn, repeat)
+            results.append(dict(name=name, **case._asdict(), events=events, number=number, seconds=seconds))
+
+        doc = didding.generate_did_doc(ctlr.hby, ctlr.rgy, did=ctlr.did, aid=ctlr.hab.pre)
+        other = differing(doc)
+        record('parse_did_webs', functools.partial(parsing.parse_did_webs.__wrapped__, ctlr.did))
+        record('parse_did_webs memoized', functools.partial(parsing.parse_did_webs, ctlr.did))
+        generate = functools.partial(didding.generate_did_doc, ctlr.hby, ctlr.rgy, did=ctlr.did, aid=ctlr.hab.pre)
+        record('generate_did_doc', generate)
+        record(
+            'generate_did_doc meta',
+            functools.partial(generate, meta=True),
+        )
+        record('gen_keri_cesr', functools.partial(gen_keri_cesr, ctlr.hab, ctlr.rgy.reger, ctlr.hab.pre))
+        record('compare_did_docs equal', lambda doc=doc: resolving.compare_did_docs(doc, copy.deepcopy(doc)))
+        record('compare_did_docs differing', functools.partial(resolving.compare_did_docs, doc, other))
+        record('diff_dicts differing', functools.partial(resolving.diff_dicts, doc, other))
+
+        with habbing.openHby(name='resolver', salt=RESOLVER_SALT, temp=True) as rhby:
+            load_schema(rhby)
+            rgy = credentialing.Regery(hby=rhby, name='resolver', temp=True)
+            ingestor = ingesting.Ingestor(hby=rhby, rgy=rgy)
+            start = timeit.default_timer()
+            verified, resolution = resolving.resolve(rhby, rgy, ctlr.did, load_url=loader(ctlr), ingestor=ingestor)
+            seconds = timeit.default_timer() - start
+            assert verified, resolution
+            print(f'{"resolve cold":<40} {seconds * 1e6:14.1f} us')
+            results.append(dict(name='resolve cold', **case._asdict(), events=events, number=1, seconds=seconds))
+
+            resolve = functools.partial(resolving.resolve, rhby, rgy, ctlr.did, load_url=loader(ctlr), ingestor=ingestor)
+            record('resolve', resolve)
+            digests, view = caching.DigestCache(), caching.DocumentView()
+            record(
+                'resolve with digests and view',
+                functools.partial(resolve, digests=digests, view=view),
+            )
+            record(
+                'save_cesr incremental',
+                functools.partial(resolving.save_cesr, rhby, rgy, ctlr.keri_cesr, aid=ctlr.hab.pre, ingestor=ingestor),
+            )
+            record(
+                'save_cesr full',
+                functools.partial(
+                    resolving.save_cesr, rhby, rgy, ctlr.keri_cesr, aid=ctlr.hab.pre, incremental=False, ingestor=ingestor
+                ),
+            )
+            rgy.close()
+        ctlr.rgy.close()
+    return results
+
+
+def counts(text: str) -> list[int]:
+    return [int(value) for value in text.split(',') if value]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0], formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--kel', type=counts, default=[10, 100], help='KEL lengths, comma separated')
+    parser.add_argument('--witnesses', type=counts, default=[1, 3, 7], help='witness counts, comma separated')
+    parser.add_argument('--keys', type=counts, default=[3, 10], help='key counts, comma separated')
+    parser.add_argument('--aliases', type=counts, default=[1, 5], help='designated alias ACDC counts, comma separated')
+    parser.add_argument('--grid', action='store_true', help='run every combination instead of sweeping each dimension')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions, the fastest is reported')
+    parser.add_argument('--json', help='path to write the results to as JSON')
+    args = parser.parse_args()
+
+    level = logger.level
+    logger.setLevel(logging.CRITICAL + 1)  # resolution and diff errors are expected, only their cost is measured
+    try:
+        results = [result for case in cases(args) for result in bench_case(case, args.repeat)]
+    finally:
+        logger.setLevel(level)
+
+    if args.json:
+        report = {
+            'created': datetime.datetime.now(datetime.UTC).isoformat(),
+            'dws': dws.__version__,
+            'keri': keri.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Wrote {len(results)} results to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
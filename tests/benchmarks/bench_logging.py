@@ -0,0 +1,83 @@
+"""
+Benchmark of hot path logging with the log level above DEBUG, as in production. Compares eagerly formatted
+f-string log messages that decode or serialize the whole payload against lazy %s arguments wrapped in Payload,
+for a keri.cesr sized byte payload, a DID document, and verification of a DID document with differences.
+"""
+
+import json
+import logging
+import timeit
+
+from dws import log_name, ogler
+from dws.app.logs import Payload
+from dws.core import resolving
+
+logger = ogler.getLogger(log_name)
+
+
+def did_doc(keys: int, seed: str = 'a') -> dict:
+    return {
+        'id': 'did:webs:example.com:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4',
+        'verificationMethod': [
+            {
+                'id': f'#key{i}',
+                'type': 'JsonWebKey',
+                'controller': 'did:webs:example.com',
+                'publicKeyJwk': {'x': f'{seed}{i}' * 8},
+            }
+            for i in range(keys)
+        ],
+        'service': [
+            {'id': f'#svc{i}', 'type': 'DIDWebs', 'serviceEndpoint': {'http': f'http://{seed}{i}.example.com'}}
+            for i in range(keys)
+        ],
+    }
+
+
+def eager(kc_res: bytes, doc: dict):
+    logger.debug(f'Got KERI CESR: {kc_res.decode("utf-8")}')
+    logger.info(f'did:keri Resolution result: {json.dumps(doc, indent=2)}' if logger.isEnabledFor(logging.DEBUG) else '')
+
+
+def lazy(kc_res: bytes, doc: dict):
+    logger.debug('Got KERI CESR: %s', Payload(kc_res))
+    logger.debug('did:keri Resolution result: %s', Payload(doc))
+
+
+def eager_diff(expected, actual, path=''):
+    """The diff_dicts logging pattern before lazy formatting, logging both documents at ERROR on every recursion."""
+    logger.error(f'Comparing dictionaries:\nexpected:\n{expected}\n \nand\n \nactual:\n{actual}')
+    for k in expected:
+        current_path = f'{path}.{k}' if path else k
+        logger.error(f'Comparing key {current_path}')
+        if isinstance(expected[k], dict) and isinstance(actual[k], dict):
+            eager_diff(expected[k], actual[k], current_path)
+        elif expected[k] != actual[k]:
+            logger.error(f'Different values for key {current_path}: {expected[k]} (expected) vs. {actual[k]} (actual)')
+
+
+def measure(label: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f'{label:<48} {seconds * 1e6:12.1f} us')
+    return seconds
+
+
+def main():
+    level = logger.level
+    logger.setLevel(logging.CRITICAL + 1)  # nothing is emitted, only the cost of building messages is measured
+    try:
+        kc_res = b'{"v":"KERI10JSON0000fd_","t":"ixn"}-VAB' * 50_000  # about 2 MB
+        doc = did_doc(keys=200)
+        other = did_doc(keys=200, seed='b')
+        before = measure('eager payload logging', lambda: eager(kc_res, doc), number=20)
+        after = measure('lazy payload logging', lambda: lazy(kc_res, doc), number=20)
+        print(f'{"speedup":<48} {before / after:12.1f} x')
+        before = measure('eager diff logging', lambda: eager_diff(doc, other), number=5)
+        after = measure('compare_did_docs with lazy logging', lambda: resolving.compare_did_docs(doc, other), number=5)
+        print(f'{"speedup":<48} {before / after:12.1f} x')
+    finally:
+        logger.setLevel(level)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark of DID parsing. Compares the regular expression and Prefixer parsing of did:webs DIDs against the single
+pass parser of dws.core.parsing, with and without its memoized results, then parses crafted DIDs of growing length
+whose lazy path group makes the regular expression backtrack over every colon.
+"""
+
+import functools
+import timeit
+
+from keri.core import coring
+
+from dws.core import didding, parsing
+
+AID = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+DIDS = [
+    f'did:webs:example.com:{AID}',
+    f'did:webs:example.com%3A8443:my:path:components:{AID}?meta=true',
+]
+
+
+def regex_parse(did: str):
+    """parse_did_webs before the single pass parser."""
+    match = didding.DID_WEBS_RE.match(did)
+    if match is None:
+        raise ValueError(f'{did} is not a valid did:web(s) DID')
+    domain, port, path, aid, query = match.group('domain', 'port', 'path', 'aid', 'query')
+    coring.Prefixer(qb64=aid)
+    return domain, port, path, aid, query
+
+
+def single_pass_parse(did: str):
+    parsing.check_length(did)
+    matched = parsing.match_did_webs(did)
+    parsing.check_aid(matched[3])
+    return matched
+
+
+def measure(label: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f'{label:<48} {seconds * 1e6:12.1f} us')
+    return seconds
+
+
+def main():
+    for did in DIDS:
+        assert regex_parse(did) == single_pass_parse(did) == parsing.parse_did_webs(did)
+        print(did)
+        before = measure('regex and Prefixer', functools.partial(regex_parse, did), number=20_000)
+        after = measure('single pass', functools.partial(single_pass_parse, did), number=20_000)
+        cached = measure('single pass memoized', functools.partial(parsing.parse_did_webs, did), number=20_000)
+        print(f'{"speedup, uncached and memoized":<48} {before / after:12.1f} x {before / cached:8.1f} x')
+
+    for count in (100, 200, 400, 800):
+        did = f'did:webs:a{":a?" * count}\n'  # every colon ends a candidate path whose query runs into the newline
+        print(f'crafted DID of {len(did)} characters')
+        before = measure('regex', functools.partial(didding.DID_WEBS_RE.match, did), number=10)
+        after = measure('single pass', functools.partial(parsing.match_did_webs, did), number=10)
+        print(f'{"speedup":<48} {before / after:12.1f} x')
+
+
+if __name__ == '__main__':
+    main()
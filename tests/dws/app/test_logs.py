@@ -46,3 +46,28 @@ def test_truncated_formatter():
                 sinfo=None,
             )
         )
+
+
+def test_payload_renders_lazily_and_truncates():
+    from dws.app import logs
+    from dws.app.logs import Payload
+
+    class Unrendered:
+        def __str__(self):
+            raise AssertionError('rendered while the level is disabled')
+
+    import logging
+
+    logger = logging.getLogger('test_payload')
+    logger.setLevel(logging.INFO)
+    logger.debug('payload: %s', Payload(Unrendered()))
+
+    assert str(Payload(b'abc')) == 'abc'
+    assert str(Payload(b'x' * 10, limit=4)) == 'xxxx... (6 more bytes)'
+    assert str(Payload({'id': 'did:webs:example.com:abc'}, limit=8)) == '{"id": "... (26 more characters)'
+    try:
+        logs.set_payload_dump(True)
+        assert str(Payload(b'x' * 10, limit=4)) == 'x' * 10
+        assert str(Payload({'a': 1}, limit=4)) == '{\n  "a": 1\n}'
+    finally:
+        logs.set_payload_dump(False)
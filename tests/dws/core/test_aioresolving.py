@@ -0,0 +1,188 @@
+import asyncio
+import http.server
+import threading
+from unittest.mock import patch
+
+import falcon
+import pytest
+from falcon import testing
+from keri.app import habbing
+from keri.vdr import credentialing
+
+from dws import ArtifactResolveError, ArtifactTooLargeError
+from dws.core import aioresolving, escrowing, ingesting, requesting
+
+
+class ArtifactHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves an artifact with a Content-Length body, or chunked under /chunked, 404 under /missing, and a redirect
+    to the artifact under /moved, or back to itself under /loop.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith(('/moved', '/loop')):
+            self.send_response(301)
+            self.send_header('Location', '/dws/did.json' if self.path.startswith('/moved') else self.path)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path.startswith('/chunked'):
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in (b'chunked ', b'artifact'):
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            body = b'artifact'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ArtifactHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_load_url_reads_length_and_chunked_bodies(local_server):
+    status, headers, body = asyncio.run(aioresolving.http_get(f'http://{local_server}/keri.cesr'))
+    assert status == 200
+    assert headers['content-length'] == '8'
+    assert body == b'artifact'
+
+    status, _, body = asyncio.run(aioresolving.http_get(f'http://{local_server}/chunked'))
+    assert status == 200
+    assert body == b'chunked artifact'
+
+    # HTTPS fails against the plain HTTP server so the load falls back to HTTP
+    assert asyncio.run(aioresolving.load_url(f'https://{local_server}/did.json', timeout=2.0)) == b'artifact'
+    assert asyncio.run(aioresolving.load_url(f'http://{local_server}/missing', timeout=2.0)) == b''
+
+    # bodies over the limit are aborted without falling back to another scheme
+    limits = requesting.SizeLimits(did_json=4)
+    with pytest.raises(ArtifactTooLargeError, match='of 8 bytes exceeds the 4 bytes allowed'):
+        asyncio.run(aioresolving.load_url(f'http://{local_server}/did.json', timeout=2.0, limits=limits))
+    with pytest.raises(ArtifactTooLargeError, match='exceeds the 4 bytes allowed'):
+        asyncio.run(aioresolving.http_get(f'http://{local_server}/chunked', max_size=4))
+
+
+def test_load_url_follows_redirects(local_server):
+    status, _, body = asyncio.run(aioresolving.http_get(f'http://{local_server}/moved/did.json'))
+    assert (status, body) == (200, b'artifact')
+    assert asyncio.run(aioresolving.load_url(f'http://{local_server}/moved/did.json', timeout=2.0)) == b'artifact'
+
+    with pytest.raises(ArtifactResolveError, match='Exceeded 3 redirects'):
+        asyncio.run(aioresolving.http_get(f'http://{local_server}/loop', max_redirects=3))
+
+
+def test_get_dws_artifacts_leaves_the_http_fallback_its_timeout():
+    async def http_get(url, timeout=5.0, **kwa):
+        if url.startswith('https'):
+            await asyncio.sleep(timeout)
+            raise TimeoutError()
+        await asyncio.sleep(0.05)
+        return 200, {}, b'{}'
+
+    did = 'did:webs:example.com:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+    # keri.cesr is served as plain bytes here rather than framed as a CESR stream
+    with patch.object(aioresolving, 'http_get', http_get), patch.object(requesting, 'artifact_name', return_value='did.json'):
+        _, dd_res, kc_res = asyncio.run(aioresolving.get_dws_artifacts(did, load_url=aioresolving.load_url, timeout=0.2))
+    assert dd_res == kc_res == b'{}'
+
+
+def test_load_url_raises_when_no_scheme_connects():
+    with pytest.raises(ArtifactResolveError, match='Failed to load HTTP URL'):
+        asyncio.run(aioresolving.load_url('http://127.0.0.1:1/did.json', timeout=1.0))
+
+
+def test_get_dws_artifacts_times_out_and_cancels_fetches():
+    cancelled = []
+
+    async def hanging_load_url(url, timeout=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+
+    did = 'did:webs:example.com:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+    with pytest.raises(ArtifactResolveError, match='Timed out after 0.2 seconds'):
+        asyncio.run(aioresolving.get_dws_artifacts(did, load_url=hanging_load_url, timeout=0.1))
+    assert len(cancelled) == 2
+
+
+def test_asgi_app_resolves_did_webs_without_blocking_the_loop():
+    did = 'did:webs:example.com:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+    started = threading.Event()
+
+    def verify_artifacts(**kwa):
+        started.set()
+        assert kwa['dd_res'] == b'did.json' and kwa['kc_res'] == b'keri.cesr'
+        return True, {'didDocument': {'id': kwa['did']}, 'didResolutionMetadata': {}, 'didDocumentMetadata': {}}
+
+    async def fake_load_url(url, timeout=None):
+        await asyncio.sleep(0.01)
+        return b'did.json' if url.endswith('did.json') else b'keri.cesr'
+
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        app = aioresolving.asgi_app(hby, rgy, cache_size=0)
+        assert isinstance(app, falcon.asgi.App)
+        client = testing.TestClient(app=app)
+        rep = client.simulate_get('/health')
+        assert rep.status == falcon.HTTP_200
+        rep = client.simulate_get('/metrics')
+        assert rep.json['escrows']['sizes']['ooes'] == 0
+
+        resource = aioresolving.UniversalResolverResource(hby=hby, rgy=rgy, load_url=fake_load_url)
+        app.add_route('/test/identifiers/{did}', resource)
+        with patch('dws.core.resolving.verify_artifacts', side_effect=verify_artifacts):
+            rep = client.simulate_get(f'/test/identifiers/{did}')
+        assert started.is_set()
+        assert rep.status == falcon.HTTP_200
+        assert rep.json['didDocument']['id'] == did
+
+        rep = client.simulate_get('/test/identifiers/did:example:abc')
+        assert rep.status == falcon.HTTP_400
+        assert rep.json['error'] == 'invalid DID: did:example:abc'
+
+        # did:keri DIDs of unknown AIDs without an OOBI are not resolvable
+        rep = client.simulate_get('/test/identifiers/did:keri:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4')
+        assert rep.status == falcon.HTTP_417
+        assert rep.json['error'] == 'failed to resolve DID: did:keri:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+
+        # known AIDs resolve from the local keystore
+        rep = client.simulate_get(f'/test/identifiers/did:keri:{hab.pre}')
+        assert rep.status == falcon.HTTP_200
+        assert rep.json['id'] == f'did:keri:{hab.pre}'
+
+
+def test_escrow_lifespan_sweeps_until_shutdown():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        escrower = escrowing.Escrower(ingestor=ingesting.Ingestor(hby=hby, rgy=rgy), tock=0.01)
+        lifespan = aioresolving.EscrowLifespan(escrower)
+
+        async def run():
+            await lifespan.process_startup(None, None)
+            await asyncio.sleep(0.1)
+            await lifespan.process_shutdown(None, None)
+
+        asyncio.run(run())
+        assert escrower.metrics()['ticks'] >= 2
+        assert lifespan.task.cancelled()
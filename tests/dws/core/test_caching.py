@@ -0,0 +1,243 @@
+import copy
+import json
+import urllib.parse
+from unittest.mock import patch
+
+import falcon
+import pytest
+from falcon import testing
+from keri.app import habbing
+from keri.db import basing
+from keri.vdr import credentialing
+from mockito import mock
+
+from dws import UnknownAID
+from dws.core import caching, didding, diffing, oobiing, resolving
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_resolution_cache_hit_miss_and_kel_change_invalidates():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        did = f'did:webs:127.0.0.1%3A7677:dws:{hab.pre}'
+        cache = caching.ResolutionCache(size=10, ttl=60.0)
+
+        assert cache.get(hby, rgy, did, False) is None
+        cache.put(hby, rgy, did, False, hab.pre, {'id': did})
+        assert cache.get(hby, rgy, did, False) == {'id': did}
+        assert cache.get(hby, rgy, did, True) is None, 'meta flag is part of the cache key'
+        assert cache.hits == 1
+        assert cache.misses == 2
+
+        # returned values are copies so callers may not corrupt the cache
+        cached = cache.get(hby, rgy, did, False)
+        cached['id'] = 'changed'
+        assert cache.get(hby, rgy, did, False) == {'id': did}
+
+        assert caching.kel_tip(hby, hab.pre) == (0, hab.pre)
+        hab.interact()
+        assert caching.kel_tip(hby, hab.pre) == (1, hab.kever.serder.said)
+        assert cache.get(hby, rgy, did, False) is None, 'new key event invalidates cached result'
+        assert len(cache) == 0
+
+        assert caching.kel_tip(hby, 'EEdpe-yqftH2_FO1-luoHvaiShK4y_E2dInrRQ2_2X5v') is None
+        cache.put(hby, rgy, did, False, 'EEdpe-yqftH2_FO1-luoHvaiShK4y_E2dInrRQ2_2X5v', {})
+        assert len(cache) == 0, 'results for unknown AIDs are not cached'
+
+
+def test_resolution_cache_ttl_lru_and_invalidate():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        clock = FakeClock()
+        cache = caching.ResolutionCache(size=2, ttl=10.0, clock=clock)
+
+        cache.put(hby, rgy, 'did:a', False, hab.pre, {'id': 'a'})
+        clock.now = 9.0
+        assert cache.get(hby, rgy, 'did:a', False) == {'id': 'a'}
+        clock.now = 11.0
+        assert cache.get(hby, rgy, 'did:a', False) is None, 'hits do not extend the TTL of an entry'
+
+        cache.put(hby, rgy, 'did:a', False, hab.pre, {'id': 'a'})
+        cache.put(hby, rgy, 'did:b', False, hab.pre, {'id': 'b'})
+        assert cache.get(hby, rgy, 'did:a', False) == {'id': 'a'}  # a is now most recently used
+        cache.put(hby, rgy, 'did:c', False, hab.pre, {'id': 'c'})
+        assert cache.get(hby, rgy, 'did:b', False) is None, 'least recently used entry evicted'
+        assert cache.get(hby, rgy, 'did:a', False) == {'id': 'a'}
+        assert cache.get(hby, rgy, 'did:c', False) == {'id': 'c'}
+
+        cache.invalidate(hab.pre)
+        assert len(cache) == 0
+
+        disabled = caching.ResolutionCache(size=0)
+        disabled.put(hby, rgy, 'did:a', False, hab.pre, {'id': 'a'})
+        assert len(disabled) == 0
+
+
+def test_universal_resolver_resource_serves_cached_resolution():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        did = f'did:webs:127.0.0.1%3A7677:dws:{hab.pre}'
+        cache = caching.ResolutionCache()
+        resolver = resolving.UniversalResolverResource(hby=hby, rgy=rgy, oobiery=mock(), load_url=mock(), cache=cache)
+        app = resolving.falcon_app()
+        app.add_route('/1.0/identifiers/{did}', resolver)
+        client = testing.TestClient(app=app)
+        with patch('dws.core.resolving.resolve') as mock_resolve:
+            mock_resolve.return_value = True, {'id': did}
+            for _ in range(3):
+                rep = client.simulate_get(f'/1.0/identifiers/{urllib.parse.quote(did)}')
+                assert rep.status == falcon.HTTP_200
+                assert rep.json == {'id': did}
+            assert mock_resolve.call_count == 1, 'repeat resolutions are served from the cache'
+
+            mock_resolve.return_value = False, {'error': 'failed'}
+            other = f'did:webs:example.com:{hab.pre}'
+            for _ in range(2):
+                rep = client.simulate_get(f'/1.0/identifiers/{urllib.parse.quote(other)}')
+                assert rep.status == falcon.HTTP_417
+            assert mock_resolve.call_count == 3, 'failed resolutions are not cached'
+
+
+def test_negative_cache_ttl_per_failure_class():
+    clock = FakeClock()
+    cache = caching.NegativeCache(ttls={caching.FailureParse: 0.0}, size=2, clock=clock)
+    assert cache.ttls[caching.FailureArtifact] == caching.NegativeCache.DefaultTTLs[caching.FailureArtifact]
+
+    cache.put('did:a', caching.FailureArtifact, {'error': 'a'})
+    cache.put('did:b', caching.FailureParse, {'error': 'b'})
+    assert cache.get('did:a') == (caching.FailureArtifact, {'error': 'a'})
+    assert cache.get('did:b') is None, 'failure classes with a TTL of 0 are not cached'
+
+    cache.put('did:c', caching.FailureUnknownAID, {'error': 'c'})
+    cache.put('did:d', caching.FailureUnknownAID, {'error': 'd'})
+    assert cache.get('did:a') is None, 'least recently stored failure evicted'
+    assert cache.hits == 1
+
+    clock.now = caching.NegativeCache.DefaultTTLs[caching.FailureUnknownAID]
+    assert cache.get('did:c') is None, 'expired failures are retried'
+    cache.invalidate()
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError, match='Unknown failure classes timeout'):
+        caching.NegativeCache(ttls={'timeout': 1.0})
+
+
+def test_digest_cache_verifies_unchanged_did_json_by_its_bytes():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        did = f'did:webs:127.0.0.1%3A7677:dws:{hab.pre}'
+        did_doc = didding.generate_did_doc(hby, rgy, did=did, aid=hab.pre)
+        dd_res = json.dumps(didding.to_did_web(copy.deepcopy(did_doc))).encode()
+        digests = caching.DigestCache(size=10)
+
+        def verify(dd_res, meta=False):
+            return resolving.verify_artifacts(
+                hby=hby, rgy=rgy, did=did, aid=hab.pre, dd_res=dd_res, kc_res=b'', meta=meta, digests=digests
+            )
+
+        with (
+            patch('dws.core.resolving.save_cesr'),
+            patch('dws.core.resolving.get_generated_did_doc', wraps=resolving.get_generated_did_doc) as generated,
+            patch('dws.core.didding.from_did_web', wraps=didding.from_did_web) as parsed,
+        ):
+            assert verify(dd_res) == (True, did_doc)
+            assert verify(dd_res) == (True, did_doc)
+            assert generated.call_count == 1 and parsed.call_count == 1, 'unchanged did.json is only hashed'
+            assert digests.metrics() == {'size': 1, 'hits': 1, 'misses': 1}
+
+            # a reformatted did.json verifies against the cached digest without regenerating the DID document
+            reordered = json.dumps(json.loads(dd_res), indent=2, sort_keys=True).encode()
+            assert verify(reordered) == (True, did_doc)
+            assert generated.call_count == 1 and parsed.call_count == 2
+
+            tampered = json.loads(dd_res)
+            tampered['alsoKnownAs'] = ['did:web:evil.com']
+            verified, resolution = verify(json.dumps(tampered).encode())
+            assert not verified
+            assert resolution['didResolutionMetadata']['differences']
+
+            ok, resolution = verify(dd_res, meta=True)
+            assert ok
+            digest = resolution['didResolutionMetadata']['didDocumentDigest']
+            assert digest == diffing.digest(did_doc)
+            assert verify(dd_res, meta=True)[1]['didResolutionMetadata']['didDocumentDigest'] == digest
+
+            hab.interact()
+            assert verify(dd_res) == (True, did_doc)
+            assert generated.call_count == 3, 'new key event invalidates the expected DID document'
+
+
+def test_document_view_regenerates_documents_on_key_and_endpoint_changes():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        did = f'did:webs:127.0.0.1%3A7677:dws:{hab.pre}'
+        view = caching.DocumentView(size=10)
+
+        with patch('dws.core.didding.generate_did_doc', wraps=didding.generate_did_doc) as generated:
+            doc = view.document(hby, rgy, did, hab.pre)
+            assert doc == didding.generate_did_doc(hby, rgy, did=did, aid=hab.pre)
+            generated.reset_mock()
+
+            doc['id'] = 'changed'
+            assert view.document(hby, rgy, did, hab.pre)['id'] == did, 'documents are copies'
+            resolution = view.document(hby, rgy, did, hab.pre, meta=True)
+            assert view.document(hby, rgy, did, hab.pre, meta=True) == resolution
+            assert generated.call_count == 1, 'meta flag is part of the view key'
+            assert view.metrics() == {'size': 2, 'hits': 2, 'misses': 2}
+
+            hab.interact()
+            assert view.document(hby, rgy, did, hab.pre)['id'] == did
+            assert generated.call_count == 2, 'new key event regenerates the document'
+
+            eid = 'BPwwr5VkI1b7ZA2mVbzhLL47UPjsGBX4WeO6WRv6c7H-'
+            hby.db.ends.pin(keys=(hab.pre, 'mailbox', eid), val=basing.EndpointRecord(allowed=True))
+            hby.db.locs.pin(keys=(eid, 'http'), val=basing.LocationRecord(url='http://127.0.0.1:5642/'))
+            doc = view.document(hby, rgy, did, hab.pre)
+            assert generated.call_count == 3, 'new end role regenerates the document'
+            assert doc['service'][0]['serviceEndpoint'] == {'http': 'http://127.0.0.1:5642/'}
+
+            view.invalidate('EEdpe-yqftH2_FO1-luoHvaiShK4y_E2dInrRQ2_2X5v')
+            assert len(view) == 2
+            view.invalidate(hab.pre)
+            assert len(view) == 0
+
+        unknown = 'EEdpe-yqftH2_FO1-luoHvaiShK4y_E2dInrRQ2_2X5v'
+        with pytest.raises(UnknownAID):
+            view.document(hby, rgy, f'did:webs:127.0.0.1%3A7677:dws:{unknown}', unknown)
+
+
+def test_document_view_regenerates_delegated_documents_once_the_delegator_oobi_resolves():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        did = f'did:webs:127.0.0.1%3A7677:dws:{hab.pre}'
+        delegator = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+        hab.delpre = delegator
+        view = caching.DocumentView(size=10)
+
+        def delegation_service(hby, pre, delpre, oobis=None):  # stands in for finding the delegating event seal
+            oobi = oobiing.get_resolved_oobi(hby, pre=delpre, oobis=oobis)
+            return [] if oobi is None else [{'id': pre, 'type': 'DelegatorOOBI', 'serviceEndpoint': oobi}]
+
+        with patch('dws.core.didding.gen_delegation_service', side_effect=delegation_service):
+            assert view.document(hby, rgy, did, hab.pre)['service'] == []
+            assert view.document(hby, rgy, did, hab.pre)['service'] == [], 'served from the view'
+
+            oobi = f'http://127.0.0.1:5642/oobi/{delegator}'
+            hby.db.roobi.pin(keys=(oobi,), val=basing.OobiRecord(cid=delegator))
+            assert view.document(hby, rgy, did, hab.pre)['service'] == [
+                {'id': hab.pre, 'type': 'DelegatorOOBI', 'serviceEndpoint': oobi}
+            ], 'resolving the delegator OOBI regenerates the document'
+            assert view.metrics() == {'size': 1, 'hits': 1, 'misses': 2}
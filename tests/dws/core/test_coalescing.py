@@ -0,0 +1,61 @@
+import threading
+from concurrent import futures
+
+import pytest
+
+from dws.core import coalescing
+
+
+def test_single_flight_shares_leader_result_with_followers():
+    flights = coalescing.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        started.set()
+        release.wait(2.0)
+        return value * 2
+
+    with futures.ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flights.do, 'did', work, 21)
+        assert started.wait(2.0)
+        followers = [executor.submit(flights.do, 'did', work, 99, timeout=2.0) for _ in range(3)]
+        other = executor.submit(flights.do, 'other', lambda: 'separate')
+        assert other.result(timeout=2.0) == 'separate', 'other keys are not held back'
+        while flights.metrics()['followers'] < 3:
+            pass
+        release.set()
+        assert leader.result() == 42
+        assert [follower.result() for follower in followers] == [42, 42, 42]
+    assert calls == [21], 'work runs once for concurrent identical calls'
+    assert flights.metrics() == {'in_flight': 0, 'leaders': 2, 'followers': 3, 'timeouts': 0}
+
+    assert flights.do('did', work, 1) == 2, 'finished keys run again'
+
+
+def test_single_flight_shares_exceptions_and_times_out_followers():
+    flights = coalescing.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(2.0)
+        raise ValueError('host down')
+
+    with futures.ThreadPoolExecutor(max_workers=3) as executor:
+        leader = executor.submit(flights.do, 'did', failing)
+        assert started.wait(2.0)
+        impatient = executor.submit(flights.do, 'did', failing, timeout=0.05)
+        with pytest.raises(futures.TimeoutError):
+            impatient.result()
+        follower = executor.submit(flights.do, 'did', failing, timeout=2.0)
+        while flights.metrics()['followers'] < 2:
+            pass
+        release.set()
+        with pytest.raises(ValueError, match='host down'):
+            leader.result()
+        with pytest.raises(ValueError, match='host down'):
+            follower.result()
+    assert flights.metrics()['timeouts'] == 1
+    assert flights.in_flight() == 0
@@ -11,13 +11,13 @@ from unittest.mock import patch
 import pytest
 from hio.help.hicting import Mict
 from keri.app import habbing
-from keri.core import coring, eventing, serdering
+from keri.core import coring, eventing, serdering, signing
 from keri.db import basing, koming, subing
 from keri.vdr import credentialing, verifying
 from mockito import mock, unstub, when
 
 from dws import DidWebsError, UnknownAID
-from dws.core import didding, didkeri
+from dws.core import didding, didkeri, parsing
 
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
@@ -1067,3 +1067,32 @@ def test_gen_service_endpoints_when_del_serv_end_is_none_does_not_include_delega
     serv_endpoints = didding.gen_service_endpoints(hby=hby, hab=hab, kever=kever, aid='delegate_aid')
     assert len(serv_endpoints) > 0, 'Service endpoints should not be empty'
     assert 'DelegatorOOBI' not in [service['type'] for service in serv_endpoints], 'Delegator service should not be included'
+
+
+def test_add_ends_emits_one_service_per_role_and_eid_in_order():
+    ends = Mict()
+    ends.add('witness', Mict([('wit0', Mict([('http', 'http://a:5642')])), ('wit1', Mict([('tcp', 'tcp://b:5632')]))]))
+    ends.add('mailbox', Mict([('mbx0', Mict([('http', 'http://c:5642'), ('https', 'https://c:5643')]))]))
+    ends.add('witness', Mict([('wit2', Mict([('http', 'http://d:5642')]))]))
+
+    assert didding.add_ends(ends) == [
+        {'id': '#wit0/witness', 'type': 'witness', 'serviceEndpoint': {'http': 'http://a:5642'}},
+        {'id': '#wit1/witness', 'type': 'witness', 'serviceEndpoint': {'tcp': 'tcp://b:5632'}},
+        {'id': '#wit2/witness', 'type': 'witness', 'serviceEndpoint': {'http': 'http://d:5642'}},
+        {'id': '#mbx0/mailbox', 'type': 'mailbox', 'serviceEndpoint': {'http': 'http://c:5642', 'https': 'https://c:5643'}},
+    ]
+    assert didding.add_ends(Mict()) == []
+
+
+def test_generate_verification_methods_parses_did_once():
+    signers = signing.Salter(raw=b'0123456789abcdef').signers(count=3, temp=True)
+    verfers = [signer.verfer for signer in signers]
+    aid = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+    did = f'did:webs:127.0.0.1%3A7676:{aid}?meta=true'
+
+    with patch('dws.core.parsing.parse_did_webs', wraps=parsing.parse_did_webs) as parse:
+        vms = didding.generate_verification_methods(verfers, 2, did, aid)
+    assert parse.call_count == 1
+    assert len(vms) == 4
+    assert {vm['controller'] for vm in vms} == {f'did:webs:127.0.0.1%3A7676:{aid}'}
+    assert vms[-1]['conditionThreshold'] == [f'#{verfer.qb64}' for verfer in verfers]
@@ -0,0 +1,130 @@
+import copy
+import json
+
+import pytest
+
+from dws.core import diffing, resolving
+
+
+def apply_patch(doc, patch):
+    """Minimal RFC 6902 add, remove, and replace for checking that patches turn expected into actual."""
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        parts = [part.replace('~1', '/').replace('~0', '~') for part in op['path'].split('/')[1:]]
+        if not parts:
+            doc = op['value']
+            continue
+        parent = doc
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        last = parts[-1]
+        if isinstance(parent, list):
+            if op['op'] == 'add':
+                parent.append(op['value']) if last == '-' else parent.insert(int(last), op['value'])
+            elif op['op'] == 'remove':
+                del parent[int(last)]
+            else:
+                parent[int(last)] = op['value']
+        elif op['op'] == 'remove':
+            del parent[last]
+        else:
+            parent[last] = op['value']
+    return doc
+
+
+def did_doc():
+    return {
+        'id': 'did:webs:example.com:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4',
+        'verificationMethod': [{'id': '#key0', 'publicKeyJwk': {'x': 'a'}}, {'id': '#key1', 'publicKeyJwk': {'x': 'b'}}],
+        'service': [{'id': '#wit0', 'type': 'witness'}, {'id': '#wit1', 'type': 'witness'}],
+        'alsoKnownAs': ['did:web:example.com', 'did:keri:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'],
+    }
+
+
+def test_equal_treats_set_valued_properties_as_unordered():
+    expected = did_doc()
+    actual = did_doc()
+    actual['service'].reverse()
+    actual['alsoKnownAs'].reverse()
+    assert diffing.equal(expected, actual)
+    assert diffing.diff(expected, actual) == ([], False)
+    assert resolving.compare_did_docs(expected, actual) == (True, [])
+
+    actual['verificationMethod'].reverse()
+    assert not diffing.equal(expected, actual), 'verification methods are compared by index'
+    actual = did_doc()
+    actual['alsoKnownAs'].append('did:web:example.com')
+    assert not diffing.equal(expected, actual), 'duplicates count when comparing sets'
+
+
+def test_diff_emits_json_patch_turning_expected_into_actual():
+    expected = did_doc()
+    actual = did_doc()
+    actual['verificationMethod'][1]['publicKeyJwk']['x'] = 'c'
+    actual['service'] = [{'id': '#wit1', 'type': 'witness'}, {'id': '#wit2', 'type': 'witness'}]
+    del actual['alsoKnownAs']
+    actual['controller'] = 'did:webs:example.com/a~b'
+
+    patch, truncated = diffing.diff(expected, actual)
+    assert not truncated
+    assert patch == [
+        {'op': 'replace', 'path': '/verificationMethod/1/publicKeyJwk/x', 'value': 'c'},
+        {'op': 'remove', 'path': '/service/0'},
+        {'op': 'add', 'path': '/service/-', 'value': {'id': '#wit2', 'type': 'witness'}},
+        {'op': 'remove', 'path': '/alsoKnownAs'},
+        {'op': 'add', 'path': '/controller', 'value': 'did:webs:example.com/a~b'},
+    ]
+    assert diffing.equal(apply_patch(expected, patch), actual)
+
+    actual = did_doc()
+    actual['verificationMethod'] = actual['verificationMethod'][:1]
+    patch, _ = diffing.diff(expected, actual)
+    assert patch == [{'op': 'remove', 'path': '/verificationMethod/1'}]
+    assert diffing.pointer(('a/b', 'c~d', 0)) == '/a~1b/c~0d/0'
+
+
+def test_diff_output_is_bounded():
+    expected = {'verificationMethod': [{'id': f'#key{i}'} for i in range(1000)]}
+    actual = {'verificationMethod': [{'id': f'#other{i}'} for i in range(1000)]}
+    patch, truncated = diffing.diff(expected, actual, limit=10)
+    assert len(patch) == 10
+    assert truncated
+
+    ok, resolution = resolving.verify(expected, actual)
+    assert not ok
+    meta = resolution['didResolutionMetadata']
+    assert len(meta['differences']) == diffing.DefaultLimit
+    assert meta['differencesTruncated']
+
+
+@pytest.mark.parametrize(
+    'value,expected',
+    [
+        # number serialization samples from RFC 8785 appendix B
+        (0.0, '0'),
+        (-0.0, '0'),
+        (1e21, '1e+21'),
+        (1e20, '100000000000000000000'),
+        (1e-7, '1e-7'),
+        (0.000001, '0.000001'),
+        (5e-324, '5e-324'),
+        (1.7976931348623157e308, '1.7976931348623157e+308'),
+        (295147905179352830000.0, '295147905179352830000'),
+        (333333333.3333333, '333333333.3333333'),
+        (-100.0, '-100'),
+    ],
+)
+def test_jcs_number_follows_rfc8785(value, expected):
+    assert diffing.jcs_number(value) == expected
+
+
+def test_canonicalize_follows_rfc8785():
+    with pytest.raises(ValueError):
+        diffing.canonicalize(float('nan'))
+
+    # keys sort by UTF-16 code units so astral characters sort before the end of the BMP
+    doc = {'דּ': 3, '\U0001f600': 2, 'b': [1, 2.5, None, True], 'a': 'é\n'}
+    assert diffing.canonicalize(doc) == '{"a":"é\\n","b":[1,2.5,null,true],"\U0001f600":2,"דּ":3}'.encode()
+
+    assert diffing.digest(doc) == diffing.digest(json.loads(json.dumps(doc, indent=2)))
+    assert diffing.digest(doc) != diffing.digest({**doc, 'a': 'e'})
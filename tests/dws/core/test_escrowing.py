@@ -0,0 +1,187 @@
+import json
+from unittest.mock import patch
+
+import falcon
+from falcon import testing
+from keri.app import habbing
+from keri.core import coring, scheming
+from keri.vdr import credentialing
+
+from dws.core import artifacting, didding, escrowing, ingesting, resolving
+from tests import conftest
+from tests.conftest import CredentialHelpers, self_attested_aliases_cred_subj
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_escrower_sweeps_round_robin_within_budget():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+        assert not ingestor.background
+
+        escrower = escrowing.Escrower(ingestor=ingestor, tock=0.5, budget=10.0)
+        assert ingestor.background, 'creating an Escrower moves escrow sweeps to the background'
+        assert escrower.tock == 0.5
+        assert escrower.sweep() == ['kel', 'tel', 'exn', 'vry', 'rpy']
+
+        # each stage takes 1 second of clock so a 2 second budget runs two stages per tick
+        clock = FakeClock()
+
+        def tick():
+            clock.now += 1.0
+
+        escrower = escrowing.Escrower(ingestor=ingestor, budget=2.0, clock=clock)
+        escrower.stages = [(name, tick) for name, _ in escrower.stages]
+        assert escrower.sweep() == ['kel', 'tel']
+        assert escrower.sweep() == ['exn', 'vry']
+        assert escrower.sweep() == ['rpy', 'kel']
+        # at least one stage runs even when a single stage exceeds the budget
+        escrower.budget = 0.0
+        assert escrower.sweep() == ['tel']
+
+        metrics = escrower.metrics()
+        assert metrics['ticks'] == 4
+        assert metrics['counts'] == {'kel': 2, 'tel': 2, 'exn': 1, 'vry': 1, 'rpy': 1}
+        assert metrics['durations']['kel'] == 1.0
+        assert metrics['totals']['kel'] == 2.0
+        assert metrics['sizes']['ooes'] == 0
+        assert set(metrics['sizes']) >= {'ooes', 'pses', 'oots', 'mre', 'rpes'}
+
+
+def test_escrower_continues_after_failing_stage():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+        with patch.object(ingestor.kvy, 'processEscrows', side_effect=ValueError('boom')):
+            escrower = escrowing.Escrower(ingestor=ingestor, budget=10.0)
+            assert escrower.sweep() == ['kel', 'tel', 'exn', 'vry', 'rpy']
+        assert escrower.recur() is False, 'the escrow worker never completes'
+
+
+def test_settle_sweeps_inline_only_for_escrowed_key_events():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+        escrowing.Escrower(ingestor=ingestor)
+
+        wat_hab.interact()
+        wat_hab.interact()
+        ims = bytes(wat_hab.replay(pre=wat_hab.pre))
+
+        with patch.object(ingestor, 'process_escrows') as process_escrows:
+            resolving.save_cesr(hby=hby, rgy=rgy, kc_res=ims, aid=wat_hab.pre, ingestor=ingestor)
+            process_escrows.assert_not_called()
+        assert not ingesting.pending_key_events(hby, ims)
+
+        # out of order key event lands in an escrow so the request sweeps escrows inline
+        wat_hab.interact()
+        wat_hab.interact()
+        ims = bytes(wat_hab.replay(pre=wat_hab.pre))
+        frames = list(ingesting.frame_stream(ims))
+        out_of_order = ims[: frames[2].end] + ims[frames[3].end :]
+        ingestor.ingest(ims=out_of_order, aid=wat_hab.pre)
+        assert hby.kevers[wat_hab.pre].sn == 2
+        assert ingesting.pending_key_events(hby, out_of_order)
+        assert escrowing.escrow_sizes(ingestor)['ooes'] == 1
+
+        ingestor.ingest(ims=ims[frames[2].end : frames[3].end], aid=wat_hab.pre)
+        assert ingestor.escrowed('kel', 'rpy') == 1
+
+        # escrows holding more events than the inline limit are left to the background sweep
+        ingestor.inline_limit = 0
+        with patch.object(ingestor, 'process_key_escrows') as process_key_escrows:
+            ingestor.settle(ims=out_of_order)
+            process_key_escrows.assert_not_called()
+        assert hby.kevers[wat_hab.pre].sn == 3
+
+        ingestor.inline_limit = ingesting.Ingestor.InlineLimit
+        with (
+            patch.object(ingestor, 'process_escrows') as process_escrows,
+            patch.object(ingestor, 'process_key_escrows', wraps=ingestor.process_key_escrows) as process_key_escrows,
+            patch.object(ingestor, 'process_credential_escrows') as process_credential_escrows,
+        ):
+            ingestor.settle(ims=out_of_order)
+            process_key_escrows.assert_called_once()
+            process_escrows.assert_not_called()
+            process_credential_escrows.assert_not_called()
+        assert hby.kevers[wat_hab.pre].sn == 4
+        assert escrowing.escrow_sizes(ingestor)['ooes'] == 0
+
+
+def test_settle_sweeps_credential_escrows_inline_for_escrowed_acdcs():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (wat_hby, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        wat_rgy = credentialing.Regery(hby=wat_hby, name=wat_hab.name, temp=True)
+        creder, _, _ = CredentialHelpers.add_cred_to_aid(
+            hby=wat_hby,
+            hby_doer=habbing.HaberyDoer(habery=wat_hby),
+            regery=wat_rgy,
+            hab=wat_hab,
+            schema_said=didding.DES_ALIASES_SCHEMA,
+            schema_json=conftest.Schema.designated_aliases_schema(),
+            subject_data=self_attested_aliases_cred_subj('127.0.0.1', wat_hab.pre, '7677', 'dws'),
+            rules_json=conftest.Schema.designated_aliases_rules(),
+            registry_nonce='0ADV24br-aaezyRTB-oUsZJE',
+        )
+        kel = bytes(artifacting.gen_kel_cesr(wat_hab, wat_hab.pre))
+        acdcs = bytes(artifacting.gen_des_aliases_cesr(wat_hab, wat_rgy.reger, wat_hab.pre))
+        tels = acdcs[: list(ingesting.frame_stream(acdcs))[-1].end]  # the registry inception and issuance
+
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        schemer = scheming.Schemer(
+            raw=json.dumps(conftest.Schema.designated_aliases_schema()).encode(),
+            typ=scheming.JSONSchema(),
+            code=coring.MtrDex.Blake3_256,
+        )
+        scheming.CacheResolver(db=hby.db).add(schemer.said, schemer.raw)
+        ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+        escrowing.Escrower(ingestor=ingestor)
+        assert ingestor.aliases.aliases(rgy, wat_hab.pre) == []
+
+        # the ACDC arrives before the TEL events issuing it and lands in the credential escrow
+        ingestor.ingest(ims=kel + acdcs[len(tels) :], aid=wat_hab.pre)
+        ingestor.ingest(ims=tels, aid=wat_hab.pre)
+        assert not ingesting.pending_key_events(hby, kel + acdcs)
+        assert ingesting.pending_credentials(rgy, kel + acdcs)
+        assert rgy.reger.saved.get(keys=creder.said) is None
+
+        with (
+            patch.object(ingestor, 'process_escrows') as process_escrows,
+            patch.object(ingestor, 'process_credential_escrows', wraps=ingestor.process_credential_escrows) as credentials,
+        ):
+            ingestor.settle(ims=kel + acdcs)
+            credentials.assert_called_once()
+            process_escrows.assert_not_called()
+        assert rgy.reger.saved.get(keys=creder.said) is not None
+        assert not ingesting.pending_credentials(rgy, kel + acdcs)
+        assert ingestor.aliases.aliases(rgy, wat_hab.pre) == list(creder.sad['a']['ids'])
+        assert ingestor.aliases.scans == 1, 'the ACDC accepted from the escrow is indexed without a scan'
+
+        with patch.object(ingestor, 'process_credential_escrows') as credentials:
+            ingestor.settle(ims=kel + acdcs)
+            credentials.assert_not_called()
+
+
+def test_metrics_end_reports_escrows():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        escrower = escrowing.Escrower(ingestor=ingesting.Ingestor(hby=hby, rgy=rgy))
+        escrower.sweep()
+        app = resolving.falcon_app()
+        resolving.load_ends(app, hby=hby, rgy=rgy, oobiery=None, static_files_dir=None, escrower=escrower)
+        rep = testing.TestClient(app=app).simulate_get('/metrics')
+        assert rep.status == falcon.HTTP_200
+        assert rep.json['escrows']['ticks'] == 1
+        assert rep.json['escrows']['sizes']['ooes'] == 0
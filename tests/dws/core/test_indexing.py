@@ -0,0 +1,140 @@
+import json
+from unittest.mock import patch
+
+from keri.app import habbing
+from keri.core import coring, eventing, scheming, serdering
+from keri.db import basing
+from keri.vdr import credentialing
+
+from dws.core import artifacting, didding, indexing, ingesting, oobiing
+from tests import conftest
+from tests.conftest import CredentialHelpers, self_attested_aliases_cred_subj
+
+
+def test_alias_index_scans_an_issuer_once_until_the_regery_changes():
+    salt = b'0AAB_Fidf5WeZf6VFc53IxVw'
+    with habbing.openHab(salt=salt, name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        index = indexing.AliasIndex()
+        assert index.aliases(rgy, hab.pre) == []
+        assert index.scans == 1
+
+        # an ACDC issued outside of an Ingestor changes the number of TEL events and ACDCs of the Regery
+        subject_data = self_attested_aliases_cred_subj('127.0.0.1', hab.pre, '7677', 'dws')
+        creder, _, _ = CredentialHelpers.add_cred_to_aid(
+            hby=hby,
+            hby_doer=habbing.HaberyDoer(habery=hby),
+            regery=rgy,
+            hab=hab,
+            schema_said=didding.DES_ALIASES_SCHEMA,
+            schema_json=conftest.Schema.designated_aliases_schema(),
+            subject_data=subject_data,
+            rules_json=conftest.Schema.designated_aliases_rules(),
+            registry_nonce='0ADV24br-aaezyRTB-oUsZJE',
+        )
+
+        aliases = index.aliases(rgy, hab.pre)
+        assert aliases == subject_data['ids']
+        assert aliases == didding.gen_designated_aliases(hby, rgy, hab.pre), 'same aliases as cloning the ACDCs'
+        assert index.scans == 2
+
+        with patch.object(rgy.reger.issus, 'get', wraps=rgy.reger.issus.get) as issus:
+            assert index.aliases(rgy, hab.pre) == aliases
+            assert index.records(rgy, hab.pre)[creder.said] == indexing.AliasRecord(ids=tuple(aliases), tels=1)
+            issus.assert_not_called()
+        assert index.scans == 2 and index.loads == 1, 'reads of an unchanged Regery are lookups'
+
+        did = f'did:webs:127.0.0.1%3A7677:dws:{hab.pre}'
+        doc = didding.generate_did_doc(hby, rgy, did=did, aid=hab.pre, aliases=index)
+        assert doc['alsoKnownAs'] == aliases
+
+        assert len(index) == 1
+        index.invalidate(hab.pre)
+        assert len(index) == 0
+
+
+def test_alias_index_follows_ingested_issuance_and_revocation():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (wat_hby, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        wat_rgy = credentialing.Regery(hby=wat_hby, name=wat_hab.name, temp=True)
+        subject_data = self_attested_aliases_cred_subj('127.0.0.1', wat_hab.pre, '7677', 'dws')
+        creder, _, _ = CredentialHelpers.add_cred_to_aid(
+            hby=wat_hby,
+            hby_doer=habbing.HaberyDoer(habery=wat_hby),
+            regery=wat_rgy,
+            hab=wat_hab,
+            schema_said=didding.DES_ALIASES_SCHEMA,
+            schema_json=conftest.Schema.designated_aliases_schema(),
+            subject_data=subject_data,
+            rules_json=conftest.Schema.designated_aliases_rules(),
+            registry_nonce='0ADV24br-aaezyRTB-oUsZJE',
+        )
+
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        schemer = scheming.Schemer(
+            raw=json.dumps(conftest.Schema.designated_aliases_schema()).encode(),
+            typ=scheming.JSONSchema(),
+            code=coring.MtrDex.Blake3_256,
+        )
+        scheming.CacheResolver(db=hby.db).add(schemer.said, schemer.raw)
+        ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+        index = ingestor.aliases
+        assert index.aliases(rgy, wat_hab.pre) == []
+
+        def keri_cesr():
+            kel = bytes(artifacting.gen_kel_cesr(wat_hab, wat_hab.pre))
+            return kel + bytes(artifacting.gen_des_aliases_cesr(wat_hab, wat_rgy.reger, wat_hab.pre))
+
+        ingestor.ingest(ims=keri_cesr(), aid=wat_hab.pre)
+        assert index.aliases(rgy, wat_hab.pre) == subject_data['ids']
+        assert index.scans == 1, 'the ingested issuance is indexed without scanning the issuer again'
+
+        registry = wat_rgy.registryByName(wat_hab.name)
+        rev = registry.revoke(said=creder.said, dt=creder.attrib['dt'])
+        anc = serdering.SerderKERI(
+            raw=bytes(wat_hab.interact(data=[eventing.SealEvent(rev.pre, rev.snh, rev.said)._asdict()]))
+        )
+        registry.anchorMsg(pre=rev.pre, regd=rev.said, seqner=coring.Seqner(sn=anc.sn), saider=coring.Saider(qb64=anc.said))
+        wat_rgy.processEscrows()
+
+        ingestor.ingest(ims=keri_cesr(), aid=wat_hab.pre)
+        assert index.aliases(rgy, wat_hab.pre) == []
+        assert index.records(rgy, wat_hab.pre)[creder.said].revoked
+        assert index.scans == 1, 'the ingested revocation is indexed without scanning the issuer again'
+        assert not index.pending
+
+
+def test_oobi_index_finds_resolved_oobis_without_scanning():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, _):
+        cid = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+        for i in range(3):
+            hby.db.roobi.pin(keys=(f'http://127.0.0.1:{5640 + i}/oobi',), val=basing.OobiRecord(cid=f'E{i}'))
+        hby.db.roobi.pin(keys=('http://127.0.0.1:5642/oobi/delegator',), val=basing.OobiRecord(cid=cid))
+
+        index = indexing.OobiIndex()
+        assert indexing.entries(hby.db.roobi) == 4
+        assert index.resolved_oobi(hby, cid) == 'http://127.0.0.1:5642/oobi/delegator'
+        assert index.resolved_oobi(hby, 'E1') == 'http://127.0.0.1:5641/oobi'
+        assert index.resolved_oobi(hby, 'unknown') is None
+        assert oobiing.get_resolved_oobi(hby, cid, oobis=index) == oobiing.get_resolved_oobi(hby, cid)
+        assert index.builds == 1
+
+        # OOBIs resolved by this resolver are added without rebuilding the index
+        hby.db.roobi.pin(keys=('http://127.0.0.1:5643/oobi',), val=basing.OobiRecord(cid='E3'))
+        index.add(hby, 'http://127.0.0.1:5643/oobi')
+        assert index.resolved_oobi(hby, 'E3') == 'http://127.0.0.1:5643/oobi'
+        assert index.builds == 1
+
+        # OOBIs resolved elsewhere change the size of the table and rebuild the index
+        hby.db.roobi.pin(keys=('http://127.0.0.1:5644/oobi',), val=basing.OobiRecord(cid='E4'))
+        assert index.resolved_oobi(hby, 'E4') == 'http://127.0.0.1:5644/oobi'
+        assert index.builds == 2
+
+        # re-resolving an OOBI for another AID moves it in the index
+        hby.db.roobi.pin(keys=('http://127.0.0.1:5642/oobi/delegator',), val=basing.OobiRecord(cid='E5'))
+        index.add(hby, 'http://127.0.0.1:5642/oobi/delegator')
+        assert index.resolved_oobi(hby, cid) is None
+        assert index.resolved_oobi(hby, 'E5') == 'http://127.0.0.1:5642/oobi/delegator'
+        assert index.builds == 2
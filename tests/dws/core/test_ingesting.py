@@ -0,0 +1,155 @@
+import itertools
+from unittest.mock import patch
+
+import pytest
+from keri.app import habbing
+from keri.vdr import credentialing
+
+from dws.core import ingesting, resolving
+
+
+def test_frame_stream_frames_kel_events():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (_, hab):
+        hab.interact()
+        hab.rotate()
+        ims = bytes(hab.replay(pre=hab.pre))
+
+        frames = list(ingesting.frame_stream(ims))
+        assert [frame.serder.sn for frame in frames] == [0, 1, 2]
+        assert [frame.serder.ilk for frame in frames] == ['icp', 'ixn', 'rot']
+        assert frames[0].start == 0
+        assert frames[-1].end == len(ims)
+        for prior, frame in itertools.pairwise(frames):
+            assert prior.end == frame.start
+
+        assert list(ingesting.frame_stream(b'')) == []
+        assert list(ingesting.frame_stream(b'not cesr')) == []
+        # a truncated stream frames only the complete messages
+        assert len(list(ingesting.frame_stream(ims[:-10]))) == 2
+
+
+def test_cesr_framer_frames_messages_as_bytes_arrive():
+    salt = b'0ACB-gtnUTQModt9u_UC3LFQ'
+    with habbing.openHab(salt=salt, name='water', transferable=True, temp=True) as (hby, hab):
+        hab.interact()
+        hab.rotate()
+        ims = bytes(hab.replay(pre=hab.pre))
+        expected = [(frame.start, frame.end, frame.serder.said) for frame in ingesting.frame_stream(ims)]
+
+        for size in (1, 7, len(ims)):
+            framer = ingesting.CesrFramer()
+            for i in range(0, len(ims), size):
+                framer.feed(ims[i : i + size])
+            assert [(frame.start, frame.end, frame.serder.said) for frame in framer.frames] == expected
+            assert not framer.buf, 'framed bytes are not kept buffered'
+
+        stream = framer.stream(ims)
+        assert stream == ims
+        with patch.object(ingesting, 'frame_stream', side_effect=AssertionError('framed again')):
+            assert ingesting.stored_prefix_length(hby, stream) == len(ims), 'frames of the download are reused'
+
+        framer = ingesting.CesrFramer()
+        framer.feed(ims + b'<html>')
+        assert len(framer.frames) == 3
+        assert framer.done, 'framing stops at bytes that cannot be framed'
+
+        with pytest.raises(ValueError, match='Not a CESR stream'):
+            ingesting.CesrFramer().feed(b'not a cesr stream at all, just text')
+
+
+def spy_parse(hby):
+    """Patches the Habery parser to record a copy of each stream handed to it, since parsing consumes the stream."""
+    parsed = []
+    parse = hby.psr.parse
+
+    def record(ims, **kwa):
+        parsed.append(bytes(ims))
+        return parse(ims=ims, **kwa)
+
+    return patch.object(hby.psr, 'parse', side_effect=record), parsed
+
+
+def test_save_cesr_parses_only_unseen_tail():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        wat_hab.interact()
+        first = bytes(wat_hab.replay(pre=wat_hab.pre))
+        assert ingesting.stored_prefix_length(hby, first) == 0
+
+        resolving.save_cesr(hby=hby, rgy=rgy, kc_res=first, aid=wat_hab.pre)
+        assert hby.kevers[wat_hab.pre].sn == 1
+        assert ingesting.stored_prefix_length(hby, first) == len(first)
+
+        wat_hab.rotate()
+        wat_hab.interact()
+        second = bytes(wat_hab.replay(pre=wat_hab.pre))
+        assert second.startswith(first)
+        assert ingesting.unseen_tail(hby, second) == second[len(first) :]
+
+        spy, parsed = spy_parse(hby)
+        with spy:
+            resolving.save_cesr(hby=hby, rgy=rgy, kc_res=second, aid=wat_hab.pre)
+        assert parsed == [second[len(first) :]]
+        assert hby.kevers[wat_hab.pre].sn == 3
+        assert ingesting.unseen_tail(hby, second) == b''
+
+        spy, parsed = spy_parse(hby)
+        with spy:
+            resolving.save_cesr(hby=hby, rgy=rgy, kc_res=second, aid=wat_hab.pre, incremental=False)
+        assert parsed == [second], 'full stream parsed when not incremental'
+
+
+def test_stored_prefix_stops_at_duplicitous_event():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', base='fork', transferable=True, temp=True) as (
+            _,
+            oth_hab,
+        ),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        assert wat_hab.pre == oth_hab.pre
+        wat_hab.interact(data=[{'a': 1}])
+        oth_hab.interact(data=[{'b': 2}])
+        resolving.save_cesr(hby=hby, rgy=rgy, kc_res=bytes(wat_hab.replay(pre=wat_hab.pre)), aid=wat_hab.pre)
+
+        forked = bytes(oth_hab.replay(pre=oth_hab.pre))
+        frames = list(ingesting.frame_stream(forked))
+        assert ingesting.stored_prefix_length(hby, forked) == frames[0].end, 'differing event digest is not skipped'
+
+
+def test_ingestor_reused_across_streams():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        ingestor = ingesting.Ingestor(hby=hby, rgy=rgy)
+        kvy, rvy = ingestor.kvy, ingestor.rvy
+
+        with patch('dws.core.ingesting.eventing.Kevery') as kevery:
+            for _ in range(3):
+                wat_hab.interact()
+                resolving.save_cesr(
+                    hby=hby, rgy=rgy, kc_res=bytes(wat_hab.replay(pre=wat_hab.pre)), aid=wat_hab.pre, ingestor=ingestor
+                )
+            kevery.assert_not_called()
+        assert ingestor.kvy is kvy and ingestor.rvy is rvy
+        assert hby.kevers[wat_hab.pre].sn == 3
+        for cues in (ingestor.kvy.cues, ingestor.tvy.cues, ingestor.vry.cues, ingestor.rvy.cues, ingestor.exc.cues):
+            assert len(cues) == 0, 'cues do not accumulate across ingestions'
+
+
+def test_setup_resolver_shares_one_ingestor():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        with patch('dws.core.resolving.load_ends') as load_ends:
+            resolving.setup_resolver(hby, rgy, oobiery=None, http_port=7799)
+        ingestor = load_ends.call_args.kwargs['ingestor']
+        assert isinstance(ingestor, ingesting.Ingestor)
+        assert ingestor.hby is hby and ingestor.rgy is rgy
@@ -0,0 +1,154 @@
+import random
+import time
+
+import pytest
+from keri import kering
+from keri.core import coring
+
+from dws.core import didding, parsing
+
+AID = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+PIECES = [
+    ':',
+    '?',
+    '%3a',
+    '%3A',
+    '%',
+    '\n',
+    'a',
+    '7',
+    '.',
+    '/',
+    '=',
+    'did:webs:',
+    AID,
+    'BBilc4-L3tFUnfM_wJr4S4OJanAv_VmF_dJNN6vkf2Ha',
+]
+
+
+def regex_match(regex, did: str):
+    """The match of the regular expressions the parsers replace, with the AID checked by a Prefixer."""
+    match = regex.match(did)
+    if match is None:
+        return 'no match'
+    groups = match.groupdict()
+    parts = tuple(groups[name] for name in ('domain', 'port', 'path', 'aid', 'query') if name in groups)
+    return parts if prefixer_valid(groups['aid']) else 'invalid AID'
+
+
+def prefixer_valid(aid: str) -> bool:
+    try:
+        return coring.Prefixer(qb64=aid).qb64 == aid
+    except (kering.KeriError, KeyError, ValueError):
+        return False
+
+
+def parser_match(did: str, marker: str):
+    parts = parsing.match_did_webs(did, marker=marker)
+    if parts is None:
+        return 'no match'
+    return parts if parsing.valid_aid(parts[3]) else 'invalid AID'
+
+
+def fuzz_dids(count: int, seed: int):
+    rand = random.Random(seed)
+    for _ in range(count):
+        prefix = rand.choice(['did:webs:', 'did:web:', 'DID:WEBS:', 'did:keri:', 'did:webs:example.com', ''])
+        yield prefix + ''.join(rand.choice(PIECES) for _ in range(rand.randint(0, 10)))
+
+
+def test_parsers_match_the_regular_expressions_on_fuzzed_dids():
+    for did in fuzz_dids(count=20_000, seed=7):
+        assert parser_match(did, '%3a') == regex_match(didding.DID_WEBS_RE, did), did
+        assert parser_match(did, ':') == regex_match(didding.DID_WEBS_UNENCODED_PORT_RE, did), did
+        assert parsing.missing_aid(did) == bool(didding.NO_AID_UNENCODED_PORT_RE.match(did)), did
+        keri = didding.DID_KERI_RE.match(did)
+        expected = keri.group('aid', 'query') if keri else None
+        if did[:9].lower() == 'did:keri:':
+            assert parsing.match_aid_query(did, 9, did.rfind('\n')) == expected, did
+        else:
+            assert expected is None
+
+
+def test_valid_aid_matches_prefixer_on_fuzzed_qb64():
+    rand = random.Random(11)
+    codes = list(coring.PreDex) + ['A', '0A', '4A', 'M']
+    valid = 0
+    for _ in range(5_000):
+        code = rand.choice(codes)
+        size = (coring.Matter.Sizes[code].fs or 48) + rand.choice([0, 0, 0, -1, 1])
+        aid = code + ''.join(rand.choice(coring.B64_CHARS) for _ in range(size - len(code)))
+        assert parsing.valid_aid(aid) == prefixer_valid(aid), aid
+        valid += prefixer_valid(aid)
+    assert valid > 0
+    assert not parsing.valid_aid('')
+    assert not parsing.valid_aid(f'{AID}xyz')  # a Prefixer reads the first 44 characters and ignores the rest
+
+
+def test_parse_errors_and_length_limit():
+    with pytest.raises(ValueError, match='is not a valid did:web\\(s\\) DID'):
+        parsing.parse_did_webs('did:webs:example.com')
+    with pytest.raises(ValueError, match='1234567 is an invalid AID'):
+        parsing.parse_did_webs('did:webs:127.0.0.1:1234567')
+    with pytest.raises(ValueError, match='is not a valid did:keri DID'):
+        parsing.parse_did_keri('did:keri:')
+    with pytest.raises(ValueError, match='is missing an AID'):
+        parsing.re_encode_invalid_did_webs('did:webs:127.0.0.1:7676?meta=true')
+
+    path = ':'.join(['seg'] * (parsing.MAX_DID_LENGTH // 4))
+    with pytest.raises(ValueError, match=f'exceeds the {parsing.MAX_DID_LENGTH} characters allowed'):
+        parsing.parse_did_webs(f'did:webs:example.com:{path}:{AID}')
+
+
+@pytest.mark.parametrize(
+    'did,stripped',
+    [
+        (f'did:webs:example.com:{AID}?meta=true', f'did:webs:example.com:{AID}'),
+        (f'did:webs:example.com%3A7676:{AID}?meta=true', f'did:webs:example.com%3A7676:{AID}'),
+        (f'did:webs:example.com:dws:{AID}?meta=true', f'did:webs:example.com:dws:{AID}'),
+        (f'did:web:example.com%3A7676:dws:{AID}?meta=true', f'did:web:example.com%3A7676:dws:{AID}'),
+        (f'did:webs:example.com:{AID}', f'did:webs:example.com:{AID}'),
+        (f'did:keri:{AID}', f'did:keri:{AID}'),
+    ],
+)
+def test_strip_query_keeps_only_the_pieces_the_did_has(did, stripped):
+    assert parsing.strip_query(did) == stripped
+    assert didding.strip_query(did) == stripped
+
+
+def test_parse_results_are_memoized():
+    parsing.clear()
+    did = f'did:webs:example.com%3A8443:my:path:{AID}?meta=true'
+    assert parsing.parse_did_webs(did) == ('example.com', '8443', 'my:path', AID, '?meta=true')
+    assert parsing.parse_did_webs(did) is parsing.parse_did_webs(did)
+    assert parsing.metrics() == {'hits': 2, 'misses': 1, 'size': 1}
+
+    assert parsing.requote(did.replace(':', '%3A', 2)) == did
+    assert parsing.metrics()['size'] == 2
+    parsing.clear()
+    assert parsing.metrics() == {'hits': 0, 'misses': 0, 'size': 0}
+
+
+def parse_seconds(did: str) -> float:
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(5):
+            parsing.match_did_webs(did)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize(
+    'segment,tail',
+    [
+        (':a?', '\n'),  # every colon is a candidate path end whose query runs into the final newline
+        (':a?b', '\n'),
+        (':a', ':'),  # no candidate has an AID ending the DID
+        (':?', ''),
+    ],
+)
+def test_parse_time_grows_linearly_with_crafted_paths(segment, tail):
+    small = parse_seconds(f'did:webs:a{segment * 1_000}{tail}')
+    large = parse_seconds(f'did:webs:a{segment * 8_000}{tail}')
+    assert large / small < 24  # 8 times the input, about 8 times the time when linear and 64 when quadratic
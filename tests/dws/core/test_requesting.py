@@ -1,9 +1,12 @@
+import http.server
+import threading
+import time
 from unittest.mock import patch
 
 import pytest
 import requests
 
-from dws import ArtifactResolveError
+from dws import ArtifactResolveError, ArtifactTooLargeError
 from dws.core import requesting
 
 
@@ -13,6 +16,13 @@ def test_load_url_with_requests_fails_on_connection_error():
         def __init__(self, content, status_code):
             self.content = content
             self.status_code = status_code
+            self.headers = {}
+
+        def iter_content(self, chunk_size=1):
+            yield self.content
+
+        def close(self):
+            pass
 
     # Mock out the requests library
     with patch('requests.get') as mock_get:
@@ -32,7 +42,8 @@ def test_load_url_with_requests_fails_on_connection_error():
 
     with patch('requests.get') as mock_get:
         # mock returning a byte array in response.content
-        mock_get.return_value.content = b'{"key": "value"}'
+        mock_get.return_value.iter_content.return_value = [b'{"key": "value"}']
+        mock_get.return_value.headers = {}
         mock_get.return_value.status_code = 200
         result = requesting.load_url_with_requests('http://192.0.2.1')
         assert result == b'{"key": "value"}', 'Expected byte array response from mocked requests.get'
@@ -64,3 +75,329 @@ def test_load_url_with_requests_fails_on_connection_error():
         with pytest.raises(ArtifactResolveError) as excinfo:
             requesting.load_url_with_requests('https://example.com')
         assert 'Failed to load HTTP URL' in str(excinfo.value), 'Expected error message for ArtifactResolveError'
+
+
+class MockResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_cache_control_and_freshness_lifetime():
+    assert requesting.parse_cache_control(None) == {}
+    assert requesting.parse_cache_control('public, max-age=60, no-store') == {
+        'public': True,
+        'max-age': '60',
+        'no-store': True,
+    }
+    assert requesting.freshness_lifetime({'Cache-Control': 'max-age=60', 'Age': '10'}) == 50.0
+    assert requesting.freshness_lifetime({'Cache-Control': 'max-age=60, no-cache'}) == 0.0
+    assert requesting.freshness_lifetime({'Cache-Control': 'max-age=abc'}) == 0.0
+    assert requesting.freshness_lifetime({}) == 0.0
+
+
+def test_artifact_cache_revalidates_with_etag_and_reuses_body_on_304():
+    url = 'https://example.com/dws/aid/keri.cesr'
+    clock = FakeClock()
+    cache = requesting.ArtifactCache(clock=clock)
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'cesr', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        assert cache(url, timeout=1.0) == b'cesr'
+        assert mock_get.call_args.kwargs['headers'] is None
+
+        mock_get.return_value = MockResponse(304, b'', {'ETag': '"v1"'})
+        assert cache(url, timeout=1.0) == b'cesr'
+        assert mock_get.call_args.kwargs['headers'] == {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        }
+
+        mock_get.return_value = MockResponse(200, b'cesr2', {'ETag': '"v2"'})
+        assert cache(url, timeout=1.0) == b'cesr2'
+
+        mock_get.side_effect = [MockResponse(404, b''), MockResponse(404, b'')]
+        assert cache(url, timeout=1.0) == b''
+        assert url not in cache.entries, 'failed loads evict the cached artifact'
+
+
+def test_artifact_cache_serves_fresh_artifacts_without_requests():
+    url = 'https://example.com/dws/aid/did.json'
+    clock = FakeClock()
+    cache = requesting.ArtifactCache(clock=clock)
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'{}', {'Cache-Control': 'max-age=30'})
+        assert cache(url) == b'{}'
+        clock.now = 29.0
+        assert cache(url) == b'{}'
+        assert mock_get.call_count == 1, 'fresh artifacts are not requested again'
+
+        clock.now = 31.0
+        assert cache(url) == b'{}'
+        assert mock_get.call_count == 2, 'stale artifacts are requested again'
+
+        clock.now = 100.0
+        mock_get.return_value = MockResponse(200, b'{}', {'Cache-Control': 'max-age=30, no-store', 'ETag': '"x"'})
+        assert cache(url) == b'{}'
+        assert url not in cache.entries, 'no-store responses are not cached'
+
+        mock_get.return_value = MockResponse(200, b'{}', {})
+        assert cache(url) == b'{}'
+        assert url not in cache.entries, 'responses without validators or freshness are not cached'
+
+    small = requesting.ArtifactCache(size=1)
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'{}', {'ETag': '"x"'})
+        small('https://example.com/a')
+        small('https://example.com/b')
+        assert list(small.entries) == ['https://example.com/b']
+
+
+def test_artifact_cache_holds_bodies_within_its_byte_budget():
+    cache = requesting.ArtifactCache(max_bytes=10)
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'123456', {'ETag': '"x"'})
+        cache('https://example.com/a')
+        mock_get.return_value = MockResponse(200, b'1234', {'ETag': '"x"'})
+        cache('https://example.com/b')
+        assert cache.bytes == 10
+
+        mock_get.return_value = MockResponse(200, b'12', {'ETag': '"x"'})
+        cache('https://example.com/c')
+        assert list(cache.entries) == ['https://example.com/b', 'https://example.com/c'], 'least recent evicted'
+        assert cache.bytes == 6
+
+        mock_get.return_value = MockResponse(200, b'12345678901', {'ETag': '"x"'})
+        assert cache('https://example.com/d') == b'12345678901'
+        assert 'https://example.com/d' not in cache.entries, 'artifacts over the budget are not cached'
+
+        mock_get.return_value = MockResponse(200, b'1', {'ETag': '"y"'})
+        cache('https://example.com/b')
+        assert cache.bytes == 3, 'a replaced artifact no longer counts'
+        cache.evict('https://example.com/c')
+        assert cache.bytes == 1
+
+    disabled = requesting.ArtifactCache(max_bytes=0)
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'{}', {'ETag': '"x"'})
+        disabled('https://example.com/a')
+        assert not disabled.entries
+
+
+class CountingHandler(http.server.BaseHTTPRequestHandler):
+    """Keep-alive HTTP/1.1 handler serving a small artifact and counting the connections opened to the server."""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+    def do_GET(self):
+        body = b'artifact'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    CountingHandler.connections = 0
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_pool_reuses_connections_per_host(local_server):
+    pool = requesting.SessionPool()
+    for _ in range(5):
+        response = pool.get(f'{local_server}/did.json', timeout=2.0)
+        assert response.content == b'artifact'
+    assert CountingHandler.connections == 1, 'pooled Session keeps the connection alive'
+    assert len(pool) == 1
+    pool.close()
+    assert len(pool) == 0
+
+    CountingHandler.connections = 0
+    for _ in range(3):
+        assert requests.get(f'{local_server}/did.json', timeout=2.0).content == b'artifact'
+    assert CountingHandler.connections == 3, 'unpooled requests open a connection each'
+
+
+def test_session_pool_evicts_idle_and_excess_hosts():
+    clock = FakeClock()
+    pool = requesting.SessionPool(max_hosts=2, idle_timeout=10.0, clock=clock)
+    a = pool.session('https://a.example.com/x')
+    assert pool.session('https://a.example.com/y') is a, 'one Session per host'
+    assert pool.session('http://a.example.com/x') is not a, 'scheme is part of the pool key'
+    assert len(pool) == 2
+
+    with patch.object(requests.Session, 'close') as close:
+        pool.session('https://b.example.com/x')
+        assert len(pool) == 2, 'least recently used host evicted beyond max_hosts'
+        assert close.call_count == 1
+        assert ('https', 'a.example.com', None) not in pool.sessions
+
+        clock.now = 11.0
+        pool.session('https://c.example.com/x')
+        assert list(pool.sessions) == [('https', 'c.example.com', None)], 'idle Sessions closed'
+        assert close.call_count == 3
+
+
+def test_artifact_cache_loads_through_session_pool(local_server):
+    pool = requesting.SessionPool()
+    cache = requesting.ArtifactCache(pool=pool)
+    with patch.object(pool, 'get', wraps=pool.get) as get:
+        # HTTPS is refused by the plain HTTP server so the load falls back to HTTP on the same pool
+        assert cache(f'{local_server}/keri.cesr', timeout=2.0) == b'artifact'
+        assert [call.args[0] if call.args else call.kwargs['url'] for call in get.call_args_list] == [
+            f'{local_server.replace("http://", "https://")}/keri.cesr',
+            f'{local_server}/keri.cesr',
+        ]
+
+
+def test_scheme_memory_orders_remembers_and_expires():
+    clock = FakeClock()
+    schemes = requesting.SchemeMemory(ttl=10.0, clock=clock)
+    url = 'https://dev.example.com:7676/dws/aid/did.json'
+    assert schemes.order(url) == ['https', 'http']
+    schemes.remember(url, 'http')
+    assert schemes.order(url) == ['http', 'https'], 'remembered scheme goes first'
+    assert schemes.order('https://dev.example.com/x') == ['https', 'http'], 'memory is per host and port'
+    clock.now = 10.0
+    assert schemes.order(url) == ['https', 'http'], 'memory expires'
+    assert schemes.schemes == {}
+
+    strict = requesting.SchemeMemory(policy=requesting.SchemeMemory.HttpsOnly, http_hosts=['localhost', 'dev:8080'])
+    assert strict.order('https://example.com/did.json') == ['https']
+    assert strict.order('https://localhost:7676/did.json') == ['https', 'http'], 'HTTP allowed for listed host'
+    assert strict.order('https://dev:8080/did.json') == ['https', 'http']
+    assert strict.order('https://dev:9090/did.json') == ['https']
+    strict.remember('https://example.com/did.json', 'http')
+    assert strict.order('https://example.com/did.json') == ['https'], 'policy overrides memory'
+
+    with pytest.raises(ValueError):
+        requesting.SchemeMemory(policy='http-always')
+
+
+def test_request_with_scheme_memory_goes_straight_to_known_scheme():
+    schemes = requesting.SchemeMemory()
+    url = 'https://dev.example.com/dws/aid/did.json'
+    with patch('requests.get') as mock_get:
+        mock_get.side_effect = [requests.exceptions.ConnectionError('refused'), MockResponse(200, b'{}')]
+        assert requesting.load_url_with_requests(url, schemes=schemes) == b'{}'
+        assert [call.args[0] for call in mock_get.call_args_list] == [url, 'http://dev.example.com/dws/aid/did.json']
+
+        mock_get.reset_mock()
+        mock_get.side_effect = [MockResponse(200, b'{}')]
+        assert requesting.load_url_with_requests(url, schemes=schemes) == b'{}'
+        assert [call.args[0] for call in mock_get.call_args_list] == ['http://dev.example.com/dws/aid/did.json']
+
+        # a failing remembered scheme is forgotten and the other scheme tried
+        mock_get.reset_mock()
+        mock_get.side_effect = [requests.exceptions.ConnectionError('gone'), MockResponse(200, b'{}')]
+        assert requesting.load_url_with_requests(url, schemes=schemes) == b'{}'
+        assert [call.args[0] for call in mock_get.call_args_list] == ['http://dev.example.com/dws/aid/did.json', url]
+        assert schemes.order(url) == ['https', 'http']
+
+    strict = requesting.SchemeMemory(policy=requesting.SchemeMemory.HttpsOnly)
+    with patch('requests.get') as mock_get:
+        mock_get.side_effect = requests.exceptions.ConnectionError('refused')
+        with pytest.raises(ArtifactResolveError, match='Failed to connect to HTTPS URL'):
+            requesting.load_url_with_requests(url, schemes=strict)
+        assert mock_get.call_count == 1, 'no HTTP fallback under https-only'
+
+
+def test_circuit_breaker_opens_probes_and_backs_off():
+    now = [0.0]
+    breaker = requesting.CircuitBreaker(threshold=2, backoff=5.0, max_backoff=8.0, clock=lambda: now[0])
+    host = 'example.com:7677'
+    breaker.failure(host)
+    assert breaker.allow(host), 'circuit stays closed below the threshold'
+    breaker.success(host)
+    breaker.failure(host)
+    assert breaker.state(host) == requesting.CircuitBreaker.Closed, 'success resets consecutive failures'
+
+    breaker.failure(host)
+    assert breaker.state(host) == requesting.CircuitBreaker.Open
+    assert not breaker.allow(host)
+    assert breaker.retry_after(host) == 5.0
+    assert breaker.allow('other.com'), 'circuits are per host'
+
+    now[0] = 5.0
+    assert breaker.allow(host), 'a probe is allowed once the backoff passes'
+    assert breaker.state(host) == requesting.CircuitBreaker.HalfOpen
+    assert not breaker.allow(host), 'only a single probe is in flight'
+    breaker.failure(host)
+    assert breaker.state(host) == requesting.CircuitBreaker.Open
+    assert breaker.retry_after(host) == 8.0, 'failed probe doubles the backoff up to max_backoff'
+    assert breaker.metrics() == {host: {'state': requesting.CircuitBreaker.Open, 'failures': 3}}
+
+    now[0] = 13.0
+    assert breaker.allow(host)
+    breaker.success(host)
+    assert breaker.state(host) == requesting.CircuitBreaker.Closed
+    assert breaker.metrics() == {}
+
+
+def test_read_body_aborts_artifacts_over_their_size_limit():
+    limits = requesting.SizeLimits(did_json=4, keri_cesr=8)
+    assert limits.limit('https://example.com/dws/aid/did.json') == 4
+    assert limits.limit('https://example.com/dws/aid/keri.cesr') == 8
+
+    response = MockResponse(200, b'{"a": 1}', {'Content-Length': '8'})
+    with pytest.raises(ArtifactTooLargeError, match='of 8 bytes exceeds the 4 bytes allowed'):
+        requesting.read_body(response, 'https://example.com/did.json', limits=limits)
+
+    response = MockResponse(200, b'{"a": 1}')  # no Content-Length so the body is counted as it is read
+    with patch.object(requesting, 'ChunkSize', 2), pytest.raises(ArtifactTooLargeError, match='exceeds the 4 bytes'):
+        requesting.read_body(response, 'https://example.com/did.json', limits=limits)
+
+    with pytest.raises(ArtifactResolveError, match='Invalid keri.cesr artifact'):
+        requesting.read_body(MockResponse(200, b'not a cesr stream at all, just text'), 'https://example.com/keri.cesr')
+
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'{"a": 1}', {'ETag': '"x"'})
+        cache = requesting.ArtifactCache(limits=limits)
+        with pytest.raises(ArtifactTooLargeError):
+            cache('https://example.com/did.json')
+        assert mock_get.call_args.kwargs['stream'], 'artifacts are streamed'
+        assert not cache.entries
+
+
+def test_loads_stop_once_their_deadline_passes():
+    response = MockResponse(200, b'{"a": 1}')
+    with pytest.raises(ArtifactResolveError, match='Timed out reading artifact'):
+        requesting.read_body(response, 'https://example.com/did.json', deadline=time.monotonic() - 1.0)
+
+    with patch('requests.get') as mock_get, pytest.raises(ArtifactResolveError, match='Timed out loading'):
+        requesting.request_with_requests('https://example.com/did.json', deadline=time.monotonic() - 1.0)
+    assert not mock_get.called, 'no attempt is made past the deadline'
+
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = MockResponse(200, b'{}')
+        assert requesting.load_url_with_requests('https://example.com/did.json', timeout=3.0) == b'{}'
+        assert 0 < mock_get.call_args.kwargs['timeout'] <= 3.0, 'attempts are given at most the timeout'
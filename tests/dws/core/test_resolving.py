@@ -2,12 +2,15 @@ import json
 import os
 import tempfile
 import threading
+import time
 import urllib.parse
 from collections import deque
+from concurrent import futures
 from unittest.mock import MagicMock, Mock, patch
 
 import falcon
 import pytest
+import requests
 from falcon import testing
 from hio.base import doing
 from keri import core, kering
@@ -19,8 +22,8 @@ from keri.peer import exchanging
 from keri.vdr import credentialing, verifying
 from mockito import mock, when
 
-from dws import ArtifactResolveError, log_name, ogler, set_log_level
-from dws.core import artifacting, didding, generating, requesting, resolving
+from dws import ArtifactResolveError, UnknownAID, log_name, ogler, set_log_level
+from dws.core import artifacting, caching, didding, generating, ingesting, requesting, resolving, working
 from dws.core.didkeri import KeriResolver
 from dws.core.ends import monitoring
 from tests import conftest, keri_api
@@ -1182,6 +1185,7 @@ def test_resolve_meta_true_yet_no_returned_metadata_wraps_in_meta():
         result, err = resolving.resolve(hby, rgy, did, meta=True)
 
         mock_verify.assert_called_once_with({}, dd_actual, meta=True)
+        mock_save_cesr.assert_called_once_with(hby=hby, rgy=rgy, kc_res=keri_cesr, aid=aid, ingestor=None)
 
 
 def test_save_cesr_aid_not_in_kevers_raises():
@@ -1246,3 +1250,347 @@ def test_resolve_did_keri_error_cases():
     result, err = resolving.resolve_did_keri(hby, rgy, did)
     assert not result, 'Expected result to be False for invalid did:keri'
     assert err == {'error': f'Unknown AID, cannot resolve DID {did}'}
+
+
+def test_resolve_did_keri_times_out_without_holding_the_keystore_lock():
+    with habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (hby, _):
+        rgy = credentialing.Regery(hby=hby, name=hby.name, temp=True)
+        did = 'did:keri:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+        oobi = 'http://127.0.0.1:1/oobi/EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+        lock = threading.RLock()
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(resolving.resolve_did_keri(hby, rgy, did, oobi, timeout=1.0, lock=lock))
+        )
+        thread.start()
+        time.sleep(0.2)
+        acquired = lock.acquire(timeout=0.5)
+        if acquired:
+            lock.release()
+        thread.join(timeout=5.0)
+        assert acquired, 'the keystore lock is free while waiting on the OOBI host'
+        assert results == [(False, {'error': f'Timed out resolving OOBI {oobi} for DID {did}'})]
+
+
+def test_resolve_skips_ingestion_of_keri_cesr_already_ingested():
+    aid = 'EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    did = f'did:webs:127.0.0.1%3A7676:dws:{aid}'
+    hby = mock(habbing.Habery)
+    hby.kevers = dbdict()
+    hby.kevers[aid] = mock(eventing.Kever)
+    rgy = mock(credentialing.Regery)
+    ingestor = Mock(lock=threading.RLock(), streams=ingesting.IngestedStreams())
+    kc = {'res': b'cesr'}
+
+    def load_url(url, timeout=None):
+        return b'{}' if url.endswith('did.json') else kc['res']
+
+    with (
+        patch('dws.core.resolving.save_cesr') as mock_save_cesr,
+        patch('dws.core.ingesting.pending_key_events', return_value=False) as mock_pending,
+        patch('dws.core.resolving.get_generated_did_doc'),
+        patch('dws.core.resolving.verify', return_value=(True, {})),
+        patch('dws.core.didding.from_did_web'),
+    ):
+        resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        assert mock_save_cesr.call_count == 1, 'the stream the AID was last ingested from is not ingested again'
+
+        kc['res'] = b'cesr2'
+        mock_save_cesr.side_effect = kering.KeriError('boom')
+        with pytest.raises(kering.KeriError):
+            resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        mock_save_cesr.side_effect = None
+        mock_pending.return_value = True
+        resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        assert mock_save_cesr.call_count == 3, 'failed ingestions are retried'
+        resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        assert mock_save_cesr.call_count == 4, 'streams with escrowed key events are ingested again'
+
+        mock_pending.return_value = False
+        resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        resolving.resolve(hby, rgy, did, load_url=load_url, ingestor=ingestor)
+        assert mock_save_cesr.call_count == 5
+
+        resolving.resolve(hby, rgy, did, load_url=load_url)
+        assert mock_save_cesr.call_count == 6, 'streams are always ingested without a long lived ingestor'
+
+
+def test_get_dws_artifacts_loads_concurrently():
+    aid = 'EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    did = f'did:webs:127.0.0.1%3A7676:dws:{aid}'
+    barrier = threading.Barrier(2, timeout=2.0)
+
+    def load_url(url, timeout=None):
+        barrier.wait()  # only passes when both artifacts are being loaded at once
+        return b'{}' if url.endswith('did.json') else b'cesr'
+
+    assert resolving.get_dws_artifacts(did, load_url=load_url, timeout=3.0) == (aid, b'{}', b'cesr')
+
+
+def test_get_dws_artifacts_loads_on_a_shared_or_given_executor():
+    did = 'did:webs:127.0.0.1%3A7676:dws:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    threads = []
+
+    def load_url(url, timeout=None):
+        threads.append(threading.current_thread().name)
+        return b'{}'
+
+    resolving.get_dws_artifacts(did, load_url=load_url)
+    resolving.get_dws_artifacts(did, load_url=load_url)
+    assert resolving.artifact_executor() is resolving.artifact_executor(), 'one executor for every resolution'
+    assert all(name.startswith('dws-artifacts') for name in threads)
+
+    threads.clear()
+    with futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='given') as executor:
+        resolving.get_dws_artifacts(did, load_url=load_url, executor=executor)
+    assert len(threads) == 2
+    assert all(name.startswith('given') for name in threads)
+
+
+def test_get_dws_artifacts_fails_fast_and_enforces_deadline():
+    did = 'did:webs:127.0.0.1%3A7676:dws:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    release = threading.Event()
+
+    def failing_load_url(url, timeout=None):
+        if url.endswith('did.json'):
+            raise ArtifactResolveError('did.json not found')
+        release.wait(timeout)
+        return b''
+
+    start = time.monotonic()
+    with pytest.raises(ArtifactResolveError, match='did.json not found'):
+        resolving.get_dws_artifacts(did, load_url=failing_load_url, timeout=5.0)
+    assert time.monotonic() - start < 2.0, 'failure does not wait on the other load'
+    release.set()
+
+    hang = threading.Event()
+
+    def hanging_load_url(url, timeout=None):
+        hang.wait(1.0)  # outlives the deadline
+        return b''
+
+    start = time.monotonic()
+    with pytest.raises(ArtifactResolveError, match='Timed out after 0.4 seconds'):
+        resolving.get_dws_artifacts(did, load_url=hanging_load_url, timeout=0.2)
+    assert time.monotonic() - start < 1.0
+    hang.set()
+
+
+def test_get_dws_artifacts_leaves_the_http_fallback_its_timeout():
+    did = 'did:webs:127.0.0.1%3A7676:dws:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+
+    class Response:
+        status_code = 200
+
+        def __init__(self):
+            self.headers = {}
+
+        def iter_content(self, chunk_size=1):
+            yield b'{}'
+
+        def close(self):
+            pass
+
+    def get(url, timeout=None, **kwa):
+        if url.startswith('https'):
+            time.sleep(timeout)
+            raise requests.exceptions.ConnectTimeout(f'timed out after {timeout} seconds')
+        time.sleep(0.05)
+        return Response()
+
+    with patch('requests.get', side_effect=get), patch.object(requesting, 'read_body', return_value=b'{}'):
+        _, dd_res, kc_res = resolving.get_dws_artifacts(did, load_url=requesting.load_url_with_requests, timeout=0.2)
+    assert dd_res == kc_res == b'{}'
+
+
+class FakeResolver:
+    """Records resolution order and holds back DIDs listed in slow until released."""
+
+    def __init__(self, slow=()):
+        self.calls = []
+        self.slow = set(slow)
+        self.release = threading.Event()
+
+    def resolve_did(self, did, oobi=None, meta=False):
+        self.calls.append(did)
+        if did in self.slow:
+            self.release.wait(2.0)
+        if did.endswith('broken'):
+            raise ValueError('boom')
+        return True, {'id': did}
+
+
+def test_batch_resolver_dedupes_and_streams_ndjson():
+    aid = 'EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    other = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+    first, second = f'did:webs:example.com:{aid}', f'did:webs:example.org:{aid}'
+    keri_did = f'did:keri:{other}'
+    resolver = FakeResolver()
+    app = resolving.falcon_app()
+    app.add_route('/1.0/identifiers', resolving.BatchResolverResource(resolver, concurrency=1))
+    client = testing.TestClient(app=app)
+
+    rep = client.simulate_post('/1.0/identifiers', json=[first, second, first, keri_did, 'did:example:abc'])
+    assert rep.status == falcon.HTTP_200
+    assert rep.headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in rep.text.splitlines()]
+    assert lines[0] == {'did': 'did:example:abc', 'verified': False, 'result': {'error': 'invalid DID: did:example:abc'}}
+    assert sorted(line['did'] for line in lines[1:]) == sorted([first, second, keri_did]), 'identical DIDs answered once'
+    assert all(line['verified'] and line['result'] == {'id': line['did']} for line in lines[1:])
+    assert resolver.calls.index(first) + 1 == resolver.calls.index(second), 'DIDs of one AID resolve in sequence'
+
+    for body in ({'dids': [first]}, [], [1]):
+        rep = client.simulate_post('/1.0/identifiers', json=body)
+        assert rep.status == falcon.HTTP_400
+    rep = client.simulate_post('/1.0/identifiers', json=[f'did:keri:{i}' for i in range(300)])
+    assert rep.status == falcon.HTTP_400
+    assert 'at most 256' in rep.json['error']
+
+
+def test_batch_resolver_times_out_slow_dids_and_reports_errors():
+    fast = 'did:keri:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    slow = 'did:keri:EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+    resolver = FakeResolver(slow=[slow])
+    batch = resolving.BatchResolverResource(resolver, concurrency=2, timeout=0.2)
+    app = resolving.falcon_app()
+    app.add_route('/1.0/identifiers', batch)
+    rep = testing.TestClient(app=app).simulate_post('/1.0/identifiers', json=[slow, fast])
+    resolver.release.set()
+    lines = [json.loads(line) for line in rep.text.splitlines()]
+    assert lines[0] == {'did': fast, 'verified': True, 'result': {'id': fast}}, 'fast DIDs are not held back by slow ones'
+    assert lines[1]['did'] == slow
+    assert not lines[1]['verified']
+    assert lines[1]['result']['error'] == f'Timed out after 0.2 seconds resolving DID {slow}'
+
+    broken = 'did:webs:example.com:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft:broken'
+    with patch.object(resolving, 'did_aid', return_value='Ebroken'):
+        rep = testing.TestClient(app=app).simulate_post('/1.0/identifiers', json=[broken])
+    line = json.loads(rep.text)
+    assert not line['verified']
+    assert 'boom' in line['result']['error']
+
+
+def test_batch_resolver_waits_for_room_in_the_shared_pool():
+    aids = [
+        'EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft',
+        'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4',
+        'EH_DwQTmuMW6P5DQYyJBwtrijU1c-AjXQ-7cdNEvj_3_',
+    ]
+    dids = [f'did:keri:{aid}' for aid in aids]
+    resolver = FakeResolver(slow=dids[:1])
+    pool = working.WorkerPool(size=1, queue_depth=0)
+    app = resolving.falcon_app()
+    app.add_route('/1.0/identifiers', resolving.BatchResolverResource(resolver, pool=pool, concurrency=2))
+    timer = threading.Timer(0.1, resolver.release.set)
+    timer.start()
+    rep = testing.TestClient(app=app).simulate_post('/1.0/identifiers', json=dids)
+    timer.join()
+    lines = [json.loads(line) for line in rep.text.splitlines()]
+    assert [line['did'] for line in lines] == dids, 'one worker resolves the AIDs one at a time'
+    assert all(line['verified'] for line in lines)
+    metrics = pool.metrics()
+    assert metrics['completed'] == 3
+    assert metrics['rejected'] > 0, 'submissions to the full pool are retried rather than queued'
+    pool.shutdown()
+
+
+def test_resolve_many_bounds_concurrency_and_reports_each_did():
+    dids = [f'did:webs:example.com:E{i:043d}' for i in range(6)] + ['did:keri:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft']
+    lock = threading.Lock()
+    running = [0, 0]  # current, max
+
+    def resolve(hby, rgy, did, meta=False, load_url=None, timeout=None, ingestor=None):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        if did.endswith('5'):
+            raise kering.KeriError('not in habery')
+        return did.endswith(('0', '2', '4')), {'id': did}
+
+    with patch('dws.core.resolving.resolve', side_effect=resolve):
+        records = list(resolving.resolve_many(Mock(), Mock(), iter(dids), ingestor=Mock(), concurrency=2))
+
+    assert running[1] == 2, 'at most concurrency DIDs in flight'
+    by_did = {record['did']: record for record in records}
+    assert set(by_did) == set(dids)
+    assert [by_did[did]['verified'] for did in dids[:5]] == [True, False, True, False, True]
+    assert by_did[dids[5]] == {**by_did[dids[5]], 'verified': False, 'result': {'error': 'not in habery'}}
+    assert 'invalid did:webs DID' in by_did[dids[6]]['result']['error']
+    assert all(record['seconds'] >= 0 for record in records)
+
+
+def test_resolver_coalesces_concurrent_resolutions_of_a_did():
+    did = 'did:webs:example.com:EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    started, release = threading.Event(), threading.Event()
+
+    def slow_resolve(**kwa):
+        started.set()
+        release.wait(2.0)
+        return True, {'id': kwa['did']}
+
+    resolver = resolving.UniversalResolverResource(hby=Mock(), rgy=Mock(), oobiery=None)
+    with patch('dws.core.resolving.resolve', side_effect=slow_resolve) as resolve, futures.ThreadPoolExecutor(3) as executor:
+        leader = executor.submit(resolver.resolve_did, did)
+        assert started.wait(2.0)
+        followers = [executor.submit(resolver.resolve_did, did) for _ in range(2)]
+        while resolver.flights.metrics()['followers'] < 2:
+            time.sleep(0.001)
+        release.set()
+        assert [f.result() for f in [leader, *followers]] == [(True, {'id': did})] * 3
+    assert resolve.call_count == 1
+
+    resolver.TimeoutCoalesced = 0.05
+    release.clear()
+    with patch('dws.core.resolving.resolve', side_effect=slow_resolve), futures.ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(resolver.resolve_did, did)
+        while not resolver.flights.in_flight():
+            time.sleep(0.001)
+        result, data = resolver.resolve_did(did)
+        release.set()
+        leader.result()
+    assert not result
+    assert data['error'] == f'Timed out after 0.05 seconds waiting for concurrent resolution of {did}'
+
+
+def test_resolver_caches_failures_and_fails_fast_while_circuit_open():
+    aid = 'EBFn5ge82EQwxp9eeje-UMEXF-v-3dlfbdVMX_PNjSft'
+    now = [0.0]
+    negative = caching.NegativeCache(clock=lambda: now[0])
+    breaker = requesting.CircuitBreaker(threshold=2, backoff=5.0, clock=lambda: now[0])
+    resolver = resolving.UniversalResolverResource(hby=Mock(), rgy=Mock(), oobiery=None, negative=negative, breaker=breaker)
+    dids = [f'did:webs:dead.example.com%3A7677:{path}:{aid}' for path in ('a', 'b', 'c')]
+    with patch('dws.core.resolving.resolve', return_value=(False, {'error': 'Failed to load URL'})) as resolve:
+        result, data = resolver.resolve_did(dids[0])
+        assert not result
+        assert data['didResolutionMetadata'] == {'error': resolving.ErrorNotFound, 'errorMessage': 'Failed to load URL'}
+        assert resolver.resolve_did(dids[0]) == (False, data), 'failures are served from the negative cache'
+        assert resolve.call_count == 1
+
+        resolver.resolve_did(dids[1])
+        assert breaker.state('dead.example.com:7677') == requesting.CircuitBreaker.Open
+        result, data = resolver.resolve_did(dids[2])
+        assert data['didResolutionMetadata']['error'] == resolving.ErrorHostUnavailable
+        assert resolve.call_count == 2, 'no resolution is attempted while the circuit is open'
+
+    now[0] = 60.0
+    with patch('dws.core.resolving.resolve', side_effect=UnknownAID(aid, dids[2])):
+        result, data = resolver.resolve_did(dids[2])
+    assert data['didResolutionMetadata']['error'] == resolving.ErrorNotFound
+    assert negative.get(dids[2])[0] == caching.FailureUnknownAID
+    assert breaker.state('dead.example.com:7677') == requesting.CircuitBreaker.Closed, 'host served the artifacts'
+
+    with patch('dws.core.resolving.resolve', side_effect=json.JSONDecodeError('Expecting value', '', 0)):
+        result, data = resolver.resolve_did(dids[0])
+    assert data['didResolutionMetadata']['error'] == resolving.ErrorInvalidDidDocument
+    assert negative.get(dids[0])[0] == caching.FailureParse
+
+    app = resolving.falcon_app()
+    app.add_route('/1.0/identifiers/{did}', resolver)
+    rep = testing.TestClient(app=app).simulate_get(f'/1.0/identifiers/{urllib.parse.quote(dids[0])}')
+    assert rep.status == falcon.HTTP_417
+    assert rep.json['error'] == f'failed to resolve DID: {dids[0]}'
+    assert rep.json['didResolutionMetadata']['error'] == resolving.ErrorInvalidDidDocument
@@ -0,0 +1,207 @@
+import queue
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from keri import kering
+from keri.app import habbing
+from keri.db import basing
+from keri.help import helping
+from keri.vdr import credentialing
+
+from dws.core import ingesting, supervising
+
+
+def run_writer_thread(writer):
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            writer.recur()
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return stop, thread
+
+
+def test_remote_ingestor_sends_unseen_events_to_writer():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        requests, replies = queue.Queue(), queue.Queue()
+        writer = supervising.WriterDoer(
+            hby=hby, ingestor=ingesting.Ingestor(hby=hby, rgy=rgy), requests=requests, replies=[replies]
+        )
+        stop, thread = run_writer_thread(writer)
+        client = supervising.WriterClient(worker=0, requests=requests, replies=replies, timeout=5.0)
+        try:
+            remote = supervising.RemoteIngestor(hby=hby, rgy=rgy, writer=client)
+            wat_hab.interact()
+            ims = bytes(wat_hab.replay(pre=wat_hab.pre))
+            remote.ingest(ims=ims, aid=wat_hab.pre)
+            assert hby.kevers[wat_hab.pre].sn == 1
+
+            # nothing unseen so nothing is sent to the writer
+            client.requests = None
+            remote.ingest(ims=ims, aid=wat_hab.pre)
+            client.requests = requests
+
+            with (
+                patch.object(writer.ingestor, 'ingest', side_effect=ValueError('boom')),
+                pytest.raises(kering.KeriError, match='Writer failed to apply ingest job: boom'),
+            ):
+                client.submit(supervising.JobIngest, ims=ims, aid=wat_hab.pre)
+            with pytest.raises(kering.KeriError, match='unknown job kind'):
+                client.submit('other')
+
+            # AIDs known to the keystore resolve without an OOBI
+            ok, doc = remote.resolve_did_keri(hby, rgy, f'did:keri:{wat_hab.pre}', oobi='http://127.0.0.1:1/oobi')
+            assert ok
+            assert doc['id'] == f'did:keri:{wat_hab.pre}'
+        finally:
+            stop.set()
+            thread.join()
+            client.close()
+
+
+def test_writer_fails_oobi_jobs_that_time_out():
+    with habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        now = [0.0]
+        requests, replies = queue.Queue(), queue.Queue()
+        writer = supervising.WriterDoer(
+            hby=hby, ingestor=ingesting.Ingestor(hby=hby, rgy=rgy), requests=requests, replies=[replies], clock=lambda: now[0]
+        )
+        aid = 'EKYLUMmNPZeEs77Zvclf0bSN5IN-mLfLpx2ySb-HDlk4'
+        requests.put((0, 7, supervising.JobOobi, {'aid': aid, 'oobi': 'http://127.0.0.1:1/oobi'}))
+        writer.recur()
+        assert replies.empty(), 'OOBI jobs are answered once resolved or timed out'
+        assert hby.db.oobis.get(keys=('http://127.0.0.1:1/oobi',)) is not None
+
+        now[0] = writer.oobi_timeout
+        writer.recur()
+        assert replies.get_nowait() == (7, False, 'Timed out resolving OOBI http://127.0.0.1:1/oobi')
+        assert not writer.oobis
+
+
+def test_remote_ingestor_resolves_aids_unknown_before_the_oobi():
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHab(salt=b'0AAB_Fidf5WeZf6VFc53IxVw', name='wine', transferable=True, temp=True) as (hby, hab),
+    ):
+        rgy = credentialing.Regery(hby=hby, name=hab.name, temp=True)
+        requests, replies = queue.Queue(), queue.Queue()
+        writer = supervising.WriterDoer(
+            hby=hby, ingestor=ingesting.Ingestor(hby=hby, rgy=rgy), requests=requests, replies=[replies]
+        )
+        oobi = f'http://127.0.0.1:1/oobi/{wat_hab.pre}'
+
+        def resolve_oobi(hby, aid, oobi):  # stands in for the Oobiery of the writer fetching the KEL
+            hby.psr.parse(ims=bytearray(wat_hab.replay(pre=aid)))
+            hby.db.roobi.pin(keys=(oobi,), val=basing.OobiRecord(cid=aid, date=helping.nowIso8601()))
+
+        stop, thread = run_writer_thread(writer)
+        client = supervising.WriterClient(worker=0, requests=requests, replies=replies, timeout=5.0)
+        try:
+            remote = supervising.RemoteIngestor(hby=hby, rgy=rgy, writer=client)
+            assert wat_hab.pre not in hby.kevers
+            with patch.object(supervising.resolving, 'queue_oobi', side_effect=resolve_oobi):
+                ok, doc = remote.resolve_did_keri(hby, rgy, f'did:keri:{wat_hab.pre}', oobi=oobi)
+            assert ok, doc
+            assert doc['id'] == f'did:keri:{wat_hab.pre}'
+        finally:
+            stop.set()
+            thread.join()
+            client.close()
+
+
+def test_remote_ingestor_refreshes_key_state_stored_through_another_worker(tmp_path):
+    salt = '0AAB_Fidf5WeZf6VFc53IxVw'
+    with (
+        habbing.openHab(salt=b'0ACB-gtnUTQModt9u_UC3LFQ', name='water', transferable=True, temp=True) as (_, wat_hab),
+        habbing.openHby(name='shared', temp=False, headDirPath=str(tmp_path), salt=salt) as writer_hby,
+        habbing.openHby(name='shared', temp=False, headDirPath=str(tmp_path), salt=salt) as hby,
+    ):
+        writer_rgy = credentialing.Regery(hby=writer_hby, name='shared', temp=True)
+        rgy = credentialing.Regery(hby=hby, name='shared', temp=True)
+        requests, replies = queue.Queue(), queue.Queue()
+        writer = supervising.WriterDoer(
+            hby=writer_hby, ingestor=ingesting.Ingestor(hby=writer_hby, rgy=writer_rgy), requests=requests, replies=[replies]
+        )
+        stop, thread = run_writer_thread(writer)
+        client = supervising.WriterClient(worker=0, requests=requests, replies=replies, timeout=5.0)
+        try:
+            remote = supervising.RemoteIngestor(hby=hby, rgy=rgy, writer=client)
+            remote.ingest(ims=bytes(wat_hab.replay(pre=wat_hab.pre)), aid=wat_hab.pre)
+            assert hby.kevers[wat_hab.pre].sn == 0
+
+            # another worker has the writer store a rotation this worker has no key state of
+            wat_hab.rotate()
+            ims = bytes(wat_hab.replay(pre=wat_hab.pre))
+            client.submit(supervising.JobIngest, ims=ims, aid=wat_hab.pre)
+            assert dict.get(hby.kevers, wat_hab.pre).sn == 0, 'the key state in memory is stale'
+
+            # nothing is unseen but the stale key state is dropped and read through again
+            rgy.reger.tevers.update(own=SimpleNamespace(pre=wat_hab.pre), other=SimpleNamespace(pre='other'))
+            client.requests = None
+            remote.ingest(ims=ims, aid=wat_hab.pre)
+            client.requests = requests
+            assert hby.kevers[wat_hab.pre].sn == 1
+            assert list(dict.keys(rgy.reger.tevers)) == ['other'], 'only registries issued by the AID are dropped'
+        finally:
+            stop.set()
+            thread.join()
+            client.close()
+
+
+@pytest.mark.skipif(not supervising.reuse_port_supported(), reason='SO_REUSEPORT not supported')
+def test_reuse_port_servers_share_a_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    first = supervising.ReusePortServer(host='127.0.0.1', port=port)
+    second = supervising.ReusePortServer(host='127.0.0.1', port=port)
+    try:
+        assert first.reopen()
+        assert second.reopen(), 'second worker binds the same port'
+        assert first.ha == second.ha
+    finally:
+        first.close()
+        second.close()
+
+
+def stub_writer(options, requests, replies, ready):
+    ready.set()
+    time.sleep(30)
+
+
+def stub_worker(worker, options, requests, replies):
+    if options['exit']:
+        return
+    time.sleep(30)
+
+
+@pytest.mark.skipif(not supervising.reuse_port_supported(), reason='SO_REUSEPORT not supported')
+def test_supervisor_restarts_exited_workers():
+    supervisor = supervising.Supervisor(processes=2, options={'exit': True}, run_writer=stub_writer, run_worker=stub_worker)
+    supervisor.enter()
+    try:
+        assert supervisor.writer.is_alive()
+        assert len(supervisor.workers) == 2
+        for process in supervisor.workers:
+            process.join(timeout=10.0)
+        supervisor.options['exit'] = False
+        assert supervisor.recur() is False
+        assert supervisor.restarts == 2
+        assert all(process.is_alive() for process in supervisor.workers)
+    finally:
+        supervisor.exit()
+    assert not supervisor.writer.is_alive()
+    assert not any(process.is_alive() for process in supervisor.workers)
+    assert supervisor.recur() is True, 'supervision ends when the writer exits'
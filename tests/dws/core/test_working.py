@@ -0,0 +1,116 @@
+import threading
+
+import falcon
+from falcon import testing
+from hio.base import doing
+from hio.core import http
+
+from dws.core import requesting, resolving, working
+
+
+class SlowResource:
+    """Resolution stand in that blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def on_get(self, req, rep, did):
+        self.started.set()
+        self.release.wait(5.0)
+        rep.media = {'id': did}
+
+
+def start_response_recorder():
+    calls = []
+
+    def start_response(status, headers, exc_info=None):
+        calls.append((status, dict(headers)))
+
+    return calls, start_response
+
+
+def test_offloop_app_runs_resolutions_on_workers_and_rejects_when_full():
+    resource = SlowResource()
+    app = falcon.App()
+    app.add_route('/1.0/identifiers/{did}', resource)
+    app.add_route('/health', resolving.ends.HealthEnd())
+    pool = working.WorkerPool(size=1, queue_depth=0)
+    offloop = working.OffloopApp(app, pool=pool)
+
+    calls, start_response = start_response_recorder()
+    environ = testing.create_environ(path='/1.0/identifiers/did:webs:example.com:abc')
+    chunks = iter(offloop(environ, start_response))
+    assert resource.started.wait(2.0)
+    assert next(chunks) == b'', 'empty chunks while the worker resolves'
+    assert calls == [], 'headers are not started before the worker is done'
+    assert pool.metrics()['in_flight'] == 1
+
+    # pool and queue full so the next resolution is rejected at once
+    busy_calls, busy_start = start_response_recorder()
+    body = b''.join(offloop(testing.create_environ(path='/1.0/identifiers/did:webs:b'), busy_start))
+    assert busy_calls[0][0] == '503 Service Unavailable'
+    assert busy_calls[0][1]['Retry-After'] == '1'
+    assert b'busy' in body
+    assert pool.metrics()['rejected'] == 1
+
+    # other paths are served inline even while the pool is full
+    health_calls, health_start = start_response_recorder()
+    b''.join(offloop(testing.create_environ(path='/health'), health_start))
+    assert health_calls[0][0] == '200 OK'
+
+    resource.release.set()
+    body = b''.join(chunk for chunk in chunks)
+    assert calls[0][0] == '200 OK'
+    assert body == b'{"id": "did:webs:example.com:abc"}'
+    pool.shutdown()
+    assert pool.metrics()['in_flight'] == 0
+    assert pool.metrics()['completed'] == 1
+
+
+def test_offloop_app_answers_500_when_worker_fails():
+    def broken_app(environ, start_response):
+        raise ValueError('boom')
+
+    pool = working.WorkerPool(size=1, queue_depth=1)
+    calls, start_response = start_response_recorder()
+    body = b''.join(
+        working.OffloopApp(broken_app, pool=pool)(testing.create_environ(path='/1.0/identifiers/x'), start_response)
+    )
+    assert calls[0][0] == '500 Internal Server Error'
+    assert b'internal resolver error' in body
+    pool.shutdown()
+
+
+def test_hio_server_serves_other_clients_while_resolution_runs():
+    resource = SlowResource()
+    app = resolving.falcon_app()
+    app.add_route('/1.0/identifiers/{did}', resource)
+    app.add_route('/health', resolving.ends.HealthEnd())
+    pool = working.WorkerPool(size=2, queue_depth=2)
+    server = http.Server(port=7791, app=working.OffloopApp(app, pool=pool))
+    doist = doing.Doist(limit=5.0, tock=0.03125, real=True)
+    deeds = doist.enter(doers=[http.ServerDoer(server=server)])
+    try:
+        slow, slow_doer = requesting.create_http_client('GET', 'http://127.0.0.1:7791/1.0/identifiers/slow')
+        deeds += doist.enter(doers=[slow_doer])
+        while not resource.started.is_set():
+            doist.recur(deeds=deeds)
+
+        health, health_doer = requesting.create_http_client('GET', 'http://127.0.0.1:7791/health')
+        deeds += doist.enter(doers=[health_doer])
+        while not health.responses:
+            doist.recur(deeds=deeds)
+        assert health.respond().status == 200
+        assert not slow.responses, 'slow resolution still in flight while health was served'
+
+        resource.release.set()
+        while not slow.responses:
+            doist.recur(deeds=deeds)
+        rep = slow.respond()
+        assert rep.status == 200
+        assert bytes(rep.body) == b'{"id": "slow"}'
+    finally:
+        resource.release.set()
+        server.close()
+        pool.shutdown()